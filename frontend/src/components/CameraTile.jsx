@@ -225,8 +225,9 @@ const CameraTile = ({ camera, onVideoUpload, onStatusChange }) => {
       >
         {streamUrl ? (
           <>
+            {/* Tiles get the small 10 FPS "grid" stream; fullscreen switches to the full-size one */}
             <img
-              src={streamUrl}
+              src={`${streamUrl}?profile=${isFullscreen ? 'full' : 'grid'}`}
               alt={`${camera.name} live detection stream`}
               className="w-full h-full object-cover"
             />
@@ -41,6 +41,9 @@ const RealTimeAnalytics = ({ socket }) => {
       
       // Check if alert matches filter
       if (filter !== 'all' && alertData.type !== filter) return;
+
+      // a batched alert stands for itself plus the repeats folded into it
+      const weight = 1 + (alertData.repeats || 0);
       
       setGraphData(prev => {
         const newData = [...prev];
@@ -50,17 +53,17 @@ const RealTimeAnalytics = ({ socket }) => {
           // Update existing entry
           newData[existingIndex] = {
             ...newData[existingIndex],
-            [alertData.type]: (newData[existingIndex][alertData.type] || 0) + 1,
-            total: (newData[existingIndex].total || 0) + 1
+            [alertData.type]: (newData[existingIndex][alertData.type] || 0) + weight,
+            total: (newData[existingIndex].total || 0) + weight
           };
         } else {
           // Add new entry
           newData.push({
             time: timestamp,
-            weapon: alertData.type === 'weapon' ? 1 : 0,
-            fight: alertData.type === 'fight' ? 1 : 0,
-            crowd: alertData.type === 'crowd' ? 1 : 0,
-            total: 1
+            weapon: alertData.type === 'weapon' ? weight : 0,
+            fight: alertData.type === 'fight' ? weight : 0,
+            crowd: alertData.type === 'crowd' ? weight : 0,
+            total: weight
           });
         }
         
@@ -69,9 +72,11 @@ const RealTimeAnalytics = ({ socket }) => {
       });
     };
 
-    socket.on('new_alert', handleNewAlert);
+    // Alerts arrive in batches
+    const handleNewAlerts = (batch) => batch.forEach(handleNewAlert);
+    socket.on('new_alerts', handleNewAlerts);
     
-    return () => socket.off('new_alert', handleNewAlert);
+    return () => socket.off('new_alerts', handleNewAlerts);
   }, [socket, filter, liveMode]);
 
   const fetchHistoricalData = async (date) => {
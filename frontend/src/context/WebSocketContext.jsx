@@ -115,25 +115,29 @@ export const WebSocketProvider = ({ children }) => {
       console.log('Connection status:', data);
     });
 
-    socket.on('new_alert', (data) => {
-      console.log('📡 Received alert:', data);
-      
+    // Alerts arrive in batches (repeats within a few seconds folded into one, see `repeats`)
+    socket.on('new_alerts', (batch) => {
+      console.log(`📡 Received ${batch.length} alert(s)`);
+
       // Map backend alert format to frontend format
-      const alertType = data.type === 'crowd_group_complete' ? 'crowd' : data.type;
-      const severity = data.type === 'weapon' || data.type === 'fight' ? 'high' : 'med';
-      
-      const newAlert = {
-        id: Date.now() + Math.random(),
-        alertType: alertType,
-        severity: severity,
-        evidence: data.type === 'crowd_group_complete' ? ['density', 'duration'] : ['visual', 'detection'],
-        cameraId: data.camera || 'Camera-1',
-        timestamp: data.time,
-        peopleCount: data.people_count || 0,
-        confidence: data.confidence || 0
-      };
-
-      setAlerts((prev) => [newAlert, ...prev].slice(0, 20));
+      const newAlerts = batch.map((data) => {
+        const alertType = data.type === 'crowd_group_complete' ? 'crowd' : data.type;
+        const severity = data.type === 'weapon' || data.type === 'fight' ? 'high' : 'med';
+
+        return {
+          id: Date.now() + Math.random(),
+          alertType: alertType,
+          severity: severity,
+          evidence: data.type === 'crowd_group_complete' ? ['density', 'duration'] : ['visual', 'detection'],
+          cameraId: data.camera || 'Camera-1',
+          timestamp: data.time,
+          peopleCount: data.people_count || 0,
+          confidence: data.confidence || 0,
+          repeats: data.repeats || 0
+        };
+      });
+
+      setAlerts((prev) => [...newAlerts.reverse(), ...prev].slice(0, 20));
     });
 
     socket.on('disconnect', () => {
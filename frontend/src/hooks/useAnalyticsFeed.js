@@ -0,0 +1,69 @@
+import { useEffect, useRef } from 'react';
+import { io } from 'socket.io-client';
+
+/**
+ * Subscribe to the server's analytics deltas for one stream ('all' or a camera id).
+ *
+ * onSnapshot() must (re)load the full state over HTTP; it is called on the first
+ * connect and whenever the server can't replay what was missed. onDelta(delta) gets
+ * every delta in sequence order exactly once per snapshot (bucket values are
+ * absolute, so a delta overlapping the snapshot is harmless).
+ */
+export const useAnalyticsFeed = (stream, onSnapshot, onDelta) => {
+  const handlers = useRef({ onSnapshot, onDelta });
+  handlers.current = { onSnapshot, onDelta };
+
+  useEffect(() => {
+    const socket = io('http://localhost:5000', {
+      transports: ['websocket', 'polling'],
+      reconnection: true,
+      reconnectionDelay: 1000,
+    });
+    const state = { epoch: null, seq: null, syncing: false, buffered: [] };
+
+    const apply = (delta) => {
+      if (state.seq !== null && delta.seq <= state.seq) return;  // already applied
+      if (state.seq !== null && delta.seq !== state.seq + 1) {
+        resync();  // missed one: ask for the gap
+        return;
+      }
+      state.seq = delta.seq;
+      handlers.current.onDelta(delta);
+    };
+
+    const resync = () => {
+      if (state.syncing) return;
+      state.syncing = true;
+      state.buffered = [];
+      socket.emit('analytics_subscribe', { stream, epoch: state.epoch, since: state.seq }, async (reply) => {
+        state.epoch = reply.epoch;
+        if (reply.full) {
+          // deltas from here on apply on top of the reloaded snapshot
+          state.seq = reply.seq;
+          await handlers.current.onSnapshot();
+        } else {
+          reply.replay.forEach(apply);
+        }
+        state.syncing = false;
+        const buffered = state.buffered;
+        state.buffered = [];
+        buffered.forEach(apply);
+      });
+    };
+
+    socket.on('connect', resync);
+    socket.on('analytics_delta', (delta) => {
+      if (delta.stream !== stream) return;
+      if (state.syncing) {
+        state.buffered.push(delta);
+      } else {
+        apply(delta);
+      }
+    });
+
+    return () => {
+      socket.emit('analytics_unsubscribe', { stream });
+      socket.disconnect();
+    };
+  }, [stream]);
+};
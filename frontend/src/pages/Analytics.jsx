@@ -1,5 +1,6 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useMemo } from 'react';
 import { useNavigate } from 'react-router-dom';
+import { useAnalyticsFeed } from '../hooks/useAnalyticsFeed';
 import {
   BarChart,
   Bar,
@@ -16,97 +17,109 @@ import {
   ResponsiveContainer,
 } from 'recharts';
 
+// Buckets are keyed by local wall-clock time, like the detection timestamps
+const localIso = (d) => new Date(d.getTime() - d.getTimezoneOffset() * 60000).toISOString().slice(0, 16);
+const eventKey = (e) => `${e.timestamp}|${e.camera}|${e.type}`;
+const API = 'http://localhost:5000/api/detections';
+
 const Analytics = () => {
   const navigate = useNavigate();
   const [detections, setDetections] = useState([]);
-  const [stats, setStats] = useState({
-    total: 0,
-    weapon: 0,
-    fight: 0,
-    crowd: 0,
-  });
-  const [timelineData, setTimelineData] = useState([]);
-  const [hourlyData, setHourlyData] = useState([]);
-
-  useEffect(() => {
-    fetchAnalyticsData();
-    // Refresh every 10 seconds
-    const interval = setInterval(fetchAnalyticsData, 10000);
-    return () => clearInterval(interval);
-  }, []);
+  // "grain|bucket|type" -> event count: today's hours and the last 2 hours' minutes
+  const [buckets, setBuckets] = useState({});
 
-  const fetchAnalyticsData = async () => {
+  // Full state over HTTP: on first connect and when missed deltas can't be replayed
+  const loadSnapshot = async () => {
     try {
-      // Get today's date
-      const today = new Date().toISOString().split('T')[0];
-      
-      // Fetch today's detections
-      const response = await fetch(`http://localhost:5000/api/detections/${today}`);
-      const data = await response.json();
-      
-      setDetections(data);
-      
-      // Calculate stats
-      const weaponCount = data.filter(d => d.type === 'weapon').length;
-      const fightCount = data.filter(d => d.type === 'fight').length;
-      const crowdCount = data.filter(d => d.type === 'crowd').length;
-      
-      setStats({
-        total: data.length,
-        weapon: weaponCount,
-        fight: fightCount,
-        crowd: crowdCount,
-      });
-      
-      // Process timeline data (last 2 hours)
-      const twoHoursAgo = new Date(Date.now() - 2 * 60 * 60 * 1000);
-      const recentData = data.filter(d => new Date(d.timestamp) >= twoHoursAgo);
-      
-      // Group by 10-minute intervals
-      const timeline = {};
-      recentData.forEach(detection => {
-        const time = new Date(detection.timestamp);
-        const minutes = Math.floor(time.getMinutes() / 10) * 10;
-        const key = `${time.getHours()}:${minutes.toString().padStart(2, '0')}`;
-        
-        if (!timeline[key]) {
-          timeline[key] = { time: key, weapon: 0, fight: 0, crowd: 0 };
-        }
-        timeline[key][detection.type]++;
-      });
-      
-      setTimelineData(Object.values(timeline).sort((a, b) => a.time.localeCompare(b.time)));
-      
-      // Group by hour for daily view
-      const hourly = {};
-      data.forEach(detection => {
-        const hour = new Date(detection.timestamp).getHours();
-        const key = `${hour}:00`;
-        
-        if (!hourly[key]) {
-          hourly[key] = { time: key, weapon: 0, fight: 0, crowd: 0 };
-        }
-        hourly[key][detection.type]++;
-      });
-      
-      setHourlyData(Object.values(hourly).sort((a, b) => 
-        parseInt(a.time) - parseInt(b.time)
-      ));
-      
+      const now = new Date();
+      const today = localIso(now).slice(0, 10);
+      const twoHoursAgo = localIso(new Date(now.getTime() - 2 * 60 * 60 * 1000));
+
+      const [daily, recent, latest] = await Promise.all([
+        fetch(`${API}/aggregate?grain=hour&start=${today}&end=${today}`).then(r => r.json()),
+        fetch(`${API}/aggregate?grain=minute&start=${twoHoursAgo}`).then(r => r.json()),
+        fetch(`${API}/latest?limit=10`).then(r => r.json()),
+      ]);
+
+      const next = {};
+      daily.buckets.forEach(b => { next[`hour|${b.bucket}|${b.type}`] = b.events; });
+      recent.buckets.forEach(b => { next[`minute|${b.bucket}|${b.type}`] = b.events; });
+      setBuckets(next);
+      setDetections(latest);
     } catch (error) {
       console.error('Error fetching analytics:', error);
     }
   };
 
+  // Pushed deltas: the new events and the current values of the buckets they touched
+  const applyDelta = (delta) => {
+    const twoHoursAgo = localIso(new Date(Date.now() - 2 * 60 * 60 * 1000));
+    setBuckets(prev => {
+      const next = {};
+      Object.entries(prev).forEach(([key, events]) => {
+        if (!key.startsWith('minute|') || key.slice(7, 23) >= twoHoursAgo) next[key] = events;
+      });
+      delta.buckets.forEach(b => {
+        if (b.grain !== 'day') next[`${b.grain}|${b.bucket}|${b.type}`] = b.events;
+      });
+      return next;
+    });
+    setDetections(prev => {
+      const seen = new Set();
+      return [...delta.events.slice().reverse(), ...prev]
+        .filter(e => !seen.has(eventKey(e)) && seen.add(eventKey(e)))
+        .slice(0, 10);
+    });
+  };
+
+  useAnalyticsFeed('all', loadSnapshot, applyDelta);
+
+  const { stats, timelineData, hourlyData } = useMemo(() => {
+    const now = new Date();
+    const today = localIso(now).slice(0, 10);
+    const twoHoursAgo = localIso(new Date(now.getTime() - 2 * 60 * 60 * 1000));
+    const totals = { total: 0, weapon: 0, fight: 0, crowd: 0 };
+    const timeline = {};
+    const hourly = {};
+
+    Object.entries(buckets).forEach(([key, events]) => {
+      const [grain, bucket, type] = key.split('|');
+      if (grain === 'hour' && bucket.startsWith(today)) {
+        totals.total += events;
+        totals[type] = (totals[type] || 0) + events;
+
+        // Hourly buckets for the daily view
+        const hourKey = `${parseInt(bucket.slice(11, 13))}:00`;
+        if (!hourly[hourKey]) {
+          hourly[hourKey] = { time: hourKey, weapon: 0, fight: 0, crowd: 0 };
+        }
+        hourly[hourKey][type] = (hourly[hourKey][type] || 0) + events;
+      } else if (grain === 'minute' && bucket >= twoHoursAgo) {
+        // Group the per-minute buckets into 10-minute intervals
+        const hour = parseInt(bucket.slice(11, 13));
+        const minutes = Math.floor(parseInt(bucket.slice(14, 16)) / 10) * 10;
+        const timeKey = `${hour}:${minutes.toString().padStart(2, '0')}`;
+        if (!timeline[timeKey]) {
+          timeline[timeKey] = { time: timeKey, weapon: 0, fight: 0, crowd: 0 };
+        }
+        timeline[timeKey][type] = (timeline[timeKey][type] || 0) + events;
+      }
+    });
+
+    return {
+      stats: totals,
+      timelineData: Object.values(timeline).sort((a, b) => a.time.localeCompare(b.time)),
+      hourlyData: Object.values(hourly).sort((a, b) => parseInt(a.time) - parseInt(b.time)),
+    };
+  }, [buckets]);
+
   const pieData = [
     { name: 'Weapon', value: stats.weapon, color: '#ef4444' },
     { name: 'Fight', value: stats.fight, color: '#f97316' },
     { name: 'Crowd', value: stats.crowd, color: '#eab308' },
   ];
 
-  const recentAlerts = detections
-    .sort((a, b) => new Date(b.timestamp) - new Date(a.timestamp))
-    .slice(0, 10);
+  const recentAlerts = detections;
 
   return (
     <div className="min-h-screen bg-dark-bg p-6">
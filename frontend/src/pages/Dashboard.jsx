@@ -31,10 +31,12 @@ const Dashboard = () => {
       console.log('✅ Connected to WebSocket');
     });
 
-    newSocket.on('new_alert', (alertData) => {
-      console.log('📡 Received alert:', alertData);
-      
-      const newAlert = {
+    // Alerts arrive in batches; repeats of a camera's alert within a few seconds are folded
+    // into one carrying a `repeats` count
+    newSocket.on('new_alerts', (batch) => {
+      console.log(`📡 Received ${batch.length} alert(s)`);
+
+      const newAlerts = batch.map((alertData) => ({
         id: Date.now() + Math.random(),
         alertType: alertData.type,
         severity: alertData.severity || (alertData.type === 'weapon' ? 'high' : 'medium'),
@@ -44,10 +46,11 @@ const Dashboard = () => {
         confidence: alertData.confidence,
         count: alertData.count,
         duration: alertData.duration,
-        message: alertData.message
-      };
-      
-      setAlerts((prev) => [newAlert, ...prev].slice(0, 50)); // Keep last 50 alerts
+        message: alertData.message,
+        repeats: alertData.repeats || 0
+      }));
+
+      setAlerts((prev) => [...newAlerts.reverse(), ...prev].slice(0, 50)); // Keep last 50 alerts
     });
 
     return () => newSocket.disconnect();
@@ -1,168 +1,165 @@
 # src/app.py
-from flask import Flask, render_template, jsonify, request, send_from_directory, Response
-from flask_socketio import SocketIO, emit
+from flask import Flask, render_template, jsonify, request, Response, send_file
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from flask_cors import CORS
 import os
 from pathlib import Path
 import json
 import tempfile
 import cv2
-from ultralytics import YOLO
-from datetime import datetime
-import openpyxl
-from openpyxl.drawing.image import Image as XLImage
-from openpyxl.styles import Font, Alignment, PatternFill
-import io
-from PIL import Image as PILImage
+import sys
+import threading
+import atexit
+import yaml
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.detector.batch_server import BatchInferenceServer
+from src.detector.factory import build_model_registry, build_detector, build_camera_analyzer
+from src.streaming.pipeline import StreamPipeline
+from src.streaming.renderer import profile_outputs
+from src.streaming.broadcaster import MJPEG_MIMETYPE, StreamHub
+from src.streaming.profiles import load_profiles, stream_variants
+from src.streaming.sessions import SessionManager
+from src.streaming.capture import open_capture
+from src.streaming.analytics_feed import AnalyticsFeed, ALL, room_for
+from src.streaming.alert_emitter import AlertEmitter
+from src.streaming.workers import WorkerPool
+from src.storage.event_store import DetectionEventStore, make_event
+from src.storage.evidence_writer import EvidenceWriter
+from src.storage.alert_store import AlertStore, MAX_PAGE
+from src.storage.rollups import DetectionRollups, totals
+from src.storage.excel_reporter import (ExcelReporter, ALERT_HEADERS, alert_row, style_alert_header,
+                                        style_alert_row, build_alert_workbook)
 
 app = Flask(__name__, static_folder="../static", template_folder="templates")
 CORS(app, resources={r"/*": {"origins": "*"}})
 socketio = SocketIO(app, cors_allowed_origins="*")
 
-ROOT = Path(__file__).resolve().parents[1]
-
 ALERTS_DIR = ROOT / "alerts"
 ALERTS_DIR.mkdir(exist_ok=True)
 
+# Posted alerts live in an indexed SQLite store (monotonic IDs, cursor pagination);
+# alert_<N>.json files from older versions are imported once, keeping N as the ID
+ALERT_STORE = AlertStore(ALERTS_DIR / "alerts.db")
+if ALERT_STORE.import_legacy(ALERTS_DIR):
+    print(f"📥 Imported legacy alert files into {ALERT_STORE.path}")
+
 DETECTIONS_DIR = ROOT / "detections"
 DETECTIONS_DIR.mkdir(exist_ok=True)
 
+# Detection events are appended to detections/YYYY-MM-DD.jsonl by one background writer
+EVENT_STORE = DetectionEventStore(DETECTIONS_DIR).start()
+atexit.register(EVENT_STORE.stop)
+
+# Per-minute / hour / day counts and max confidence by camera and type, updated from
+# every flushed event batch (built from the event files on first start)
+ROLLUPS = DetectionRollups(DETECTIONS_DIR / "rollups.db").attach(EVENT_STORE)
+
+# New events and the rollup buckets they changed are pushed to subscribed dashboards
+# as one coalesced delta per second (rooms per camera + "all", resumable by seq)
+ANALYTICS_FEED = AnalyticsFeed(ROLLUPS, lambda event, data, room: socketio.emit(event, data, to=room),
+                               interval=1.0).start()
+EVENT_STORE.add_listener(ANALYTICS_FEED.add)
+atexit.register(ANALYTICS_FEED.stop)
+
 SCREENSHOTS_DIR = ROOT / "screenshots"
 SCREENSHOTS_DIR.mkdir(exist_ok=True)
 
+# Alert screenshots are JPEG-encoded and written by a small worker pool
+EVIDENCE_WRITER = EvidenceWriter(workers=2, max_queue=32, jpeg_quality=90, max_side=1280).start()
+atexit.register(EVIDENCE_WRITER.stop)
+
 EXCEL_FILE = ROOT / "detection_alerts.xlsx"
 
-# Load models (lazy loading)
-MODELS = {}
-VIDEO_SESSIONS = {}  # Store active video sessions for streaming
-STOP_FLAGS = {}  # Flags to stop streaming for each camera
+# Alert rows reach the workbook in periodic batches, off the frame loop
+EXCEL_REPORTER = ExcelReporter(EXCEL_FILE, ALERT_HEADERS, alert_row, title="Detection Alerts",
+                               interval=10.0, style_header=style_alert_header,
+                               style_row=style_alert_row).start()
+EVENT_STORE.add_listener(EXCEL_REPORTER.enqueue_many)
+atexit.register(EXCEL_REPORTER.stop)
+
+# Model paths, backend and weapon ROI mode come from src/detector/config.yaml
+with open(ROOT / "src" / "detector" / "config.yaml", "r") as f:
+    CONFIG = yaml.safe_load(f) or {}
+STREAMING_CFG = CONFIG.get("streaming") or {}
+STREAM_PROFILES = load_profiles(STREAMING_CFG)  # ?profile= of /api/video_feed: size / quality / fps per viewer
+STREAM_DEFAULT_PROFILE = STREAMING_CFG.get("default_profile", "full")
+SOCKET_ALERTS_CFG = CONFIG.get("socket_alerts") or {}
+WORKERS_CFG = CONFIG.get("workers") or {}
+
+# Alerts reach the browsers deduplicated per (camera, type) and batched ('new_alerts' lists),
+# through bounded per-room queues that drop low-severity alerts first
+ALERT_EMITTER = AlertEmitter(lambda event, alerts, room: socketio.emit(event, alerts, to=room),
+                             window=SOCKET_ALERTS_CFG.get("window_sec", 5.0),
+                             interval=SOCKET_ALERTS_CFG.get("interval_sec", 0.25),
+                             max_queue=SOCKET_ALERTS_CFG.get("max_queue", 50)).start()
+atexit.register(ALERT_EMITTER.stop)
+
+# Models are loaded once, preloaded + warmed in the background at startup and
+# hot-reloaded when their best.pt changes (in worker mode each inference worker does this instead)
+MODEL_REGISTRY = build_model_registry(CONFIG)
+if not WORKERS_CFG.get("enabled"):
+    MODEL_REGISTRY.preload(background=True).start_watcher()
+atexit.register(MODEL_REGISTRY.stop)
+
+PIPELINES = {}  # camera_id -> running StreamPipeline / RemotePipeline (shared by all viewers, see STREAM_HUB)
+SCHEDULERS = {}  # camera_id -> HeadScheduler of that stream
+INFERENCE_SERVER = None  # BatchInferenceServer shared by all streams
+INFERENCE_SERVER_LOCK = threading.Lock()
 
 def get_model(model_type):
-    """Lazy load models"""
-    if model_type not in MODELS:
-        model_paths = {
-            'crowd': 'A:/src1/models/crowd_yolo6/weights/best.pt',
-            'weapon': 'A:/src1/models/weapon4/weights/best.pt',
-            'fight': 'A:/src1/models/fight_yolo/weights/best.pt'
-        }
-        if model_type in model_paths and Path(model_paths[model_type]).exists():
-            MODELS[model_type] = YOLO(model_paths[model_type])
-            print(f"✅ Loaded {model_type} model")
-    return MODELS.get(model_type)
-
-def log_detection(camera_id, detection_type, count=0, confidence=0.0):
-    """Log detection data for analytics"""
-    timestamp = datetime.now()
-    date_str = timestamp.strftime('%Y-%m-%d')
-    
-    detection_file = DETECTIONS_DIR / f"{date_str}.json"
-    
-    # Load existing data
-    if detection_file.exists():
-        with open(detection_file, 'r') as f:
-            data = json.load(f)
-    else:
-        data = []
-    
-    # Add new detection
-    data.append({
-        'timestamp': timestamp.isoformat(),
-        'camera': camera_id,
-        'type': detection_type,
-        'count': count,
-        'confidence': confidence
-    })
-    
-    # Save updated data
-    with open(detection_file, 'w') as f:
-        json.dump(data, f, indent=2)
+    """Loaded model from the registry (waits for a load in progress instead of loading again)"""
+    return MODEL_REGISTRY.get(model_type)
 
-def save_detection_to_excel(camera_id, detection_type, confidence, frame):
-    """Save detection alert to Excel with screenshot"""
-    try:
-        timestamp = datetime.now()
-        
-        # Create or load Excel workbook
-        if EXCEL_FILE.exists():
-            wb = openpyxl.load_workbook(EXCEL_FILE)
-            ws = wb.active
-        else:
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "Detection Alerts"
-            
-            # Create header row
-            headers = ["#", "Date", "Time", "Camera", "Detection Type", "Confidence", "Screenshot"]
-            ws.append(headers)
-            
-            # Style header
-            header_fill = PatternFill(start_color="1F4788", end_color="1F4788", fill_type="solid")
-            header_font = Font(bold=True, color="FFFFFF", size=12)
-            
-            for col_num, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col_num)
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-            
-            # Set column widths
-            ws.column_dimensions['A'].width = 8
-            ws.column_dimensions['B'].width = 15
-            ws.column_dimensions['C'].width = 12
-            ws.column_dimensions['D'].width = 12
-            ws.column_dimensions['E'].width = 18
-            ws.column_dimensions['F'].width = 12
-            ws.column_dimensions['G'].width = 25
-        
-        # Save screenshot
-        screenshot_filename = f"{detection_type}_{camera_id}_{timestamp.strftime('%Y%m%d_%H%M%S')}.jpg"
-        screenshot_path = SCREENSHOTS_DIR / screenshot_filename
-        cv2.imwrite(str(screenshot_path), frame)
-        
-        # Get next row number
-        row_num = ws.max_row + 1
-        alert_num = row_num - 1
-        
-        # Add data to Excel
-        date_str = timestamp.strftime('%Y-%m-%d')
-        time_str = timestamp.strftime('%H:%M:%S')
-        conf_str = f"{confidence:.2%}" if confidence > 0 else "N/A"
-        
-        ws.cell(row=row_num, column=1, value=alert_num)
-        ws.cell(row=row_num, column=2, value=date_str)
-        ws.cell(row=row_num, column=3, value=time_str)
-        ws.cell(row=row_num, column=4, value=camera_id)
-        ws.cell(row=row_num, column=5, value=detection_type.upper())
-        ws.cell(row=row_num, column=6, value=conf_str)
-        ws.cell(row=row_num, column=7, value=screenshot_filename)
-        
-        # Center align all cells in this row
-        for col_num in range(1, 8):
-            ws.cell(row=row_num, column=col_num).alignment = Alignment(horizontal='center', vertical='center')
-        
-        # Color code by detection type
-        type_colors = {
-            'weapon': 'FFCCCC',  # Light red
-            'fight': 'FFE6CC',   # Light orange
-            'crowd': 'FFFFCC'    # Light yellow
-        }
-        
-        if detection_type in type_colors:
-            type_fill = PatternFill(start_color=type_colors[detection_type], 
-                                   end_color=type_colors[detection_type], 
-                                   fill_type="solid")
-            for col_num in range(1, 8):
-                ws.cell(row=row_num, column=col_num).fill = type_fill
-        
-        # Set row height for better visibility
-        ws.row_dimensions[row_num].height = 20
-        
-        # Save workbook
-        wb.save(EXCEL_FILE)
-        print(f"✅ Saved {detection_type} detection to Excel: Row {alert_num}")
-        
-    except Exception as e:
-        print(f"❌ Error saving to Excel: {e}")
+def get_detector():
+    """Multi-head detector sharing one letterbox/normalize per frame across all heads"""
+    return build_detector(MODEL_REGISTRY, CONFIG)
+
+def get_inference_server():
+    """Shared micro-batching inference worker for all camera streams"""
+    global INFERENCE_SERVER
+    with INFERENCE_SERVER_LOCK:
+        if INFERENCE_SERVER is None:
+            INFERENCE_SERVER = BatchInferenceServer(get_detector(), max_batch=8, max_wait_ms=10).start()
+            print("✅ Started batched inference server")
+    return INFERENCE_SERVER
+
+def log_detection(camera_id, detection_type, count=0, confidence=0.0, screenshot=None):
+    """Log detection data for analytics (queued to the append-only event store)"""
+    EVENT_STORE.append(make_event(camera_id, detection_type, count=count, confidence=confidence,
+                                  screenshot=screenshot))
+
+def save_alert_screenshot(camera_id, detection_type, frame):
+    """
+    Queue the alert screenshot; returns a Future resolving to its path (None on failure).
+    The Excel row itself is written in batches by EXCEL_REPORTER from the event store.
+    """
+    # the frame is the analyzer's private alert snapshot - no need for another copy
+    return EVIDENCE_WRITER.submit(frame, SCREENSHOTS_DIR, prefix=f"{detection_type}_{camera_id}", copy=False)
+
+def handle_stream_alert(camera_id, payload, frame, count=0):
+    """Broadcast, save and log an alert raised by a stream's CameraAnalyzer"""
+    detection_type = payload.get('type', 'unknown')
+    confidence = float(payload.get('confidence', 0.0))
+    ALERT_EMITTER.submit(payload)
+    # Save screenshot off the stream thread; the event is logged once its filename is known
+    # (the event store feeds both analytics and the Excel report)
+    def on_saved(fut):
+        path = fut.result()
+        log_detection(camera_id, detection_type, count=count, confidence=confidence,
+                      screenshot=Path(path).name if path else None)
+    save_alert_screenshot(camera_id, detection_type, frame).add_done_callback(on_saved)
+
+def handle_worker_alert(camera_id, payload, count=0):
+    """Broadcast an alert raised in an inference worker (it is logged once the worker saved the screenshot)"""
+    ALERT_EMITTER.submit(payload)
+
+def handle_worker_alert_saved(camera_id, payload, count=0, screenshot=None):
+    """Log a worker's alert now that its screenshot filename is known"""
+    log_detection(camera_id, payload.get('type', 'unknown'), count=count,
+                  confidence=float(payload.get('confidence', 0.0)), screenshot=screenshot)
 
 @app.route("/")
 def index():
@@ -183,28 +180,57 @@ def receive_alert():
         except:
             pass
     
-    fname = (ALERTS_DIR / f"alert_{len(list(ALERTS_DIR.glob('*.json')))+1}.json")
-    with open(fname, "w") as f:
-        json.dump(data, f, indent=2)
-    print("Received alert:", fname)
+    if not isinstance(data, dict):
+        return jsonify({"error": "alert must be a JSON object"}), 400
     
-    # Broadcast alert to WebSocket clients
-    socketio.emit('new_alert', data)
-    print(f"📡 Broadcasted alert via WebSocket: {data.get('type', 'unknown')}")
+    alert_id = ALERT_STORE.add(data)
+    print(f"Received alert #{alert_id}")
     
-    return jsonify({"status": "ok", "saved": str(fname)})
+    # Broadcast alert to WebSocket clients (deduplicated and batched)
+    if ALERT_EMITTER.submit(data):
+        print(f"📡 Queued alert for WebSocket clients: {data.get('type', 'unknown')}")
+    
+    return jsonify({"status": "ok", "id": alert_id})
 
 @app.route("/api/alerts/list")
 def list_alerts():
-    files = sorted([p.name for p in ALERTS_DIR.glob("*.json")], reverse=True)
-    return jsonify(files)
+    """
+    Newest alerts first, one page at a time: ?limit=50&cursor=<next_cursor of the previous page>.
+    Accepts the same filters as /api/alerts/query.
+    """
+    return alerts_page()
+
+@app.route("/api/alerts/query")
+def query_alerts():
+    """
+    Filtered alert pages: ?type=weapon&camera=Cam-1&severity=high&since=<ISO/epoch>&until=...&limit&cursor
+    (since/until: when the server received the alert; ts_since/ts_until: the alert's own timestamp)
+    """
+    return alerts_page()
+
+def alerts_page():
+    args = request.args
+    try:
+        limit = int(args.get('limit', 50))
+        cursor = int(args['cursor']) if args.get('cursor') else None
+    except ValueError:
+        return jsonify({"error": "limit and cursor must be integers"}), 400
+    alerts, next_cursor = ALERT_STORE.query(limit=min(limit, MAX_PAGE), cursor=cursor,
+                                            type=args.get('type'), camera=args.get('camera'),
+                                            severity=args.get('severity'),
+                                            since=args.get('since'), until=args.get('until'),
+                                            ts_since=args.get('ts_since'), ts_until=args.get('ts_until'))
+    return jsonify({"alerts": alerts, "next_cursor": next_cursor})
 
-@app.route("/api/alerts/get/<fname>")
-def get_alert(fname):
-    p = ALERTS_DIR / fname
-    if p.exists():
-        return p.read_text(), 200, {"Content-Type": "application/json"}
-    return jsonify({"error": "not found"}), 404
+@app.route("/api/alerts/get/<alert_id>")
+def get_alert(alert_id):
+    """The posted alert JSON by ID (the old "alert_<N>.json" names still resolve to ID N)"""
+    key = alert_id[len("alert_"):] if alert_id.startswith("alert_") else alert_id
+    key = key[:-len(".json")] if key.endswith(".json") else key
+    record = ALERT_STORE.get(key) if key.isdigit() else None
+    if record is None:
+        return jsonify({"error": "not found"}), 404
+    return jsonify(record["alert"])
 
 @app.route("/api/start_live_camera/<camera_id>", methods=["POST"])
 def start_live_camera(camera_id):
@@ -215,15 +241,8 @@ def start_live_camera(camera_id):
         
         print(f"📹 Starting live camera {camera_index} for {camera_id}")
         
-        # Stop old stream if exists
-        if camera_id in VIDEO_SESSIONS:
-            STOP_FLAGS[camera_id] = True
-            import time
-            time.sleep(0.5)
-        
-        # Store camera index as negative number to distinguish from video files
-        VIDEO_SESSIONS[camera_id] = f"camera:{camera_index}"
-        STOP_FLAGS[camera_id] = False
+        # Switch the camera's source; a running stream restarts on it with its viewers kept
+        SESSIONS.open(camera_id, f"camera:{camera_index}")
         
         return jsonify({
             "status": "success",
@@ -257,25 +276,8 @@ def detect_video():
         
         print(f"💾 Saved to: {tmp_path}")
         
-        # Stop old video stream if exists
-        if camera_id in VIDEO_SESSIONS:
-            STOP_FLAGS[camera_id] = True
-            print(f"🛑 Stopping old stream for {camera_id}")
-            import time
-            time.sleep(0.5)  # Wait for old stream to stop
-        
-        # Clean up old video if exists
-        old_path = VIDEO_SESSIONS.get(camera_id)
-        if old_path and os.path.exists(old_path) and old_path != tmp_path:
-            try:
-                os.unlink(old_path)
-                print(f"🗑️ Deleted old video: {old_path}")
-            except Exception as e:
-                print(f"⚠️ Could not delete old video: {e}")
-        
-        # Store video path for streaming and reset stop flag
-        VIDEO_SESSIONS[camera_id] = tmp_path
-        STOP_FLAGS[camera_id] = False
+        # Switch the camera to the upload; the old video is deleted once its capture is released
+        SESSIONS.open(camera_id, tmp_path, temp=True)
         
         return jsonify({
             "status": "success",
@@ -287,384 +289,181 @@ def detect_video():
         print(f"❌ Error: {e}")
         return jsonify({"error": str(e)}), 500
 
+def start_camera_pipeline(camera_id, outputs):
+    """Open a camera's source and start its pipeline, feeding the hub's broadcasters"""
+    session = SESSIONS.get(camera_id)
+    if session is None:
+        return None
+    if WORKER_POOL is not None:
+        return _start_remote_pipeline(camera_id, session, outputs)
+    
+    cap, is_live_camera = open_capture(session.source)
+    if cap is None:
+        session.last_error = "could not open source"
+        return None
+    
+    try:
+        return _start_pipeline_on(camera_id, session, cap, is_live_camera, outputs)
+    except Exception:
+        cap.release()  # never leak the capture of a pipeline that didn't start
+        raise
+
+def _start_pipeline_on(camera_id, session, cap, is_live_camera, outputs):
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30  # Get video FPS
+    # Frames from every camera are batched together by the shared inference server
+    analyzer, scheduler = build_camera_analyzer(
+        camera_id, get_inference_server(), fps,
+        on_alert=lambda payload, frame, count: handle_stream_alert(camera_id, payload, frame, count),
+        config=CONFIG)
+    
+    # Capture, inference and encode run on separate threads joined by drop-oldest queues.
+    # Overlays are drawn once per frame into a reused buffer; each profile is resized and
+    # encoded once for all its viewers, and outputs nobody watches aren't encoded at all
+    pipeline_outputs = profile_outputs(STREAM_PROFILES, outputs)
+    # The capture is released by the pipeline (on_release tells the session, which may delete its file)
+    session.acquire()
+    pipeline = StreamPipeline(camera_id, cap, analyzer.analyze, is_live=is_live_camera, fps=fps,
+                              outputs=pipeline_outputs, on_release=session.release).start()
+    PIPELINES[camera_id] = pipeline
+    SCHEDULERS[camera_id] = scheduler
+    return pipeline
+
+def _start_remote_pipeline(camera_id, session, outputs):
+    """Capture and inference in the camera's worker group; JPEGs come back into the hub's broadcasters"""
+    session.acquire()
+    pipeline = WORKER_POOL.start_camera(camera_id, session.source, outputs, on_release=session.release)
+    if pipeline is None:
+        session.release()
+        session.last_error = "could not open source"
+        return None
+    PIPELINES[camera_id] = pipeline
+    return pipeline
+
+def forget_pipeline(camera_id, pipeline):
+    if PIPELINES.get(camera_id) is pipeline:
+        del PIPELINES[camera_id]
+        SCHEDULERS.pop(camera_id, None)
+
+# Worker mode: cameras are spread over groups of capture + inference processes pinned to
+# their own cores, with frames handed over in shared memory (see src/streaming/workers.py)
+WORKER_POOL = None
+if WORKERS_CFG.get("enabled"):
+    WORKER_POOL = WorkerPool(groups=WORKERS_CFG.get("groups", 0),
+                             cores_per_group=WORKERS_CFG.get("cores_per_group", 2),
+                             ring_slots=WORKERS_CFG.get("ring_slots", 4),
+                             max_frame=tuple(WORKERS_CFG.get("max_frame", (1920, 1080))),
+                             screenshots_dir=SCREENSHOTS_DIR, on_alert=handle_worker_alert,
+                             on_alert_saved=handle_worker_alert_saved).start()
+    atexit.register(WORKER_POOL.stop)
+
+# One pipeline per camera, started by its first viewer and shared by all of them
+STREAM_HUB = StreamHub(start_camera_pipeline, on_stop=forget_pipeline,
+                       variants=stream_variants(STREAM_PROFILES))
+# Each camera's source (uploaded video or live camera) and its lifecycle
+SESSIONS = SessionManager(STREAM_HUB)
+atexit.register(SESSIONS.close_all)
+
 @app.route("/api/video_feed/<camera_id>")
 def video_feed(camera_id):
-    """Stream video frames with detection overlays"""
-    def generate():
-        video_path = VIDEO_SESSIONS.get(camera_id)
-        if not video_path:
-            return
-        
-        # Check if it's a live camera or video file
-        is_live_camera = isinstance(video_path, str) and video_path.startswith("camera:")
-        
-        if is_live_camera:
-            # Extract camera index
-            camera_index = int(video_path.split(":")[1])
-            cap = cv2.VideoCapture(camera_index, cv2.CAP_DSHOW)  # Use DirectShow for Windows
-            if not cap.isOpened():
-                print(f"❌ Failed to open camera {camera_index}, trying without CAP_DSHOW")
-                cap = cv2.VideoCapture(camera_index)
-            
-            if not cap.isOpened():
-                print(f"❌ Failed to open camera {camera_index}")
-                return
-            
-            # Set camera properties for better performance
-            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            cap.set(cv2.CAP_PROP_FPS, 30)
-            
-            print(f"📹 Starting live camera stream: {camera_index}")
-        else:
-            # Video file
-            if not os.path.exists(video_path):
-                return
-            cap = cv2.VideoCapture(video_path)
-            print(f"📹 Starting video file stream: {video_path}")
-        crowd_model = get_model('crowd')
-        weapon_model = get_model('weapon')
-        fight_model = get_model('fight')
-        
-        frame_count = 0
-        weapon_detected = False
-        weapon_conf = 0.0
-        fight_detected = False
-        fight_conf = 0.0
-        
-        # Persistent detection state for continuous display
-        last_person_boxes = []
-        last_weapon_boxes = []
-        current_count = 0
-        
-        # Group detection tracking (for 5+ people alert)
-        group_start_time = None
-        group_alert_sent = False
-        fps = cap.get(cv2.CAP_PROP_FPS) or 30  # Get video FPS
-        
-        # Fight detection tracking (require sustained detection)
-        fight_frame_count = 0
-        fight_threshold_frames = int(fps * 3)  # Require 3 seconds of sustained fight detection
-        fight_alert_sent = False
-        last_fight_time = 0
-        
-        # Performance optimization - track real time
-        import time
-        start_time = time.time()
-        last_frame_time = start_time
-        
-        while cap.isOpened():
-            # Check if we should stop this stream
-            if STOP_FLAGS.get(camera_id, False):
-                print(f"🛑 Stream stopped for {camera_id}")
-                break
-            
-            ret, frame = cap.read()
-            if not ret:
-                # For live camera, break on error
-                if is_live_camera:
-                    print(f"❌ Live camera read error for {camera_id}")
-                    break
-                # For video file, loop - restart from beginning
-                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                frame_count = 0
-                continue
-            
-            frame_count += 1
-            display_frame = frame.copy()
-            
-            # Calculate real elapsed time for accurate timing
-            current_time = time.time()
-            elapsed_time = current_time - start_time
-            
-            # Optimize detection - run crowd/fight every frame, weapon every 2 frames
-            run_weapon_detection = (frame_count % 2 == 0)
-            
-            # Run detection on EVERY frame for continuous detection (not just every 5th)
-            # Detect people on every frame with optimized settings for crowds
-            if crowd_model:
-                results = crowd_model.predict(frame, conf=0.15, verbose=False, imgsz=640, iou=0.4, max_det=100)
-                for r in results:
-                    if hasattr(r, 'boxes'):
-                        boxes = r.boxes.xyxy.cpu().numpy()
-                        current_count = len(boxes)
-                        last_person_boxes = boxes  # Store for continuous display
-                        
-                        # Draw all detected people with green boxes
-                        # If 5+ people (group), draw yellow boxes instead
-                        box_color = (0, 255, 255) if current_count >= 5 else (0, 255, 0)  # Yellow for groups, green for individuals
-                        box_thickness = 3 if current_count >= 5 else 2
-                        
-                        for box in boxes:
-                            x1, y1, x2, y2 = map(int, box)
-                            cv2.rectangle(display_frame, (x1, y1), (x2, y2), box_color, box_thickness)
-                            # Add person label
-                            cv2.putText(display_frame, "Person", (x1, y1-5),
-                                      cv2.FONT_HERSHEY_SIMPLEX, 0.6, box_color, 2)
-                        
-                        # If group detected, show timer on screen near the group
-                        if current_count >= 5 and len(boxes) > 0:
-                            # Calculate center of all boxes for timer placement
-                            center_x = int(sum([box[0] + box[2] for box in boxes]) / (2 * len(boxes)))
-                            center_y = int(sum([box[1] + box[3] for box in boxes]) / (2 * len(boxes)))
-                            
-                            # Calculate timer duration using REAL TIME
-                            if group_start_time is not None:
-                                group_duration = int(elapsed_time - group_start_time)
-                                timer_text = f"GROUP: {group_duration}s"
-                                timer_color = (0, 255, 255) if group_duration < 60 else (0, 0, 255)
-                                
-                                # Draw timer with background
-                                timer_size = cv2.getTextSize(timer_text, cv2.FONT_HERSHEY_SIMPLEX, 1.2, 3)[0]
-                                timer_x = max(10, center_x - timer_size[0] // 2)
-                                timer_y = max(50, center_y - 30)
-                                
-                                # Background rectangle for timer
-                                cv2.rectangle(display_frame, 
-                                            (timer_x - 10, timer_y - timer_size[1] - 10),
-                                            (timer_x + timer_size[0] + 10, timer_y + 10),
-                                            (0, 0, 0), -1)
-                                cv2.rectangle(display_frame, 
-                                            (timer_x - 10, timer_y - timer_size[1] - 10),
-                                            (timer_x + timer_size[0] + 10, timer_y + 10),
-                                            timer_color, 2)
-                                
-                                # Timer text (large and bold)
-                                cv2.putText(display_frame, timer_text, (timer_x, timer_y),
-                                          cv2.FONT_HERSHEY_SIMPLEX, 1.2, timer_color, 3)
-                        
-                        # Check for group (5+ people)
-                        if current_count >= 5:
-                            if group_start_time is None:
-                                group_start_time = elapsed_time
-                                print(f"👥 Group detected: {current_count} people")
-                            else:
-                                # Calculate how long group has been present using REAL TIME
-                                group_duration = elapsed_time - group_start_time
-                                
-                                # Send alert after 60 seconds (1 minute)
-                                if group_duration >= 60 and not group_alert_sent:
-                                    socketio.emit('new_alert', {
-                                        'type': 'crowd',
-                                        'camera': camera_id,
-                                        'count': current_count,
-                                        'duration': int(group_duration),
-                                        'timestamp': datetime.now().isoformat(),
-                                        'severity': 'medium',
-                                        'message': f'{current_count} people detected for {int(group_duration)} seconds'
-                                    })
-                                    # Save to Excel with screenshot
-                                    save_detection_to_excel(camera_id, 'crowd', 0.0, display_frame.copy())
-                                    # Log to JSON for analytics
-                                    log_detection(camera_id, 'crowd', count=current_count, confidence=0.0)
-                                    group_alert_sent = True
-                                    print(f"🚨 Group alert sent: {current_count} people for {int(group_duration)}s")
-                        else:
-                            # Reset group tracking if count drops below 5
-                            group_start_time = None
-                            group_alert_sent = False
-            
-            # Detect weapons every 2 frames (optimization for smooth playback)
-            weapon_detected = False
-            if weapon_model and run_weapon_detection:
-                results = weapon_model.predict(frame, conf=0.2, verbose=False, imgsz=640)
-                for r in results:
-                    if hasattr(r, 'boxes') and len(r.boxes) > 0:
-                        boxes = r.boxes.xyxy.cpu().numpy()
-                        confs = r.boxes.conf.cpu().numpy()
-                        weapon_detected = True
-                        weapon_conf = max(confs) if len(confs) > 0 else 0.0
-                        last_weapon_boxes = list(zip(boxes, confs))
-                        
-                        # Send weapon alert via WebSocket (throttle to avoid spam)
-                        if frame_count % 30 == 0:
-                            socketio.emit('new_alert', {
-                                'type': 'weapon',
-                                'camera': camera_id,
-                                'confidence': float(weapon_conf),
-                                'timestamp': datetime.now().isoformat(),
-                                'severity': 'high'
-                            })
-                            # Save to Excel with screenshot
-                            save_detection_to_excel(camera_id, 'weapon', weapon_conf, display_frame.copy())
-                            # Log to JSON for analytics
-                            log_detection(camera_id, 'weapon', count=len(boxes), confidence=float(weapon_conf))
-                        
-                        # Draw all weapon boxes with red (large and visible)
-                        for box, conf in zip(boxes, confs):
-                            x1, y1, x2, y2 = map(int, box)
-                            # Thick red box for weapon
-                            cv2.rectangle(display_frame, (x1, y1), (x2, y2), (0, 0, 255), 4)
-                            
-                            # Large weapon label with background
-                            weapon_label = f"WEAPON {conf:.2f}"
-                            label_size = cv2.getTextSize(weapon_label, cv2.FONT_HERSHEY_SIMPLEX, 1.0, 3)[0]
-                            label_y = max(30, y1 - 10)
-                            
-                            # Black background for better visibility
-                            cv2.rectangle(display_frame, 
-                                        (x1, label_y - label_size[1] - 5),
-                                        (x1 + label_size[0] + 5, label_y + 5),
-                                        (0, 0, 0), -1)
-                            # Red border around label
-                            cv2.rectangle(display_frame, 
-                                        (x1, label_y - label_size[1] - 5),
-                                        (x1 + label_size[0] + 5, label_y + 5),
-                                        (0, 0, 255), 2)
-                            
-                            # Large weapon text
-                            cv2.putText(display_frame, weapon_label, (x1 + 2, label_y), 
-                                      cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 3)
-                        
-                        # Log weapon detection
-                        if frame_count % 30 == 0:
-                            log_detection(camera_id, 'weapon', count=len(boxes), confidence=float(weapon_conf))
-            
-            # Detect fights on every frame (with stricter requirements)
-            fight_detected = False
-            if fight_model:
-                results = fight_model.predict(frame, conf=0.65, verbose=False, imgsz=640)  # Increased threshold to 0.65
-                for r in results:
-                    if hasattr(r, 'boxes') and len(r.boxes) > 0:
-                        boxes = r.boxes.xyxy.cpu().numpy()
-                        confs = r.boxes.conf.cpu().numpy()
-                        max_conf = max(confs) if len(confs) > 0 else 0.0
-                        
-                        # Only count if confidence is high (0.65+)
-                        if max_conf >= 0.65:
-                            # Check if detection is continuous (within 1 second of last detection)
-                            if frame_count - last_fight_time <= fps:
-                                fight_frame_count += 1
-                            else:
-                                # Reset if gap is too large
-                                fight_frame_count = 1
-                            
-                            last_fight_time = frame_count
-                            
-                            # Only mark as detected if sustained over threshold (3 seconds)
-                            if fight_frame_count >= fight_threshold_frames:
-                                fight_detected = True
-                                fight_conf = max_conf
-                                
-                                # Send fight alert once (throttled)
-                                if not fight_alert_sent:
-                                    socketio.emit('new_alert', {
-                                        'type': 'fight',
-                                        'camera': camera_id,
-                                        'confidence': float(fight_conf),
-                                        'timestamp': datetime.now().isoformat(),
-                                        'severity': 'high'
-                                    })
-                                    # Save to Excel with screenshot
-                                    save_detection_to_excel(camera_id, 'fight', fight_conf, display_frame.copy())
-                                    fight_alert_sent = True
-                                    log_detection(camera_id, 'fight', count=len(boxes), confidence=float(fight_conf))
-                            
-                            # Draw all fight boxes with orange (only if sustained)
-                            if fight_detected:
-                                for box, conf in zip(boxes, confs):
-                                    x1, y1, x2, y2 = map(int, box)
-                                    # Thick orange box for fight
-                                    cv2.rectangle(display_frame, (x1, y1), (x2, y2), (0, 140, 255), 4)
-                                    
-                                    # Large fight label with background
-                                    fight_label = f"FIGHT {conf:.2f}"
-                                    label_size = cv2.getTextSize(fight_label, cv2.FONT_HERSHEY_SIMPLEX, 1.0, 3)[0]
-                                    label_y = max(30, y1 - 10)
-                                    
-                                    # Black background for better visibility
-                                    cv2.rectangle(display_frame, 
-                                                (x1, label_y - label_size[1] - 5),
-                                                (x1 + label_size[0] + 5, label_y + 5),
-                                                (0, 0, 0), -1)
-                                    # Orange border around label
-                                    cv2.rectangle(display_frame, 
-                                                (x1, label_y - label_size[1] - 5),
-                                                (x1 + label_size[0] + 5, label_y + 5),
-                                                (0, 140, 255), 2)
-                                    
-                                    # Large fight text
-                                    cv2.putText(display_frame, fight_label, (x1 + 2, label_y), 
-                                              cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 140, 255), 3)
-                        else:
-                            # Low confidence - reset counter if gap exceeds 1 second
-                            if frame_count - last_fight_time > fps:
-                                fight_frame_count = 0
-                                fight_alert_sent = False
-                    else:
-                        # No detection - reset counter if gap exceeds 1 second
-                        if frame_count - last_fight_time > fps:
-                            fight_frame_count = 0
-                            fight_alert_sent = False
-            
-            # Draw HUD with larger text
-            hud_x, hud_y = 10, 10
-            overlay = display_frame.copy()
-            cv2.rectangle(overlay, (hud_x, hud_y), (hud_x + 350, hud_y + 130), (0, 0, 0), -1)
-            cv2.addWeighted(overlay, 0.5, display_frame, 0.5, 0, display_frame)
-            
-            tx, ty = hud_x + 8, hud_y + 30
-            weapon_color = (0, 0, 255) if weapon_detected else (0, 255, 0)
-            weapon_text = f"Weapon: {'DETECTED' if weapon_detected else 'SAFE'}"
-            cv2.putText(display_frame, weapon_text, (tx, ty), cv2.FONT_HERSHEY_SIMPLEX, 0.7, weapon_color, 2)
-            ty += 30
-            
-            # Fight status
-            fight_color = (0, 140, 255) if fight_detected else (0, 255, 0)
-            fight_text = f"Fight: {'DETECTED' if fight_detected else 'SAFE'}"
-            cv2.putText(display_frame, fight_text, (tx, ty), cv2.FONT_HERSHEY_SIMPLEX, 0.7, fight_color, 2)
-            ty += 30
-            
-            # People count with color coding
-            people_color = (0, 255, 255) if current_count >= 5 else (255, 255, 255)
-            cv2.putText(display_frame, f"People: {current_count}", (tx, ty), cv2.FONT_HERSHEY_SIMPLEX, 0.7, people_color, 2)
-            
-            # Show group timing if 5+ people detected
-            if current_count >= 5 and group_start_time is not None:
-                ty += 30
-                group_duration = int(elapsed_time - group_start_time)
-                group_color = (0, 255, 255) if group_duration < 60 else (0, 0, 255)
-                cv2.putText(display_frame, f"Group: {group_duration}s", (tx, ty), cv2.FONT_HERSHEY_SIMPLEX, 0.7, group_color, 2)
-            
-            # Add small delay for smooth playback (target 30 FPS)
-            target_frame_time = 1.0 / 30.0  # 33ms per frame
-            actual_frame_time = time.time() - current_time
-            if actual_frame_time < target_frame_time:
-                time.sleep(target_frame_time - actual_frame_time)
-            
-            # Encode frame as JPEG
-            ret, buffer = cv2.imencode('.jpg', display_frame)
-            frame_bytes = buffer.tobytes()
-            
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-        
-        cap.release()
-        # Don't delete here - video will be cleaned up when new video is uploaded
-        print(f"📹 Stream ended for {camera_id}")
-    
-    return Response(generate(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    """
+    Stream video frames with detection overlays.
+    ?profile=thumb|grid|full (see /api/stream_profiles) picks size, JPEG quality and frame rate;
+    ?overlay=0 streams the plain frames.
+    """
+    profile = request.args.get('profile', STREAM_DEFAULT_PROFILE)
+    if profile not in STREAM_PROFILES:
+        return jsonify({"error": f"unknown profile {profile!r}", "profiles": list(STREAM_PROFILES)}), 400
+    variant = f"{profile}:plain" if request.args.get('overlay', '1') == '0' else profile
+    return Response(STREAM_HUB.stream(camera_id, variant), mimetype=MJPEG_MIMETYPE)
+
+@app.route("/api/stream_profiles", methods=["GET"])
+def stream_profiles():
+    """Output profiles a viewer can pick with /api/video_feed/<camera_id>?profile=<name>"""
+    return jsonify({"default": STREAM_DEFAULT_PROFILE,
+                    "profiles": [p.to_dict() for p in STREAM_PROFILES.values()]})
+
+@app.route("/api/sessions", methods=["GET"])
+def sessions():
+    """Source, state, open captures, viewers and last switch time of every camera"""
+    return jsonify(SESSIONS.status())
+
+@app.route("/api/sessions/<camera_id>", methods=["GET"])
+def camera_session(camera_id):
+    status = SESSIONS.status(camera_id)
+    if camera_id not in status:
+        return jsonify({"error": "no session"}), 404
+    return jsonify(status[camera_id])
+
+@app.route("/api/stream_stats", methods=["GET"])
+def stream_stats():
+    """Per-stage latency counters (and per-model skip counts) for every active stream"""
+    return jsonify({cid: stream_stats_for(cid, p) for cid, p in list(PIPELINES.items())})
+
+@app.route("/api/stream_stats/<camera_id>", methods=["GET"])
+def camera_stream_stats(camera_id):
+    """Per-stage latency counters (and per-model skip counts) for one stream"""
+    pipeline = PIPELINES.get(camera_id)
+    if pipeline is None:
+        return jsonify({"error": "not streaming"}), 404
+    return jsonify(stream_stats_for(camera_id, pipeline))
+
+def stream_stats_for(camera_id, pipeline):
+    stats = pipeline.get_stats()
+    stats["viewers"] = STREAM_HUB.get_stats(camera_id)
+    scheduler = SCHEDULERS.get(camera_id)
+    if scheduler is not None:
+        stats["scheduler"] = scheduler.get_stats()
+    return stats
+
+@app.route("/api/alert_emitter_stats", methods=["GET"])
+def alert_emitter_stats():
+    """Socket.IO alerts submitted / emitted / suppressed (deduplicated) / dropped, overall and per type"""
+    return jsonify(ALERT_EMITTER.get_stats())
+
+@app.route("/api/analytics_feed_stats", methods=["GET"])
+def analytics_feed_stats():
+    """Sequence numbers and send counters of the Socket.IO analytics push"""
+    return jsonify(ANALYTICS_FEED.get_stats())
+
+@app.route("/api/inference_stats", methods=["GET"])
+def inference_stats():
+    """Micro-batching statistics of the shared inference server"""
+    if INFERENCE_SERVER is None:
+        return jsonify({"status": "idle"})
+    return jsonify(INFERENCE_SERVER.get_stats())
+
+@app.route("/api/workers", methods=["GET"])
+def workers():
+    """Worker groups (cores, processes, cameras) in multi-process mode"""
+    if WORKER_POOL is None:
+        return jsonify({"enabled": False})
+    return jsonify(dict(WORKER_POOL.get_stats(), enabled=True))
+
+@app.route("/api/health", methods=["GET"])
+def health():
+    """Liveness: the server is up; includes the load state of every model"""
+    if WORKER_POOL is not None:
+        return jsonify({"status": "ok", "workers": WORKER_POOL.models_status()})
+    return jsonify({"status": "ok", "models": MODEL_REGISTRY.status()})
+
+@app.route("/api/ready", methods=["GET"])
+def ready():
+    """Readiness: 200 once every model with weights on disk is loaded and warmed, else 503"""
+    if WORKER_POOL is not None:
+        stats = WORKER_POOL.get_stats()
+        is_ready = WORKER_POOL.models_ready()
+        body = {"ready": is_ready, "workers": {g["group"]: g["models_ready"] for g in stats["groups"]}}
+        return jsonify(body), (200 if is_ready else 503)
+    is_ready = MODEL_REGISTRY.is_ready()
+    body = {"ready": is_ready, "models": MODEL_REGISTRY.status()}
+    return jsonify(body), (200 if is_ready else 503)
 
 @app.route("/api/stop_video/<camera_id>", methods=["POST"])
 def stop_video(camera_id):
     """Stop video stream and cleanup"""
     try:
-        # Set stop flag to terminate stream
-        STOP_FLAGS[camera_id] = True
-        
-        import time
-        time.sleep(0.3)  # Wait for stream to stop
-        
-        video_path = VIDEO_SESSIONS.get(camera_id)
-        if video_path and os.path.exists(video_path):
-            os.unlink(video_path)
-            print(f"🗑️ Deleted video for {camera_id}")
-        
-        if camera_id in VIDEO_SESSIONS:
-            del VIDEO_SESSIONS[camera_id]
-        if camera_id in STOP_FLAGS:
-            del STOP_FLAGS[camera_id]
-        
+        # Stop the shared pipeline (every viewer's stream ends) and delete an uploaded video
+        SESSIONS.close(camera_id)
         return jsonify({"status": "success"})
     except Exception as e:
         print(f"⚠️ Error stopping video: {e}")
@@ -674,17 +473,9 @@ def stop_video(camera_id):
 def get_detections(date):
     """Get detection data for a specific date"""
     try:
-        detection_file = DETECTIONS_DIR / f"{date}.json"
-        if not detection_file.exists():
-            return jsonify([])
-        
-        with open(detection_file, 'r') as f:
-            data = json.load(f)
-        
         # Filter by type if specified
         filter_type = request.args.get('type', None)
-        if filter_type:
-            data = [d for d in data if d['type'] == filter_type]
+        data = EVENT_STORE.read_day(date, filter_type)
         
         return jsonify(data)
     except Exception as e:
@@ -698,22 +489,52 @@ def get_detections_range():
         end_date = request.args.get('end')
         filter_type = request.args.get('type', None)
         
-        all_data = []
-        
-        # Get all detection files
-        for file in sorted(DETECTIONS_DIR.glob("*.json")):
-            file_date = file.stem
-            if (not start_date or file_date >= start_date) and (not end_date or file_date <= end_date):
-                with open(file, 'r') as f:
-                    data = json.load(f)
-                    if filter_type:
-                        data = [d for d in data if d['type'] == filter_type]
-                    all_data.extend(data)
+        all_data = EVENT_STORE.read_range(start_date, end_date, filter_type)
         
         return jsonify(all_data)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/detections/aggregate", methods=["GET"])
+def get_detections_aggregate():
+    """
+    Pre-aggregated detection counts: ?grain=minute|hour|day&start=&end=&camera=&type=&by=type|camera|camera,type|none
+    (start / end: dates or ISO datetimes, inclusive). Returns the buckets and the totals of the range.
+    """
+    args = request.args
+    grain = args.get('grain', 'hour')
+    by = args.get('by', 'type')
+    try:
+        buckets = ROLLUPS.aggregate(grain, start=args.get('start'), end=args.get('end'),
+                                    camera=args.get('camera'), type=args.get('type'), by=by)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"grain": grain, "by": by, "buckets": buckets, "totals": totals(buckets, by)})
+
+@app.route("/api/detections/latest", methods=["GET"])
+def get_detections_latest():
+    """The newest detection events: ?limit=10&type="""
+    try:
+        limit = min(int(request.args.get('limit', 10)), ROLLUPS.recent.maxlen)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    return jsonify(ROLLUPS.latest(limit, request.args.get('type')))
+
+@app.route("/api/alerts/export", methods=["GET"])
+def export_alerts_excel():
+    """Generate the styled alert workbook on demand from the event store"""
+    try:
+        start_date = request.args.get('start')
+        end_date = request.args.get('end')
+        filter_type = request.args.get('type', None)
+        EVENT_STORE.flush()
+        events = EVENT_STORE.read_range(start_date, end_date, filter_type)
+        buf = build_alert_workbook(events)
+        return send_file(buf, as_attachment=True, download_name="detection_alerts.xlsx",
+                         mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route("/api/open_powerbi", methods=["POST"])
 def open_powerbi():
     """Open Power BI dashboard"""
@@ -744,6 +565,27 @@ def handle_connect():
 def handle_disconnect():
     print('Client disconnected')
 
+@socketio.on('analytics_subscribe')
+def handle_analytics_subscribe(data=None):
+    """
+    Join a camera's (or "all") analytics delta room: {"stream", "epoch", "since"}.
+    The ack carries the deltas missed since `since`, or "full" when the client must
+    reload its snapshot over HTTP (see AnalyticsFeed.resume).
+    """
+    data = data or {}
+    stream = str(data.get('stream') or ALL)
+    join_room(room_for(stream))
+    try:
+        since = int(data['since']) if data.get('since') is not None else None
+    except (TypeError, ValueError):
+        since = None  # unusable position: full resync
+    return ANALYTICS_FEED.resume(stream, data.get('epoch'), since)
+
+@socketio.on('analytics_unsubscribe')
+def handle_analytics_unsubscribe(data=None):
+    leave_room(room_for(str((data or {}).get('stream') or ALL)))
+
 if __name__ == "__main__":
-    # flask-socketio run
-    socketio.run(app, host="0.0.0.0", port=5000, debug=True)
+    # flask-socketio run; the debug reloader re-imports this module in a child process,
+    # which would start a second set of worker groups, so it's off in worker mode
+    socketio.run(app, host="0.0.0.0", port=5000, debug=True, use_reloader=WORKER_POOL is None)
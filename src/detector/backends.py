@@ -0,0 +1,246 @@
+# src/detector/backends.py
+# CPU inference backends for exported YOLO detection weights.
+#
+# The production nodes have no GPU, where ONNX Runtime / OpenVINO run the same
+# network faster than PyTorch. export_cached() exports a .pt once per weight
+# file (the cache key is a hash of its bytes, so retrained weights are picked
+# up) and ExportedYOLO runs the export with tuned thread counts. ExportedYOLO
+# is a drop-in for the parts of ultralytics' YOLO this code base uses -
+# model(...) / model.predict(...) on a BCHW tensor or BGR images with conf,
+# iou, max_det and classes, results[i].boxes.xyxy / .conf / .cls, model.names
+# - and post-processes with ultralytics' own NMS, so its boxes match the
+# PyTorch model up to the numeric differences of the runtime.
+
+import ast
+import hashlib
+import importlib.util
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import torch
+import yaml
+from ultralytics.utils.nms import non_max_suppression
+
+from src.detector.multi_head import letterbox, scale_boxes_back
+
+
+BACKENDS = ("torch", "onnx", "openvino")
+# modules an exported backend needs (export + runtime); optional, not in requirements.txt
+RUNTIME_MODULES = {"onnx": ("onnx", "onnxruntime"), "openvino": ("openvino",)}
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[2] / "models" / "export_cache"
+
+
+def require_runtime(backend):
+    """Raise ImportError if `backend`'s packages are missing (before ultralytics tries to pip-install them)"""
+    missing = [m for m in RUNTIME_MODULES.get(backend, ()) if importlib.util.find_spec(m) is None]
+    if missing:
+        raise ImportError(f"{backend} backend needs {', '.join(missing)} (pip install {' '.join(missing)})")
+
+
+def weights_hash(path, chunk=1 << 20):
+    """sha1 of the weight file (first 16 hex chars)"""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()[:16]
+
+
+def export_path(path, fmt="onnx", imgsz=640, cache_dir=None, precision="fp32"):
+    """
+    Where the `fmt` export of a .pt file lives:
+    cache_dir/<stem>-<weights hash>-<imgsz>[-int8].onnx (or ..._openvino_model/)
+    """
+    path = Path(path)
+    if fmt not in BACKENDS[1:]:
+        raise ValueError(f"unknown export format {fmt!r}")
+    key = f"{path.stem}-{weights_hash(path)}-{imgsz}" + ("-int8" if precision == "int8" else "")
+    return Path(cache_dir or DEFAULT_CACHE_DIR) / (f"{key}.onnx" if fmt == "onnx" else f"{key}_openvino_model")
+
+
+def export_cached(path, fmt="onnx", imgsz=640, cache_dir=None):
+    """
+    Path of the FP32 `fmt` export of a .pt file, exporting it on the first call.
+    Exports are dynamic-shape (any batch size / letterboxed size).
+    """
+    path = Path(path)
+    target = export_path(path, fmt, imgsz, cache_dir)
+    cache_dir = target.parent
+    if target.exists():
+        return target
+
+    from ultralytics import YOLO
+
+    print(f"📦 Exporting {path.name} to {fmt} (cached as {target.name})")
+    exported = Path(YOLO(str(path)).export(format=fmt, imgsz=imgsz, dynamic=True, simplify=True,
+                                           half=False, verbose=False))
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".part")
+    if tmp.is_dir():
+        shutil.rmtree(tmp)
+    elif tmp.exists():
+        tmp.unlink()
+    shutil.move(str(exported), str(tmp))
+    os.replace(tmp, target)
+    return target
+
+
+# ----------------- results -----------------
+class _Boxes:
+    """The slice of ultralytics' Boxes the detectors read"""
+
+    def __init__(self, det):
+        self.data = det
+        self.xyxy = det[:, :4]
+        self.conf = det[:, 4]
+        self.cls = det[:, 5]
+
+    def __len__(self):
+        return len(self.data)
+
+
+class _Result:
+    def __init__(self, det, names, orig_shape):
+        self.boxes = _Boxes(det)
+        self.names = names
+        self.orig_shape = orig_shape
+
+
+# ----------------- runtimes -----------------
+class ExportedYOLO:
+    """Common pre/post-processing; subclasses implement _forward(np BCHW float32) -> np (B, 4+nc, N)"""
+
+    def __init__(self, path, metadata):
+        self.path = str(path)
+        self.task = metadata.get("task", "detect")
+        if self.task != "detect":
+            raise ValueError(f"{self.path}: only detection exports are supported (task={self.task})")
+        names = metadata.get("names", {})
+        self.names = {int(k): v for k, v in names.items()}
+        self.stride = int(metadata.get("stride", 32))
+        imgsz = metadata.get("imgsz", 640)
+        self.imgsz = int(max(imgsz)) if isinstance(imgsz, (list, tuple)) else int(imgsz)
+        self.device = "cpu"
+
+    def to(self, device):
+        # exported CPU runtimes ignore the torch device
+        return self
+
+    def __call__(self, source, **kwargs):
+        return self.predict(source, **kwargs)
+
+    def predict(self, source, conf=0.25, iou=0.7, max_det=300, classes=None, imgsz=None, verbose=False, **kwargs):
+        """
+        source: BCHW float tensor in [0, 1] (boxes come back in tensor pixels, like
+        ultralytics) or one / a list of BGR images (boxes in image pixels)
+        """
+        if isinstance(source, torch.Tensor):
+            batch, metas = source.detach().cpu().float().numpy(), None
+        else:
+            batch, metas = self._preprocess(source if isinstance(source, list) else [source], imgsz or self.imgsz)
+        pred = torch.from_numpy(np.ascontiguousarray(self._forward(np.ascontiguousarray(batch, dtype=np.float32))))
+        dets = non_max_suppression(pred, conf, iou, classes=classes, max_det=max_det)
+        results = []
+        for i, det in enumerate(dets):
+            if metas is None:
+                shape = tuple(batch.shape[2:])
+                det[:, [0, 2]] = det[:, [0, 2]].clamp(0, shape[1])
+                det[:, [1, 3]] = det[:, [1, 3]].clamp(0, shape[0])
+            else:
+                ratio, pad, shape = metas[i]
+                det = det.clone()
+                det[:, :4] = torch.from_numpy(scale_boxes_back(det[:, :4].numpy(), ratio, pad, shape))
+                shape = shape[:2]
+            results.append(_Result(det, self.names, shape))
+        return results
+
+    def _preprocess(self, images, imgsz):
+        auto = len({im.shape for im in images}) == 1
+        imgs, metas = [], []
+        for im in images:
+            img, ratio, pad = letterbox(im, imgsz, stride=self.stride, auto=auto)
+            imgs.append(img)
+            metas.append((ratio, pad, im.shape))
+        batch = np.stack(imgs)[..., ::-1].transpose(0, 3, 1, 2).astype(np.float32) / 255.0
+        return batch, metas
+
+    def _forward(self, batch):
+        raise NotImplementedError
+
+
+class OnnxYOLO(ExportedYOLO):
+    def __init__(self, path, intra_threads=0, inter_threads=1):
+        """
+        intra_threads: threads inside one operator (0 = one per physical core)
+        inter_threads: operators run in parallel (1 = sequential, best for YOLO graphs)
+        """
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL if inter_threads <= 1 else ort.ExecutionMode.ORT_PARALLEL
+        opts.intra_op_num_threads = int(intra_threads or 0)
+        opts.inter_op_num_threads = int(inter_threads or 0)
+        self.session = ort.InferenceSession(str(path), opts, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        meta = self.session.get_modelmeta().custom_metadata_map
+        super().__init__(path, {k: _literal(v) for k, v in meta.items()})
+
+    def _forward(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class OpenVINOYOLO(ExportedYOLO):
+    def __init__(self, path, threads=0):
+        """path: ..._openvino_model/ directory; threads: 0 = OpenVINO default"""
+        import openvino as ov
+
+        path = Path(path)
+        xml = next(path.glob("*.xml"))
+        config = {"PERFORMANCE_HINT": "LATENCY"}
+        if threads:
+            config["INFERENCE_NUM_THREADS"] = int(threads)
+        core = ov.Core()
+        self.compiled = core.compile_model(core.read_model(str(xml)), "CPU", config)
+        meta_file = path / "metadata.yaml"
+        metadata = yaml.safe_load(meta_file.read_text()) if meta_file.exists() else {}
+        super().__init__(path, metadata or {})
+
+    def _forward(self, batch):
+        return self.compiled(batch)[self.compiled.output(0)]
+
+
+def _literal(value):
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return value
+
+
+def load_exported(path, backend="onnx", threads=0, inter_threads=1, imgsz=640, cache_dir=None, precision="fp32"):
+    """
+    Load .pt weights (exported on first use), an .onnx file or an OpenVINO directory.
+    precision="int8" uses the INT8 model promoted by src/utils/quantize.py for these
+    weights, or the FP32 export if none passed its accuracy check.
+    """
+    require_runtime(backend)
+    path = Path(path)
+    if path.suffix == ".pt":
+        int8 = export_path(path, backend, imgsz, cache_dir, precision="int8")
+        if precision == "int8" and int8.exists():
+            path = int8
+        else:
+            if precision == "int8":
+                # e.g. promoted at quantize.py's --imgsz while this consumer serves another size
+                others = sorted(p.name for p in int8.parent.glob(f"{path.stem}-{weights_hash(path)}-*-int8*")
+                                if "candidate" not in p.name and p.suffix != ".json")
+                hint = f"; found INT8 exports at other sizes: {', '.join(others)}" if others else ""
+                print(f"⚠⚠ precision=int8 requested but no promoted INT8 model for {path.name} at imgsz={imgsz}"
+                      f"{hint} - using FP32 (run src/utils/quantize.py --imgsz {imgsz})")
+            path = export_cached(path, backend, imgsz=imgsz, cache_dir=cache_dir)
+    if backend == "openvino":
+        return OpenVINOYOLO(path, threads=threads)
+    return OnnxYOLO(path, intra_threads=threads, inter_threads=inter_threads)
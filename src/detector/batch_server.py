@@ -0,0 +1,150 @@
+# src/detector/batch_server.py
+# Central inference worker shared by every camera stream.
+#
+# Streams submit single frames; one worker thread gathers them into dynamic
+# micro-batches (bounded by max_batch and max_wait_ms), runs each model once
+# per batch through MultiHeadDetector.detect_batch and routes the per-frame
+# results back through Futures.
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from src.detector.multi_head import HEADS
+
+
+class _Request:
+    __slots__ = ("frame", "heads", "person_boxes", "future", "submitted")
+
+    def __init__(self, frame, heads, person_boxes=None):
+        self.frame = frame
+        self.heads = list(heads)
+        self.person_boxes = person_boxes
+        self.future = Future()
+        self.submitted = time.time()
+
+
+class BatchInferenceServer:
+    def __init__(self, detector, max_batch=8, max_wait_ms=10):
+        """
+        detector: MultiHeadDetector (anything with detect_batch(frames, per_frame_heads=..., per_frame_boxes=...))
+        max_batch: largest micro-batch handed to the models
+        max_wait_ms: how long the first frame of a batch may wait for company
+        """
+        self.detector = detector
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max_wait_ms / 1000.0
+        self._q = queue.Queue()
+        self._thread = None
+        self._running = False
+        self._lock = threading.Lock()
+
+        # stats
+        self.batches = 0
+        self.frames = 0
+        self.total_infer_ms = 0.0
+        self.total_wait_ms = 0.0
+        self.max_seen_batch = 0
+
+    # ----------------- lifecycle -----------------
+    def start(self):
+        if self._running:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, name="batch-inference", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        if not self._running:
+            return
+        self._running = False
+        self._q.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
+        # fail anything still queued so callers don't hang
+        while True:
+            try:
+                req = self._q.get_nowait()
+            except queue.Empty:
+                break
+            if req is not None:
+                req.future.set_exception(RuntimeError("inference server stopped"))
+
+    # ----------------- client API -----------------
+    def submit(self, frame, heads=HEADS, person_boxes=None):
+        """
+        Queue one frame; the returned Future resolves to dict head -> Detections.
+        person_boxes: last known people of this camera, for a ROI weapon head
+        """
+        req = _Request(frame, heads, person_boxes)
+        if not self._running:
+            req.future.set_exception(RuntimeError("inference server not running"))
+            return req.future
+        self._q.put(req)
+        return req.future
+
+    def detect(self, frame, heads=HEADS, person_boxes=None, timeout=None):
+        """Blocking drop-in for MultiHeadDetector.detect"""
+        return self.submit(frame, heads, person_boxes).result(timeout)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "frames": self.frames,
+                "avg_batch": round(self.frames / self.batches, 2) if self.batches else 0.0,
+                "max_batch_seen": self.max_seen_batch,
+                "avg_infer_ms": round(self.total_infer_ms / self.batches, 2) if self.batches else 0.0,
+                "avg_wait_ms": round(self.total_wait_ms / self.frames, 2) if self.frames else 0.0,
+                "queue_depth": self._q.qsize(),
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000.0,
+            }
+
+    # ----------------- worker -----------------
+    def _collect(self):
+        first = self._q.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.time()
+            try:
+                req = self._q.get(timeout=remaining) if remaining > 0 else self._q.get_nowait()
+            except queue.Empty:
+                break
+            if req is None:
+                # keep the stop sentinel for the next loop iteration
+                self._q.put(None)
+                break
+            batch.append(req)
+        return batch
+
+    def _worker(self):
+        while self._running:
+            batch = self._collect()
+            if batch is None:
+                break
+            started = time.time()
+            try:
+                outs = self.detector.detect_batch([r.frame for r in batch],
+                                                  per_frame_heads=[r.heads for r in batch],
+                                                  per_frame_boxes=[r.person_boxes for r in batch])
+            except Exception as e:
+                print(f"⚠️ Batched inference failed: {e}")
+                for r in batch:
+                    r.future.set_exception(e)
+                continue
+            infer_ms = (time.time() - started) * 1000
+            for r, out in zip(batch, outs):
+                r.future.set_result(out)
+
+            with self._lock:
+                self.batches += 1
+                self.frames += len(batch)
+                self.total_infer_ms += infer_ms
+                self.total_wait_ms += sum((started - r.submitted) * 1000 for r in batch)
+                self.max_seen_batch = max(self.max_seen_batch, len(batch))
@@ -0,0 +1,342 @@
+# src/detector/camera_analyzer.py
+# Per-camera detection state for the /api/video_feed stream.
+# Analysis (model inference + alert logic) is kept separate from drawing so
+# the streaming pipeline can render the latest result onto every captured
+# frame while inference runs at its own pace.
+
+import time
+from datetime import datetime
+from functools import lru_cache
+
+import cv2
+
+
+GROUP_MIN_PEOPLE = 5
+GROUP_ALERT_SEC = 60
+WEAPON_ALERT_EVERY = 30  # frames between repeated weapon alerts
+FIGHT_CONF = 0.65
+
+
+class CameraAnalyzer:
+    def __init__(self, camera_id, detector, fps=30, on_alert=None, tracker=None, scheduler=None):
+        """
+        detector: MultiHeadDetector providing the 'crowd', 'weapon' and 'fight' heads
+        on_alert: callable(payload, frame, count) invoked when an alert fires
+        tracker: optional SimpleTrackerWrapper (src/trackers/bytetrack_wrapper.py);
+                 when set, detected people are labelled by stable track ID
+        scheduler: optional HeadScheduler (src/detector/scheduler.py) choosing the heads
+                   per frame from scene motion; default is the fixed heads_for cadence
+        """
+        self.camera_id = camera_id
+        self.detector = detector
+        self.fps = fps or 30
+        self.on_alert = on_alert
+        self.tracker = tracker
+        self.scheduler = scheduler
+
+        # Persistent detection state for continuous display
+        self.last_person_boxes = []
+        self.last_person_ids = []
+        self.last_weapon_boxes = []
+        self.current_count = 0
+
+        # Group detection tracking (for 5+ people alert)
+        self.group_start_time = None
+        self.group_alert_sent = False
+
+        # Weapon alert throttling
+        self.last_weapon_alert_frame = -WEAPON_ALERT_EVERY
+
+        # Fight detection tracking (require sustained detection)
+        self.fight_frame_count = 0
+        self.fight_threshold_frames = int(self.fps * 3)  # 3 seconds of sustained fight detection
+        self.fight_alert_sent = False
+        self.last_fight_time = 0
+        self.fight_start_frame = 0
+        self.last_fight = (False, [])  # (detected, boxes) shown on frames the fight head skips
+
+    def heads_for(self, frame_idx):
+        """Heads to run on this frame - crowd/fight every frame, weapon every 2 frames"""
+        heads = ['crowd', 'fight']
+        if frame_idx % 2 == 0:
+            heads.append('weapon')
+        return heads
+
+    def analyze(self, frame, frame_idx):
+        """Run the models on one frame and return a result dict for draw_overlays"""
+        if self.scheduler is None:
+            heads = self.heads_for(frame_idx)
+        else:
+            heads = self.scheduler.plan(frame, frame_idx)
+        # last known people let a ROI weapon head crop around them when crowd is skipped
+        dets = self.detector.detect(frame, heads=heads, person_boxes=self.last_person_boxes) if heads else {}
+        prev_count = self.current_count
+        result = self.apply(frame, frame_idx, dets)
+        if self.scheduler is not None:
+            # new weapon/fight hits or a change in head count keep the scheduler on its fast cadence
+            weapon_hit = 'weapon' in dets and len(dets['weapon'].boxes) > 0
+            fight_hit = 'fight' in dets and any(c >= FIGHT_CONF for c in dets['fight'].confs)
+            count_changed = 'crowd' in dets and self.current_count != prev_count
+            self.scheduler.observe(frame_idx, weapon_hit or fight_hit or count_changed)
+        return result
+
+    def apply(self, frame, frame_idx, dets):
+        """Update alert state from per-head Detections and build the overlay result"""
+        now = time.time()
+        result = {
+            'frame_idx': frame_idx,
+            'person_boxes': self.last_person_boxes,
+            'person_ids': self.last_person_ids,
+            'count': self.current_count,
+            'group_start_time': None,
+            'weapon_boxes': [],
+            'weapon_detected': False,
+            'fight_boxes': [],
+            'fight_detected': False,
+        }
+
+        if 'crowd' in dets:
+            self._update_crowd(dets['crowd'].boxes, dets['crowd'].confs, frame, now)
+            result['person_boxes'] = self.last_person_boxes
+            result['person_ids'] = self.last_person_ids
+            result['count'] = self.current_count
+            if self.current_count >= GROUP_MIN_PEOPLE:
+                result['group_start_time'] = self.group_start_time
+
+        if 'weapon' in dets:
+            self.last_weapon_boxes = []
+            if len(dets['weapon'].boxes) > 0:
+                self._update_weapon(dets['weapon'].boxes, dets['weapon'].confs, frame, frame_idx, result)
+        # Weapon runs every other frame - keep the last boxes for the skipped ones
+        result['weapon_boxes'] = self.last_weapon_boxes
+        result['weapon_detected'] = len(self.last_weapon_boxes) > 0
+
+        if 'fight' in dets:
+            self._update_fight(dets['fight'].boxes, dets['fight'].confs, frame, frame_idx, result)
+            self.last_fight = (result['fight_detected'], result['fight_boxes'])
+        else:
+            result['fight_detected'], result['fight_boxes'] = self.last_fight
+
+        return result
+
+    # ----------------- per-model state updates -----------------
+    def _update_crowd(self, boxes, confs, frame, now):
+        if self.tracker is not None:
+            # Counting stays on the raw detections (a new track is only confirmed a frame
+            # later and low-confidence people never start one); tracks only label them.
+            # The detection index rides along as the label to map tracks back to boxes.
+            tracks = self.tracker.update([[*box[:4], conf, i] for i, (box, conf) in enumerate(zip(boxes, confs))])
+            self.last_person_ids = [None] * len(boxes)
+            for t in tracks:
+                self.last_person_ids[t['label']] = t['id']
+        self.current_count = len(boxes)
+        self.last_person_boxes = boxes
+
+        if self.current_count < GROUP_MIN_PEOPLE:
+            # Reset group tracking if count drops below 5
+            self.group_start_time = None
+            self.group_alert_sent = False
+            return
+
+        if self.group_start_time is None:
+            self.group_start_time = now
+            print(f"👥 Group detected: {self.current_count} people")
+            return
+
+        # Send alert after 60 seconds (1 minute)
+        group_duration = now - self.group_start_time
+        if group_duration >= GROUP_ALERT_SEC and not self.group_alert_sent:
+            self._alert({
+                'type': 'crowd',
+                'camera': self.camera_id,
+                'count': self.current_count,
+                'duration': int(group_duration),
+                'timestamp': datetime.now().isoformat(),
+                'severity': 'medium',
+                'message': f'{self.current_count} people detected for {int(group_duration)} seconds'
+            }, frame, count=self.current_count)
+            self.group_alert_sent = True
+            print(f"🚨 Group alert sent: {self.current_count} people for {int(group_duration)}s")
+
+    def _update_weapon(self, boxes, confs, frame, frame_idx, result):
+        weapon_conf = float(max(confs)) if len(confs) > 0 else 0.0
+        self.last_weapon_boxes = list(zip(boxes, confs))
+
+        # Send weapon alert (throttle to avoid spam)
+        if frame_idx - self.last_weapon_alert_frame >= WEAPON_ALERT_EVERY:
+            self.last_weapon_alert_frame = frame_idx
+            result['weapon_boxes'] = self.last_weapon_boxes
+            result['weapon_detected'] = True
+            self._alert({
+                'type': 'weapon',
+                'camera': self.camera_id,
+                'confidence': weapon_conf,
+                'timestamp': datetime.now().isoformat(),
+                'severity': 'high'
+            }, frame, count=len(boxes), result=result)
+
+    def _update_fight(self, boxes, confs, frame, frame_idx, result):
+        max_conf = float(max(confs)) if len(confs) > 0 else 0.0
+
+        if max_conf < FIGHT_CONF:
+            # No (confident) detection - reset counter if gap exceeds 1 second
+            if frame_idx - self.last_fight_time > self.fps:
+                self.fight_frame_count = 0
+                self.fight_alert_sent = False
+            return
+
+        # Check if detection is continuous (within 1 second of last detection).
+        # Count the frame span rather than hits: the pipeline may skip frames
+        # while inference is busy.
+        if frame_idx - self.last_fight_time > self.fps or self.fight_frame_count == 0:
+            self.fight_start_frame = frame_idx
+        self.fight_frame_count = frame_idx - self.fight_start_frame + 1
+        self.last_fight_time = frame_idx
+
+        # Only mark as detected if sustained over threshold (3 seconds)
+        if self.fight_frame_count < self.fight_threshold_frames:
+            return
+
+        result['fight_detected'] = True
+        result['fight_boxes'] = list(zip(boxes, confs))
+
+        # Send fight alert once (throttled)
+        if not self.fight_alert_sent:
+            self._alert({
+                'type': 'fight',
+                'camera': self.camera_id,
+                'confidence': max_conf,
+                'timestamp': datetime.now().isoformat(),
+                'severity': 'high'
+            }, frame, count=len(boxes), result=result)
+            self.fight_alert_sent = True
+
+    def _alert(self, payload, frame, count=0, result=None):
+        if self.on_alert is None:
+            return
+        # Evidence screenshot carries the overlays drawn so far
+        snapshot = frame.copy()
+        if result is not None:
+            draw_overlays(snapshot, result, hud=False)
+        self.on_alert(payload, snapshot, count)
+
+
+# ----------------- Drawing -----------------
+def draw_overlays(frame, result, hud=True):
+    """Draw detection boxes, group timer and HUD for a result from CameraAnalyzer.analyze"""
+    if result is None:
+        return frame
+
+    now = time.time()
+    boxes = result.get('person_boxes', [])
+    person_ids = result.get('person_ids') or []
+    current_count = result.get('count', 0)
+    group_start_time = result.get('group_start_time')
+    group_duration = int(now - group_start_time) if group_start_time is not None else None
+
+    # Draw all detected people with green boxes
+    # If 5+ people (group), draw yellow boxes instead
+    is_group = current_count >= GROUP_MIN_PEOPLE
+    box_color = (0, 255, 255) if is_group else (0, 255, 0)
+    box_thickness = 3 if is_group else 2
+    for i, box in enumerate(boxes):
+        x1, y1, x2, y2 = map(int, box[:4])
+        label = f"Person {person_ids[i]}" if i < len(person_ids) and person_ids[i] is not None else "Person"
+        cv2.rectangle(frame, (x1, y1), (x2, y2), box_color, box_thickness)
+        cv2.putText(frame, label, (x1, y1-5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, box_color, 2)
+
+    # If group detected, show timer on screen near the group
+    if is_group and len(boxes) > 0 and group_duration is not None:
+        center_x = int(sum([box[0] + box[2] for box in boxes]) / (2 * len(boxes)))
+        center_y = int(sum([box[1] + box[3] for box in boxes]) / (2 * len(boxes)))
+        timer_text = f"GROUP: {group_duration}s"
+        timer_color = (0, 255, 255) if group_duration < GROUP_ALERT_SEC else (0, 0, 255)
+
+        timer_size = text_size(timer_text, 1.2, 3)
+        timer_x = max(10, center_x - timer_size[0] // 2)
+        timer_y = max(50, center_y - 30)
+        cv2.rectangle(frame,
+                      (timer_x - 10, timer_y - timer_size[1] - 10),
+                      (timer_x + timer_size[0] + 10, timer_y + 10),
+                      (0, 0, 0), -1)
+        cv2.rectangle(frame,
+                      (timer_x - 10, timer_y - timer_size[1] - 10),
+                      (timer_x + timer_size[0] + 10, timer_y + 10),
+                      timer_color, 2)
+        cv2.putText(frame, timer_text, (timer_x, timer_y),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.2, timer_color, 3)
+
+    # Weapon boxes in red, fight boxes in orange (large and visible)
+    for box, conf in result.get('weapon_boxes', []):
+        _draw_labelled_box(frame, box, f"WEAPON {conf:.2f}", (0, 0, 255))
+    if result.get('fight_detected'):
+        for box, conf in result.get('fight_boxes', []):
+            _draw_labelled_box(frame, box, f"FIGHT {conf:.2f}", (0, 140, 255))
+
+    if hud:
+        draw_stream_hud(frame, result.get('weapon_detected', False), result.get('fight_detected', False),
+                        current_count, group_duration if is_group else None)
+    return frame
+
+
+@lru_cache(maxsize=1024)
+def text_size(text, scale, thickness):
+    """cv2.getTextSize for FONT_HERSHEY_SIMPLEX, cached (labels repeat every frame)"""
+    return cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)[0]
+
+
+def _draw_labelled_box(frame, box, label, color):
+    x1, y1, x2, y2 = map(int, box[:4])
+    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 4)
+
+    label_size = text_size(label, 1.0, 3)
+    label_y = max(30, y1 - 10)
+    # Black background with coloured border for better visibility
+    cv2.rectangle(frame,
+                  (x1, label_y - label_size[1] - 5),
+                  (x1 + label_size[0] + 5, label_y + 5),
+                  (0, 0, 0), -1)
+    cv2.rectangle(frame,
+                  (x1, label_y - label_size[1] - 5),
+                  (x1 + label_size[0] + 5, label_y + 5),
+                  color, 2)
+    cv2.putText(frame, label, (x1 + 2, label_y), cv2.FONT_HERSHEY_SIMPLEX, 1.0, color, 3)
+
+
+HUD_ORIGIN = (10, 10)
+HUD_SIZE = (351, 131)  # width, height of the panel (a 350x130 rectangle, corners inclusive)
+
+
+def draw_stream_hud(frame, weapon_detected, fight_detected, current_count, group_duration=None):
+    """
+    Semi-transparent status panel in the top-left corner. Only the panel's ROI is
+    darkened (in place, no full-frame overlay copy and blend), then the text is
+    drawn on it.
+    """
+    x, y = HUD_ORIGIN
+    w, h = HUD_SIZE
+    roi = frame[y:y + h, x:x + w]
+    if roi.size == 0:
+        return
+    cv2.addWeighted(roi, 0.5, roi, 0.0, 0.0, dst=roi)  # 50% black, as the old overlay blend
+
+    tx, ty = x + 8, y + 30
+    weapon_color = (0, 0, 255) if weapon_detected else (0, 255, 0)
+    weapon_text = f"Weapon: {'DETECTED' if weapon_detected else 'SAFE'}"
+    cv2.putText(frame, weapon_text, (tx, ty), cv2.FONT_HERSHEY_SIMPLEX, 0.7, weapon_color, 2)
+    ty += 30
+
+    fight_color = (0, 140, 255) if fight_detected else (0, 255, 0)
+    fight_text = f"Fight: {'DETECTED' if fight_detected else 'SAFE'}"
+    cv2.putText(frame, fight_text, (tx, ty), cv2.FONT_HERSHEY_SIMPLEX, 0.7, fight_color, 2)
+    ty += 30
+
+    # People count with color coding
+    people_color = (0, 255, 255) if current_count >= GROUP_MIN_PEOPLE else (255, 255, 255)
+    cv2.putText(frame, f"People: {current_count}", (tx, ty), cv2.FONT_HERSHEY_SIMPLEX, 0.7, people_color, 2)
+
+    # Show group timing if 5+ people detected
+    if group_duration is not None:
+        ty += 30
+        group_color = (0, 255, 255) if group_duration < GROUP_ALERT_SEC else (0, 0, 255)
+        cv2.putText(frame, f"Group: {group_duration}s", (tx, ty), cv2.FONT_HERSHEY_SIMPLEX, 0.7, group_color, 2)
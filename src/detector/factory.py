@@ -0,0 +1,74 @@
+# src/detector/factory.py
+# Builds the detection stack from config.yaml: the model registry, the
+# multi-head detector and a camera's analyzer (tracker + head scheduler).
+# Shared by the web process and the inference worker processes
+# (src/streaming/worker.py), so both run the same models the same way.
+
+from src.detector.camera_analyzer import CameraAnalyzer
+from src.detector.model_registry import ModelRegistry
+from src.detector.multi_head import MultiHeadDetector
+from src.detector.roi_inference import RegionInference
+from src.detector.scheduler import HeadScheduler, MotionGate
+from src.trackers.bytetrack_wrapper import SimpleTrackerWrapper
+
+
+MODEL_NAMES = ("crowd", "weapon", "fight", "merged")
+
+
+def build_model_registry(config, threads=None):
+    """
+    ModelRegistry of the configured weights (not yet preloaded).
+    threads: per-operator threads, overriding inference.intra_threads (e.g. a worker's core count)
+    """
+    inference_cfg = config.get("inference") or {}
+    return ModelRegistry(
+        {name: (config.get("models") or {}).get(name) for name in MODEL_NAMES},
+        loader_args={"device": config.get("device", "cpu"),
+                     "backend": inference_cfg.get("backend", "torch"),   # "torch", "onnx" or "openvino"
+                     "threads": inference_cfg.get("intra_threads", 0) if threads is None else threads,
+                     "inter_threads": inference_cfg.get("inter_threads", 1),
+                     "precision": inference_cfg.get("precision", "fp32")},
+    )
+
+
+def build_detector(registry, config):
+    """Multi-head detector sharing one letterbox/normalize per frame across all heads"""
+    weapon_roi_cfg = dict(config.get("weapon_roi") or {})
+    weapon_roi_mode = weapon_roi_cfg.pop("mode", "full")  # weapon model input: "full" frame, "persons" crops or "tiles"
+    merged = registry.get('merged')
+    if merged is not None:
+        detector = MultiHeadDetector(merged=merged)
+    else:
+        detector = MultiHeadDetector(models={
+            'crowd': registry.get('crowd'),
+            'weapon': registry.get('weapon'),
+            'fight': registry.get('fight')
+        }, weapon_roi=RegionInference(mode=weapon_roi_mode, **weapon_roi_cfg) if weapon_roi_mode != "full" else None)
+    # hot-reloaded weights are swapped into the running detector
+    registry.add_listener(detector.set_model)
+    return detector
+
+
+def build_camera_analyzer(camera_id, inference, fps, on_alert, config=None):
+    """A camera's CameraAnalyzer over `inference` (detector or BatchInferenceServer); returns (analyzer, scheduler)"""
+    config = config or {}
+    tracker = None
+    if config.get("tracker") == "bytetrack":
+        # People keep a stable ID across frames (ByteTrack); the crowd head runs at conf 0.15,
+        # so the high/low split sits lower than ByteTrack's 0.5 default
+        tracker = SimpleTrackerWrapper(max_age=int(fps), track_thresh=0.3, low_thresh=0.15)
+    scheduler = build_scheduler(config.get("scheduler"), fps)
+    analyzer = CameraAnalyzer(camera_id, inference, fps=fps, on_alert=on_alert,
+                              tracker=tracker, scheduler=scheduler)
+    return analyzer, scheduler
+
+
+def build_scheduler(scheduler_cfg, fps):
+    """
+    HeadScheduler from the config's `scheduler:` section. Static scenes: heads drop to
+    their slow cadence until motion or a detection shows up.
+    """
+    cfg = scheduler_cfg or {}
+    cadence = {head: tuple(c) for head, c in (cfg.get("cadence") or {}).items()}
+    gate = MotionGate(min_area=cfg.get("motion_threshold", 0.002))
+    return HeadScheduler(cadence=cadence, gate=gate, hold_frames=max(1, int(cfg.get("hold_sec", 1.0) * fps)))
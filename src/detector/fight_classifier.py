@@ -1,12 +1,16 @@
 # src/detector/fight_classifier.py
 
 import cv2
+import numpy as np
 import torch
-from ultralytics import YOLO
 import time
 
+from src.detector.yolo_loader import load_yolo
+
 class FightClassifier:
-    def __init__(self, model_path, device="auto", img_size=480, skip_frames=2):
+    def __init__(self, model_path, device="auto", img_size=480, skip_frames=2,
+                 max_batch=8, cache_change_thresh=6.0, cache_max_age=15, backend="torch", threads=0,
+                 precision="fp32"):
         try:
             print(f"\nLoading Fight Model: {model_path}")
 
@@ -17,8 +21,9 @@ class FightClassifier:
 
             print("Using device:", self.device)
 
-            self.model = YOLO(model_path)
-            self.model.to(self.device)
+            # backend: "torch", or "onnx"/"openvino" on CPU (see src/detector/backends.py)
+            self.model = load_yolo(model_path, device=self.device, backend=backend, threads=threads,
+                                   imgsz=img_size, precision=precision)
 
             # ---- Detect fight class index automatically ----
             self.fight_class_id = None
@@ -33,6 +38,14 @@ class FightClassifier:
             self.img_size = img_size
             self.skip_frames = skip_frames
             self.counter = 0
+            self.max_batch = max_batch  # crops per forward pass in predict_batch
+
+            # Per-track score cache: oid -> {"sig", "score", "age"}. A cached score is
+            # reused while the crop's mean thumbnail difference stays under
+            # cache_change_thresh (grey levels), for at most cache_max_age runs.
+            self.track_cache = {}
+            self.cache_change_thresh = cache_change_thresh
+            self.cache_max_age = cache_max_age
 
             # Warm up
             dummy = (255 * torch.rand(480, 480, 3).numpy()).astype("uint8")
@@ -45,29 +58,83 @@ class FightClassifier:
             raise RuntimeError(f"Failed to load fight model: {e}")
 
     def predict(self, frame):
-        self.counter += 1
-        if self.counter % self.skip_frames != 0:
+        """Fight score of one image (runs every skip_frames-th call)"""
+        if not self.tick():
             return 0.0
-        
-        try:
-            resized = cv2.resize(frame, (self.img_size, self.img_size))
-            results = self.model(resized, verbose=False, device=self.device)[0]
+        return self.predict_batch([frame])[0]
 
-            fight_score = 0.0
-
-            for box in results.boxes:
-                cls_id = int(box.cls[0])
-                conf = float(box.conf[0])
+    def predict_from_frame(self, frame):
+        return self.predict(frame)
 
-                # --- Correct fight class ---
-                if cls_id == self.fight_class_id:
-                    fight_score = max(fight_score, conf)
+    def tick(self):
+        """Advance the frame counter; True on frames the classifier should run"""
+        self.counter += 1
+        return self.counter % self.skip_frames == 0
 
-            return fight_score
+    def predict_batch(self, crops):
+        """Fight score for each image in crops, in one batched forward pass"""
+        if len(crops) == 0:
+            return []
+        try:
+            resized = [cv2.resize(c, (self.img_size, self.img_size)) for c in crops]
+            scores = []
+            for i in range(0, len(resized), self.max_batch):
+                results = self.model(resized[i:i + self.max_batch], verbose=False, device=self.device)
+                scores.extend(self._fight_score(r) for r in results)
+            return scores
 
         except Exception as e:
             print("Fight detection error:", e)
-            return 0.0
+            return [0.0] * len(crops)
 
-    def predict_from_frame(self, frame):
-        return self.predict(frame)
+    def _fight_score(self, result):
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0 or self.fight_class_id is None:
+            return 0.0
+        # --- Correct fight class ---
+        confs = boxes.conf[boxes.cls.int() == self.fight_class_id]
+        return float(confs.max()) if len(confs) else 0.0
+
+    def score_tracks(self, frame, oid_to_rect):
+        """
+        Fight score per tracked person: oid -> score, or {} on skipped frames.
+        Crops whose appearance barely changed since they were last scored reuse
+        that score, the rest go through one predict_batch call.
+        """
+        if not self.tick():
+            return {}
+
+        scores = {}
+        todo_oids, todo_crops, todo_sigs = [], [], []
+        for oid, rect in oid_to_rect.items():
+            if rect is None:
+                continue
+            x1, y1, x2, y2 = rect
+            crop = frame[max(0, y1):y2, max(0, x1):x2]
+            if crop.size == 0:
+                continue
+            sig = _crop_signature(crop)
+            cached = self.track_cache.get(oid)
+            if (cached is not None and cached["age"] < self.cache_max_age
+                    and np.abs(sig - cached["sig"]).mean() < self.cache_change_thresh):
+                cached["age"] += 1
+                scores[oid] = cached["score"]
+                continue
+            todo_oids.append(oid)
+            todo_crops.append(crop)
+            todo_sigs.append(sig)
+
+        for oid, sig, score in zip(todo_oids, todo_sigs, self.predict_batch(todo_crops)):
+            self.track_cache[oid] = {"sig": sig, "score": score, "age": 0}
+            scores[oid] = score
+
+        # forget people who left
+        for oid in [o for o in self.track_cache if o not in oid_to_rect]:
+            del self.track_cache[oid]
+        return scores
+
+
+def _crop_signature(crop):
+    """Tiny grayscale thumbnail used to tell whether a person's crop changed"""
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    return cv2.resize(gray, (16, 16), interpolation=cv2.INTER_AREA).astype(np.float32)
@@ -3,16 +3,16 @@
 import cv2
 import time
 import os
-import json
 import threading
 import platform
 from pathlib import Path
 from datetime import datetime
 from ultralytics import YOLO
 import yaml
-import requests
 import numpy as np
-import openpyxl
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
 from openpyxl import Workbook
 
 # Attempt winsound on Windows for nicer beep
@@ -30,101 +30,192 @@ sys.path.insert(0, str(ROOT))
 # --------------------- Local Imports ---------------------
 from src.detector.yolo_loader import load_yolo
 from src.detector.fight_classifier import FightClassifier
+from src.detector.multi_head import MultiHeadDetector
+from src.detector.roi_inference import RegionInference
+from src.trackers.bytetrack_wrapper import SimpleTrackerWrapper
+from src.storage.excel_reporter import ExcelReporter
+from src.storage.evidence_writer import EvidenceWriter
+from src.utils.alerts import AlertDispatcher
 from src.detector.behaviour_logic import group_alert_needed, is_night
 # NOTE: GroupTracker implemented below (integrated)
 from src.detector.group_detector import CrowdGroupDetector  # not used; integrated GroupManager below
 
 
 # --------------------- Simple Tracker ---------------------
+def iou_matrix(a, b):
+    """Pairwise IoU between (N,4) and (M,4) xyxy arrays"""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
 class SimpleCentroidTracker:
-    def __init__(self, max_disappear=50, max_distance=120):
+    """
+    Centroid tracker with optimal (Hungarian) assignment.
+    Track state lives in parallel NumPy arrays (one row per track); the cost
+    matrix is centroid distance, optionally blended with 1 - IoU, and pairs
+    further apart than max_distance are gated out.
+    """
+    _INF = 1e9
+
+    def __init__(self, max_disappear=50, max_distance=120, iou_weight=0.0):
         self.next_id = 0
-        self.objects = {}         # oid -> (cX, cY)
-        self.disappeared = {}     # oid -> frames disappeared
-        self.last_centroid = {}   # oid -> last centroid
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.centroids = np.zeros((0, 2), dtype=np.int64)      # current centroid per track
+        self.boxes = np.zeros((0, 4), dtype=np.float64)        # last matched box per track
+        self.disappeared = np.zeros(0, dtype=np.int64)         # frames since last match
+        self.last_centroid = np.zeros((0, 2), dtype=np.int64)  # centroid at last get_stationary()
         self.max_disappear = max_disappear
         self.max_distance = max_distance
-
-    def register(self, centroid):
-        oid = self.next_id
-        self.objects[oid] = centroid
-        self.disappeared[oid] = 0
-        self.last_centroid[oid] = centroid
-        self.next_id += 1
+        self.iou_weight = iou_weight
+
+    @property
+    def objects(self):
+        """oid -> (cX, cY) mapping"""
+        return {int(oid): (int(c[0]), int(c[1])) for oid, c in zip(self.ids, self.centroids)}
+
+    def register(self, centroid, box=None):
+        self._register_many(np.asarray([centroid], dtype=np.int64),
+                            np.asarray([box if box is not None else (0, 0, 0, 0)], dtype=np.float64))
+
+    def _register_many(self, centroids, boxes):
+        n = len(centroids)
+        if n == 0:
+            return
+        self.ids = np.concatenate([self.ids, np.arange(self.next_id, self.next_id + n)])
+        self.centroids = np.concatenate([self.centroids, centroids])
+        self.boxes = np.concatenate([self.boxes, boxes])
+        self.disappeared = np.concatenate([self.disappeared, np.zeros(n, dtype=np.int64)])
+        self.last_centroid = np.concatenate([self.last_centroid, centroids])
+        self.next_id += n
 
     def deregister(self, oid):
-        self.objects.pop(oid, None)
-        self.disappeared.pop(oid, None)
-        self.last_centroid.pop(oid, None)
+        self._keep(self.ids != oid)
+
+    def _keep(self, mask):
+        self.ids = self.ids[mask]
+        self.centroids = self.centroids[mask]
+        self.boxes = self.boxes[mask]
+        self.disappeared = self.disappeared[mask]
+        self.last_centroid = self.last_centroid[mask]
 
     def update(self, rects):
         """
         rects: list of (x1,y1,x2,y2)
         returns self.objects mapping
         """
-        import math
+        rects = np.asarray(rects, dtype=np.float64).reshape(-1, 4)
         if len(rects) == 0:
-            for oid in list(self.disappeared.keys()):
-                self.disappeared[oid] += 1
-                if self.disappeared[oid] > self.max_disappear:
-                    self.deregister(oid)
+            self.disappeared += 1
+            self._keep(self.disappeared <= self.max_disappear)
             return self.objects
 
-        input_centroids = []
-        for (x1, y1, x2, y2) in rects:
-            cX = int((x1 + x2) / 2)
-            cY = int((y1 + y2) / 2)
-            input_centroids.append((cX, cY))
+        input_centroids = ((rects[:, :2] + rects[:, 2:]) / 2).astype(np.int64)
 
-        if len(self.objects) == 0:
-            for c in input_centroids:
-                self.register(c)
-        else:
-            oids = list(self.objects.keys())
-            ocent = list(self.objects.values())
-            used_input = set()
-            for i, oid in enumerate(oids):
-                best_j = None
-                best_d = 1e9
-                for j, ic in enumerate(input_centroids):
-                    if j in used_input:
-                        continue
-                    d = math.hypot(ic[0] - ocent[i][0], ic[1] - ocent[i][1])
-                    if d < best_d:
-                        best_d = d
-                        best_j = j
-                if best_j is not None and best_d < self.max_distance:
-                    self.objects[oid] = input_centroids[best_j]
-                    self.disappeared[oid] = 0
-                    used_input.add(best_j)
-                else:
-                    self.disappeared[oid] += 1
-                    if self.disappeared[oid] > self.max_disappear:
-                        self.deregister(oid)
-
-            for j, ic in enumerate(input_centroids):
-                if j not in used_input:
-                    self.register(ic)
+        if len(self.ids) == 0:
+            self._register_many(input_centroids, rects)
+            return self.objects
 
+        diff = self.centroids[:, None, :] - input_centroids[None, :, :]
+        dist = np.sqrt((diff.astype(np.float64) ** 2).sum(axis=2))
+        gated = dist >= self.max_distance
+        cost = dist
+        if self.iou_weight > 0:
+            cost = (1 - self.iou_weight) * dist / self.max_distance \
+                + self.iou_weight * (1 - iou_matrix(self.boxes, rects))
+        cost = np.where(gated, self._INF, cost)
+
+        rows, cols = linear_sum_assignment(cost)
+        valid = ~gated[rows, cols]
+        rows, cols = rows[valid], cols[valid]
+
+        self.centroids[rows] = input_centroids[cols]
+        self.boxes[rows] = rects[cols]
+        matched = np.zeros(len(self.ids), dtype=bool)
+        matched[rows] = True
+        self.disappeared[matched] = 0
+        self.disappeared[~matched] += 1
+
+        used_input = np.zeros(len(rects), dtype=bool)
+        used_input[cols] = True
+
+        self._keep(self.disappeared <= self.max_disappear)
+        self._register_many(input_centroids[~used_input], rects[~used_input])
         return self.objects
 
     def get_stationary(self, movement_threshold=15, stationary_seconds=300):
-        import math
-        stationary = []
-        for oid, cent in self.objects.items():
-            last = self.last_centroid.get(oid, cent)
-            dist = math.hypot(cent[0] - last[0], cent[1] - last[1])
-            if dist <= movement_threshold:
-                stationary.append(oid)
-            self.last_centroid[oid] = cent
+        if len(self.ids) == 0:
+            return []
+        moved = np.hypot(*(self.centroids - self.last_centroid).T.astype(np.float64))
+        stationary = [int(oid) for oid in self.ids[moved <= movement_threshold]]
+        self.last_centroid = self.centroids.copy()
         return stationary
 
     def get_oid_centroids(self):
         """Return copy of current objects mapping"""
-        return dict(self.objects)
+        return self.objects
 
 
 # --------------------- Group Manager (multi-group) ---------------------
+def grid_neighbor_pairs(pts, cell, query=None):
+    """
+    Pairs (i, j, squared distance) of points in (N,2) that fall in the same or
+    adjacent grid cells of size `cell` - a superset of the pairs closer than `cell`.
+    Points are hashed to cells and sorted once, neighbor cells are looked up with
+    searchsorted, so the cost is O(N log N + pairs).
+    query: optional indices - only pairs with i in query (j over all points, j != i);
+           by default every unordered pair is returned once
+    """
+    empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0))
+    n = len(pts)
+    if n < 2 or (query is not None and len(query) == 0):
+        return empty
+    cxy = np.floor(pts / cell).astype(np.int64)
+    cxy -= cxy.min(axis=0) - 1
+    stride = int(cxy[:, 1].max()) + 2
+    keys = cxy[:, 0] * stride + cxy[:, 1]
+    order = np.argsort(keys, kind="stable")
+    skeys = keys[order]
+
+    if query is None:
+        src, src_keys = order, skeys
+        offsets = ((0, 0), (0, 1), (1, -1), (1, 0), (1, 1))
+    else:
+        src = np.asarray(query, dtype=np.int64)
+        src_keys = keys[src]
+        offsets = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+
+    ii, jj = [], []
+    for dx, dy in offsets:
+        nkeys = src_keys + dx * stride + dy
+        lo = np.searchsorted(skeys, nkeys, side="left")
+        hi = np.searchsorted(skeys, nkeys, side="right")
+        if query is None and dx == 0 and dy == 0:
+            lo = np.arange(n) + 1  # same cell: only later points, no self/duplicate pairs
+        counts = np.maximum(hi - lo, 0)
+        total = int(counts.sum())
+        if total == 0:
+            continue
+        ii.append(np.repeat(src, counts))
+        starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        jj.append(order[np.arange(total) + starts])
+    if not ii:
+        return empty
+    i = np.concatenate(ii)
+    j = np.concatenate(jj)
+    if query is not None:
+        keep = i != j
+        i, j = i[keep], j[keep]
+    diff = pts[i] - pts[j]
+    return i, j, (diff ** 2).sum(axis=1)
+
+
 class GroupManager:
     """
     Maintain multiple groups (clusters) of people based on centroid proximity.
@@ -144,44 +235,40 @@ class GroupManager:
         self.vanish_timeout = vanish_timeout
         self._next_id = 0
         self.groups = {}  # gid -> group dict
+        self._last = None  # (oids, centroids, clusters) of the previous frame
 
     def _cluster_oids(self, oid_centroids):
         """
         oid_centroids: dict oid->(x,y)
         returns list of clusters: list of sets of oids
-        uses simple adjacency graph + DFS (distance threshold)
+        people within cluster_dist of each other (transitively) share a cluster;
+        neighbors come from a spatial grid, components from a sparse graph
         """
         oids = list(oid_centroids.keys())
         if not oids:
+            self._last = None
             return []
-
-        # build adjacency
-        adj = {oid: set() for oid in oids}
-        for i in range(len(oids)):
-            for j in range(i+1, len(oids)):
-                a = oids[i]; b = oids[j]
-                ax, ay = oid_centroids[a]; bx, by = oid_centroids[b]
-                if (ax - bx) ** 2 + (ay - by) ** 2 <= self.cluster_dist ** 2:
-                    adj[a].add(b); adj[b].add(a)
-
-        # connected components
-        visited = set()
-        clusters = []
-        for oid in oids:
-            if oid in visited:
-                continue
-            stack = [oid]
-            comp = set()
-            while stack:
-                v = stack.pop()
-                if v in visited:
-                    continue
-                visited.add(v)
-                comp.add(v)
-                for nb in adj[v]:
-                    if nb not in visited:
-                        stack.append(nb)
-            clusters.append(comp)
+        ids = np.asarray(oids)
+        pts = np.asarray([oid_centroids[o] for o in oids], dtype=np.float64).reshape(-1, 2)
+
+        # Nobody joined, left or moved (static scene, or the tracker holding
+        # centroids of people it lost): last frame's clusters still hold
+        last = self._last
+        if last is not None and np.array_equal(ids, last[0]) and np.array_equal(pts, last[1]):
+            return [set(c) for c in last[2]]
+
+        n = len(oids)
+        i, j, d2 = grid_neighbor_pairs(pts, self.cluster_dist)
+        linked = d2 <= self.cluster_dist ** 2
+        graph = coo_matrix((np.ones(int(linked.sum())), (i[linked], j[linked])), shape=(n, n))
+        _, labels = connected_components(graph, directed=False)
+
+        # clusters in order of their first member, as the old DFS produced them
+        order = np.argsort(labels, kind="stable")
+        bounds = np.flatnonzero(np.diff(labels[order])) + 1
+        groups = sorted(np.split(order, bounds), key=lambda g: g[0])
+        clusters = [set(ids[g].tolist()) for g in groups]
+        self._last = (ids, pts, [set(c) for c in clusters])
         return clusters
 
     def update(self, oid_centroids, oid_to_bbox):
@@ -290,12 +377,12 @@ def load_cfg():
         return yaml.safe_load(f)
 
 
+_evidence_writer = EvidenceWriter(workers=2, max_queue=32, jpeg_quality=90, max_side=1280)
+
+
 def save_screenshot(frame, outdir, prefix="alert"):
-    Path(outdir).mkdir(parents=True, exist_ok=True)
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    fn = Path(outdir) / f"{prefix}_{ts}.jpg"
-    cv2.imwrite(str(fn), frame)
-    return str(fn)
+    """Queue a screenshot for writing; returns a Future resolving to its path (see EvidenceWriter)"""
+    return _evidence_writer.start().submit(frame, outdir, prefix=prefix)
 
 
 def save_cropped_group(frame, bbox, outdir, prefix="group"):
@@ -312,34 +399,30 @@ def save_cropped_group(frame, bbox, outdir, prefix="group"):
     crop = frame[y1:y2, x1:x2]
     if crop.size == 0:
         return save_screenshot(frame, outdir, prefix=prefix)
-    Path(outdir).mkdir(parents=True, exist_ok=True)
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    fn = Path(outdir) / f"{prefix}_{ts}.jpg"
-    cv2.imwrite(str(fn), crop)
-    return str(fn)
+    return save_screenshot(crop, outdir, prefix=prefix)
 
 
-def post_alert(cfg, payload, image_path=None):
-    if not cfg.get("alerting", {}).get("enable_http", False):
-        return False
+_alert_dispatchers = {}  # endpoint -> AlertDispatcher
 
-    url = cfg["alerting"]["http_endpoint"]
-    headers = {}
 
-    if cfg["alerting"].get("api_key"):
-        headers["Authorization"] = f"Bearer {cfg['alerting']['api_key']}"
+def _alert_dispatcher(cfg):
+    alerting = cfg["alerting"]
+    url = alerting["http_endpoint"]
+    if url not in _alert_dispatchers:
+        # rate_limits in config.yaml: alert type -> [alerts per second, burst]
+        rate_limits = {k: tuple(v) for k, v in (alerting.get("rate_limits") or {}).items()}
+        retry_path = ROOT / cfg.get("output_dir", "outputs") / "alert_retry_queue.jsonl"
+        _alert_dispatchers[url] = AlertDispatcher(url, api_key=alerting.get("api_key") or None,
+                                                  retry_path=retry_path, rate_limits=rate_limits,
+                                                  max_queue=alerting.get("max_queue", 1000)).start()
+    return _alert_dispatchers[url]
 
-    files = {}
-    try:
-        if image_path and Path(image_path).exists():
-            files["image"] = open(image_path, "rb")
-            r = requests.post(url, data={"json": json.dumps(payload)}, headers=headers, files=files, timeout=8)
-        else:
-            r = requests.post(url, json=payload, headers=headers, timeout=8)
-        return r.status_code == 200
-    except Exception as e:
-        print("Failed to post alert:", e)
+
+def post_alert(cfg, payload, image_path=None):
+    """Queue an alert for HTTP delivery (sent, retried and rate limited by a background dispatcher)"""
+    if not cfg.get("alerting", {}).get("enable_http", False):
         return False
+    return _alert_dispatcher(cfg).submit(payload, image_path=image_path)
 
 
 # --------------------- EXCEL LOGGING ---------------------
@@ -349,31 +432,36 @@ def init_excel_log(excel_path):
         wb = Workbook()
         ws = wb.active
         ws.title = "Alerts"
-        ws.append(["Timestamp", "Detection Type", "Camera Source", "People Count", "Confidence", "Details"])
+        ws.append(EXCEL_HEADERS)
         wb.save(excel_path)
         print(f"✅ Excel log initialized at: {excel_path}")
     return excel_path
 
 
+EXCEL_HEADERS = ["Timestamp", "Detection Type", "Camera Source", "People Count", "Confidence", "Details"]
+_excel_reporters = {}  # excel_path -> ExcelReporter
+
+
+def _excel_reporter(excel_path):
+    key = str(excel_path)
+    if key not in _excel_reporters:
+        _excel_reporters[key] = ExcelReporter(excel_path, EXCEL_HEADERS, lambda row, n: row,
+                                              title="Alerts", interval=5.0).start()
+    return _excel_reporters[key]
+
+
 def log_to_excel(excel_path, timestamp, detection_type, camera_source, people_count=0, confidence=0.0, details=""):
-    """Log alert to Excel sheet"""
-    try:
-        wb = openpyxl.load_workbook(excel_path)
-        ws = wb.active
-        ws.append([
-            timestamp,
-            detection_type,
-            camera_source,
-            people_count,
-            f"{confidence:.2f}" if confidence > 0 else "",
-            details
-        ])
-        wb.save(excel_path)
-        print(f"📝 Logged to Excel: {detection_type} at {timestamp}")
-        return True
-    except Exception as e:
-        print(f"❌ Failed to log to Excel: {e}")
-        return False
+    """Queue an alert row for the Excel sheet (written in batches by a background reporter)"""
+    _excel_reporter(excel_path).enqueue([
+        timestamp,
+        detection_type,
+        camera_source,
+        people_count,
+        f"{confidence:.2f}" if confidence > 0 else "",
+        details
+    ])
+    print(f"📝 Queued Excel row: {detection_type} at {timestamp}")
+    return True
 
 
 # --------------------- HUD Drawing & UI helpers ---------------------
@@ -524,6 +612,12 @@ def play_weapon_sound_nonblocking():
 def main():
     cfg = load_cfg()
     device = cfg.get("device", "cpu")
+    # torch / onnx / openvino - the exported backends are CPU-only
+    infer_cfg = cfg.get("inference") or {}
+    backend = infer_cfg.get("backend", "torch")
+    backend_args = {"backend": backend, "threads": infer_cfg.get("intra_threads", 0),
+                    "inter_threads": infer_cfg.get("inter_threads", 1),
+                    "precision": infer_cfg.get("precision", "fp32")}
 
     print("\n🔄 Loading Models...\n")
     
@@ -531,7 +625,7 @@ def main():
     crowd_yolo = None
     crowd_path = cfg["models"].get("crowd", "")
     if Path(crowd_path).exists():
-        crowd_yolo = load_yolo(crowd_path, device=device)
+        crowd_yolo = load_yolo(crowd_path, device=device, **backend_args)
         print("✅ Crowd YOLO Loaded")
     else:
         print(f"⚠ Crowd model NOT found at: {crowd_path}")
@@ -540,16 +634,46 @@ def main():
     weapon_yolo = None
     weapon_path = cfg["models"].get("weapon", "")
     if Path(weapon_path).exists():
-        weapon_yolo = load_yolo(weapon_path, device=device)
+        weapon_yolo = load_yolo(weapon_path, device=device, **backend_args)
         print("✅ Weapon YOLO Loaded")
     else:
         print(f"⚠ Weapon model NOT found at: {weapon_path}")
 
+    # Optional merged person/weapon checkpoint - replaces the two models above with one pass
+    merged_yolo = None
+    merged_path = cfg["models"].get("merged", "")
+    if merged_path and Path(merged_path).exists():
+        merged_yolo = load_yolo(merged_path, device=device, **backend_args)
+        print("✅ Merged multi-class YOLO Loaded")
+
+    # Weapon model on crops/tiles around people instead of the downscaled full frame
+    roi_cfg = dict(cfg.get("weapon_roi") or {})
+    roi_mode = roi_cfg.pop("mode", "full")
+    weapon_roi = RegionInference(mode=roi_mode, device=device, **roi_cfg) if roi_mode != "full" else None
+    if weapon_roi is not None:
+        print(f"✅ Weapon inference on {roi_mode} regions")
+
+    # Crowd and weapon heads share one letterbox/normalize per frame
+    detection_threshold = max(0.2, cfg["thresholds"]["detection_conf"] - 0.1)
+    detector = MultiHeadDetector(
+        models={"crowd": crowd_yolo, "weapon": weapon_yolo},
+        merged=merged_yolo,
+        device=device,
+        head_args={
+            "crowd": {"conf": detection_threshold, "iou": 0.7, "max_det": 300},
+            "weapon": {"conf": cfg["thresholds"]["weapon_conf"]},
+        },
+        weapon_roi=weapon_roi,
+    )
+
     # Load Fight Classifier Model
     fight_model = None
     fight_path = cfg["models"].get("fight", "")
     if Path(fight_path).exists():
-        fight_model = FightClassifier(fight_path, device=device)
+        fight_model = FightClassifier(fight_path, device=device, backend=backend,
+                                      img_size=(cfg.get("model_imgsz") or {}).get("fight", 480),
+                                      threads=infer_cfg.get("intra_threads", 0),
+                                      precision=infer_cfg.get("precision", "fp32"))
         print("✅ Fight Classifier Loaded")
     else:
         print(f"⚠ Fight model NOT found at: {fight_path}")
@@ -558,8 +682,14 @@ def main():
     src = cfg.get("video_source", 0)
     cap = cv2.VideoCapture(src)
     
-    # Increase tracker stability - longer persistence, larger distance threshold
-    tracker = SimpleCentroidTracker(max_disappear=200, max_distance=300)
+    # Person tracker: "centroid" (Hungarian on centroids) or "bytetrack" (Kalman + two-stage IoU)
+    tracker_kind = cfg.get("tracker", "centroid")
+    if tracker_kind == "bytetrack":
+        tracker = SimpleTrackerWrapper(max_age=200, track_thresh=0.4, low_thresh=detection_threshold)
+        print("✅ ByteTrack tracker")
+    else:
+        # Increase tracker stability - longer persistence, larger distance threshold
+        tracker = SimpleCentroidTracker(max_disappear=200, max_distance=300)
 
     # Group manager: updated parameters for 5+ people for 2+ minutes (120 seconds)
     group_threshold = cfg.get("people", {}).get("group_threshold", 5)
@@ -605,31 +735,27 @@ def main():
         now = datetime.now()
         hour = now.hour
 
-        # Run YOLO detection (crowd model for person detection) - using lower threshold for better detection
-        detection_threshold = max(0.2, cfg["thresholds"]["detection_conf"] - 0.1)
-        results = crowd_yolo.predict(frame, imgsz=640, conf=detection_threshold, device=device, verbose=False) if crowd_yolo else []
+        # Run YOLO detection (crowd + weapon heads on one preprocessed tensor) - using lower threshold for better detection
+        dets = detector.detect(frame, heads=("crowd", "weapon"))
 
         persons = []
+        person_confs = []
         dets_all = []
         # We'll collect person rects to map to oids later
-        for r in results:
-            if not hasattr(r, "boxes"):
-                continue
-
-            boxes = r.boxes.xyxy.cpu().numpy()
-            confs = r.boxes.conf.cpu().numpy()
-            classes = r.boxes.cls.cpu().numpy().astype(int)
-            names = getattr(crowd_yolo, "names", {}) if crowd_yolo else {}
-
-            for box, conf, cls in zip(boxes, confs, classes):
+        if "crowd" in dets:
+            crowd_dets = dets["crowd"]
+            for box, conf, cls, label in zip(crowd_dets.boxes, crowd_dets.confs, crowd_dets.classes, crowd_dets.labels):
                 x1, y1, x2, y2 = map(int, box)
-                label = names.get(cls, str(cls))
                 dets_all.append((x1, y1, x2, y2, float(conf), label))
                 if label.lower() == "person" or cls == 0:
                     persons.append((x1, y1, x2, y2))
+                    person_confs.append(float(conf))
 
         # Update tracker with detected person rects
-        tracker.update(persons)
+        if tracker_kind == "bytetrack":
+            tracker.update([[*r, c, "person"] for r, c in zip(persons, person_confs)])
+        else:
+            tracker.update(persons)
         stationary = tracker.get_stationary()
         oid_centroids = tracker.get_oid_centroids()
         
@@ -643,7 +769,10 @@ def main():
             print(f"Frame {frame_count}: Raw={raw_person_count}, Smoothed={num_people} people")
 
         # Map oids -> rects (for cropping group images)
-        oid_to_rect = map_oids_to_rects(oid_centroids, persons)
+        if tracker_kind == "bytetrack":
+            oid_to_rect = tracker.get_oid_rects()
+        else:
+            oid_to_rect = map_oids_to_rects(oid_centroids, persons)
 
         # ----------------- GROUP CLUSTERING + MANAGEMENT --------------------
         completed_groups, active_groups = group_manager.update(oid_centroids, oid_to_rect)
@@ -693,30 +822,23 @@ def main():
         # ---------------- Weapon Detection ----------------
         weapon_boxes = []  # list of (x1,y1,x2,y2,conf)
         raw_weapon_count = 0
-        if weapon_yolo:
+        if "weapon" in dets:
             try:
-                wres = weapon_yolo.predict(frame, imgsz=640, conf=cfg["thresholds"]["weapon_conf"], device=device, verbose=False)
-                for r in wres:
-                    if not hasattr(r, "boxes"):
+                weapon_dets = dets["weapon"]
+                for box, conf in zip(weapon_dets.boxes, weapon_dets.confs):
+                    x1, y1, x2, y2 = map(int, box)
+                    raw_weapon_count += 1
+                    crop = frame[max(0,y1):y2, max(0,x1):x2]
+                    if crop.size == 0:
                         continue
-                    for box, conf, cls in zip(
-                        r.boxes.xyxy.cpu().numpy(),
-                        r.boxes.conf.cpu().numpy(),
-                        r.boxes.cls.cpu().numpy().astype(int)
-                    ):
-                        x1, y1, x2, y2 = map(int, box)
-                        raw_weapon_count += 1
-                        crop = frame[max(0,y1):y2, max(0,x1):x2]
-                        if crop.size == 0:
-                            continue
 
-                        # record weapon box for drawing
-                        weapon_boxes.append((x1,y1,x2,y2,float(conf)))
+                    # record weapon box for drawing
+                    weapon_boxes.append((x1,y1,x2,y2,float(conf)))
 
-                        # set HUD weapon state
-                        weapon_state["detected"] = True
-                        weapon_state["ts"] = time.time()
-                        weapon_state["conf"] = float(conf)
+                    # set HUD weapon state
+                    weapon_state["detected"] = True
+                    weapon_state["ts"] = time.time()
+                    weapon_state["conf"] = float(conf)
 
                 # Apply smoothing - only trigger alert if weapon detected in multiple consecutive frames
                 weapon_count_window.append(raw_weapon_count)
@@ -766,15 +888,10 @@ def main():
         fight_boxes = []  # list of (x1,y1,x2,y2,conf,oid) or (x1,y1,x2,y2,conf)
         if fight_model:
             try:
-                # we'll run the classifier per tracked object (use oid_to_rect mapping)
-                for oid, rect in oid_to_rect.items():
-                    if rect is None:
-                        continue
-                    x1,y1,x2,y2 = rect
-                    crop = frame[max(0,y1):y2, max(0,x1):x2]
-                    if crop.size == 0:
-                        continue
-                    prob = fight_model.predict_from_frame(crop)
+                # all tracked people in one batch (every skip_frames-th frame; unchanged crops reuse their score)
+                fight_scores = fight_model.score_tracks(frame, oid_to_rect)
+                for oid, prob in fight_scores.items():
+                    x1,y1,x2,y2 = oid_to_rect[oid]
                     if prob >= cfg["thresholds"]["fight_conf"]:
                         fight_boxes.append((x1,y1,x2,y2,float(prob), oid))
                         # HUD fight state
@@ -898,6 +1015,12 @@ def main():
 
     cap.release()
     cv2.destroyAllWindows()
+    # write any queued Excel rows before exiting
+    for reporter in _excel_reporters.values():
+        reporter.stop()
+    _evidence_writer.stop()
+    for dispatcher in _alert_dispatchers.values():
+        dispatcher.stop()
 
 
 # ---------------------
@@ -0,0 +1,221 @@
+# src/detector/model_registry.py
+# Shared, thread-safe home of the loaded detection models.
+#
+# Every model is loaded once: concurrent get() calls for the same name wait
+# on one per-model lock instead of loading the weights twice. preload() loads
+# and warms all models at startup (in parallel, optionally in the
+# background) so the first viewer doesn't pay for the load and the first
+# inference. A watcher thread polls the weight files; when one changes (and
+# has stopped changing), the new weights are loaded and warmed next to the old
+# model, then swapped in and announced to listeners - streams keep running on
+# the old model until the swap, so a reload costs no downtime.
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import torch
+
+from src.detector.yolo_loader import load_yolo
+
+
+# load states reported by status()
+MISSING, PENDING, LOADING, READY, ERROR = "missing", "pending", "loading", "ready", "error"
+
+
+def warmup_model(model, imgsz=640, runs=2):
+    """First inferences are slow (predictor setup, allocator, kernels) - do them now"""
+    dummy = torch.zeros(1, 3, imgsz, imgsz)
+    for _ in range(runs):
+        model.predict(dummy, verbose=False)
+
+
+class _Entry:
+    def __init__(self, name, path):
+        self.name = name
+        self.path = Path(path) if path else None
+        self.lock = threading.Lock()       # held while this model loads
+        self.model = None
+        self.state = PENDING if self.path is not None and self.path.exists() else MISSING
+        self.version = None                # (mtime, size) of the loaded weights
+        self.seen = None                   # (mtime, size) at the previous watcher poll
+        self.error = None
+        self.loaded_at = None
+        self.load_ms = None
+        self.warmup_ms = None
+        self.reloads = 0
+
+
+class ModelRegistry:
+    def __init__(self, paths, loader=load_yolo, loader_args=None, warmup=warmup_model,
+                 warmup_imgsz=640, poll_interval=5.0):
+        """
+        paths: model name -> weights path (e.g. the models: section of config.yaml)
+        loader: callable(path, **loader_args) -> model
+        warmup: callable(model, imgsz) run after each load (None = skip)
+        poll_interval: seconds between weight-file checks of the hot-reload watcher
+        """
+        self.loader = loader
+        self.loader_args = dict(loader_args or {})
+        self.warmup = warmup
+        self.warmup_imgsz = warmup_imgsz
+        self.poll_interval = poll_interval
+        self._entries = {name: _Entry(name, path) for name, path in paths.items()}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._running = False
+
+    @property
+    def names(self):
+        return list(self._entries)
+
+    # ----------------- access -----------------
+    def get(self, name):
+        """The current model (loading it on first use), or None if it can't be loaded"""
+        entry = self._entries.get(name)
+        if entry is None:
+            return None
+        if entry.model is None and entry.state in (PENDING, LOADING):
+            self._load(entry)
+        return entry.model
+
+    def add_listener(self, callback):
+        """callback(name, model) is called after a model is (re)loaded"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    # ----------------- loading -----------------
+    def _load(self, entry, reload=False):
+        """Load + warm one model under its lock; returns True if a new model was swapped in"""
+        with entry.lock:
+            if entry.path is None or not entry.path.exists():
+                entry.state = MISSING
+                return False
+            version = _file_version(entry.path)
+            if entry.model is not None and (not reload or version == entry.version):
+                return False  # someone else loaded it while we waited
+            if entry.model is None:
+                entry.state = LOADING
+            try:
+                t0 = time.time()
+                model = self.loader(str(entry.path), **self.loader_args)
+                t1 = time.time()
+                if self.warmup is not None:
+                    self.warmup(model, self.warmup_imgsz)
+                t2 = time.time()
+            except Exception as e:
+                entry.error = str(e)
+                # a failed reload keeps serving the previous model
+                entry.state = READY if entry.model is not None else ERROR
+                entry.version = version  # don't retry the same broken file on every poll
+                print(f"❌ Failed to load {entry.name} model from {entry.path}: {e}")
+                return False
+
+            previous = entry.model
+            entry.model = model
+            entry.version = version
+            entry.state = READY
+            entry.error = None
+            entry.loaded_at = time.time()
+            entry.load_ms = round((t1 - t0) * 1000, 1)
+            entry.warmup_ms = round((t2 - t1) * 1000, 1)
+            if previous is not None:
+                entry.reloads += 1
+        print(f"{'🔁 Reloaded' if previous is not None else '✅ Loaded'} {entry.name} model "
+              f"({entry.load_ms:.0f} ms load, {entry.warmup_ms:.0f} ms warm-up)")
+        with self._lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(entry.name, model)
+            except Exception as e:
+                print(f"⚠️ Model listener failed for {entry.name}: {e}")
+        return True
+
+    def preload(self, names=None, background=True, workers=None):
+        """
+        Load and warm the given models (default: all) in parallel.
+        background=True returns at once; otherwise waits until they are loaded.
+        """
+        entries = [self._entries[n] for n in (names or self._entries) if n in self._entries]
+        entries = [e for e in entries if e.state == PENDING]
+        if not entries:
+            return self
+
+        def run():
+            with ThreadPoolExecutor(max_workers=workers or len(entries), thread_name_prefix="model-load") as pool:
+                list(pool.map(self._load, entries))
+
+        if background:
+            threading.Thread(target=run, name="model-preload", daemon=True).start()
+        else:
+            run()
+        return self
+
+    # ----------------- hot reload -----------------
+    def start_watcher(self):
+        if self._running:
+            return self
+        self._running = True
+        self._watcher = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._watcher is not None:
+            self._watcher.join(self.poll_interval + 1.0)
+            self._watcher = None
+
+    def _watch(self):
+        while self._running:
+            time.sleep(self.poll_interval)
+            for entry in list(self._entries.values()):
+                try:
+                    self.check(entry.name)
+                except Exception as e:
+                    print(f"⚠️ Model watcher error for {entry.name}: {e}")
+
+    def check(self, name):
+        """
+        Reload `name` if its weight file changed since it was loaded and looks the
+        same as at the previous check (a copy in progress is not picked up half-written).
+        """
+        entry = self._entries[name]
+        if entry.path is None or not entry.path.exists():
+            return False
+        version = _file_version(entry.path)
+        stable = version == entry.seen
+        entry.seen = version
+        if entry.state == MISSING:
+            entry.state = PENDING  # weights appeared - load on next get() or below
+        if not stable or version == entry.version:
+            return False
+        return self._load(entry, reload=True)
+
+    # ----------------- health -----------------
+    def status(self):
+        out = {}
+        for name, e in self._entries.items():
+            out[name] = {
+                "state": e.state,
+                "path": str(e.path) if e.path else None,
+                "loaded_at": e.loaded_at,
+                "load_ms": e.load_ms,
+                "warmup_ms": e.warmup_ms,
+                "reloads": e.reloads,
+                "error": e.error,
+            }
+        return out
+
+    def is_ready(self, names=None):
+        """True when every model that has weights on disk is loaded (missing ones don't block)"""
+        states = [self._entries[n].state for n in (names or self._entries) if n in self._entries]
+        return all(s in (READY, MISSING) for s in states) and READY in states
+
+
+def _file_version(path):
+    st = Path(path).stat()
+    return (st.st_mtime_ns, st.st_size)
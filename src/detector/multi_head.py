@@ -0,0 +1,245 @@
+# src/detector/multi_head.py
+# One letterbox/normalize per frame shared by the crowd, weapon and fight heads.
+#
+# ultralytics re-runs LetterBox + normalisation inside every model.predict(frame).
+# Passing it a ready BCHW float tensor skips that work, so the frame is
+# preprocessed once and reused by every head. With a merged multi-class
+# checkpoint a single forward pass yields person, weapon and fight boxes.
+# With weapon_roi set (src/detector/roi_inference.py) the weapon model only
+# sees crops/tiles around the people found by the crowd head.
+
+from collections import namedtuple
+
+import cv2
+import numpy as np
+import torch
+
+
+# boxes: (N,4) xyxy in original frame pixels, confs: (N,), classes: (N,) int, labels: list of names
+Detections = namedtuple("Detections", ["boxes", "confs", "classes", "labels"])
+
+HEADS = ("crowd", "weapon", "fight")
+
+# Default per-head predict settings (same as the /api/video_feed loop)
+DEFAULT_HEAD_ARGS = {
+    "crowd": {"conf": 0.15, "iou": 0.4, "max_det": 100},
+    "weapon": {"conf": 0.2},
+    "fight": {"conf": 0.65},
+}
+
+# Which head a class of a merged checkpoint belongs to
+MERGED_CLASS_HEADS = {
+    "person": "crowd", "people": "crowd", "head": "crowd",
+    "weapon": "weapon", "gun": "weapon", "pistol": "weapon", "handgun": "weapon",
+    "rifle": "weapon", "knife": "weapon",
+    "fight": "fight", "fighting": "fight", "violence": "fight",
+}
+
+
+def empty_detections():
+    return Detections(np.zeros((0, 4), dtype=np.float32), np.zeros((0,), dtype=np.float32),
+                      np.zeros((0,), dtype=int), [])
+
+
+def letterbox(frame, imgsz=640, stride=32, auto=True, color=(114, 114, 114)):
+    """
+    Resize keeping aspect ratio and pad to imgsz x imgsz
+    (auto=True pads only up to the next stride multiple, like ultralytics' rect inference).
+    returns (padded_image, ratio, (pad_x, pad_y))
+    """
+    h, w = frame.shape[:2]
+    r = min(imgsz / h, imgsz / w)
+    nw, nh = int(round(w * r)), int(round(h * r))
+    dw, dh = imgsz - nw, imgsz - nh
+    if auto:
+        dw, dh = dw % stride, dh % stride
+    pad_x, pad_y = dw / 2, dh / 2
+    if (nw, nh) != (w, h):
+        frame = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    padded = cv2.copyMakeBorder(frame, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return padded, r, (left, top)
+
+
+def scale_boxes_back(boxes, ratio, pad, shape):
+    """Map xyxy boxes from letterboxed coords back to the original frame"""
+    if len(boxes) == 0:
+        return boxes
+    boxes = boxes.copy()
+    boxes[:, [0, 2]] -= pad[0]
+    boxes[:, [1, 3]] -= pad[1]
+    boxes /= ratio
+    h, w = shape[:2]
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, w)
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, h)
+    return boxes
+
+
+class MultiHeadDetector:
+    def __init__(self, models=None, merged=None, imgsz=640, device="cpu", head_args=None, weapon_roi=None):
+        """
+        models: dict head -> YOLO model (any may be None)
+        merged: optional YOLO model trained on person + weapon + fight classes;
+                when given it replaces the separate heads
+        head_args: per-head predict kwargs (conf, iou, max_det)
+        weapon_roi: optional RegionInference - run the weapon model on person crops/tiles
+                    instead of the whole letterboxed frame (ignored with a merged model)
+        """
+        self.models = {h: m for h, m in (models or {}).items() if m is not None}
+        self.merged = merged
+        self.imgsz = imgsz
+        self.device = device
+        self.weapon_roi = weapon_roi
+        self.head_args = {h: dict(DEFAULT_HEAD_ARGS.get(h, {})) for h in HEADS}
+        for h, args in (head_args or {}).items():
+            self.head_args.setdefault(h, {}).update(args)
+
+        self.merged_heads = self._merged_heads(merged)
+
+    @staticmethod
+    def _merged_heads(merged):
+        heads = {}
+        if merged is not None:
+            names = getattr(merged, "names", {}) or {}
+            for cid, name in names.items():
+                head = MERGED_CLASS_HEADS.get(str(name).lower())
+                if head:
+                    heads[int(cid)] = head
+        return heads
+
+    def set_model(self, head, model):
+        """Swap in a (re)loaded model for a head, or for 'merged'; in-flight calls finish on the old one"""
+        if head == "merged":
+            self.merged_heads, self.merged = self._merged_heads(model), model
+        elif model is None:
+            self.models.pop(head, None)
+        else:
+            self.models[head] = model
+
+    @property
+    def available_heads(self):
+        if self.merged is not None:
+            return set(self.merged_heads.values())
+        return set(self.models)
+
+    def has_head(self, head):
+        return head in self.available_heads
+
+    # ----------------- preprocessing -----------------
+    def preprocess(self, frames):
+        """
+        Letterbox + normalize a list of BGR frames once.
+        returns (tensor BCHW float in [0,1], metas list of (ratio, pad, shape))
+        """
+        imgs, metas = [], []
+        # Minimal (rectangular) padding is only possible when every frame has the same shape
+        auto = len({f.shape for f in frames}) == 1
+        for frame in frames:
+            img, ratio, pad = letterbox(frame, self.imgsz, auto=auto)
+            imgs.append(img)
+            metas.append((ratio, pad, frame.shape))
+        batch = np.stack(imgs)[..., ::-1].transpose(0, 3, 1, 2)  # BGR->RGB, BHWC->BCHW
+        tensor = torch.from_numpy(np.ascontiguousarray(batch)).to(self.device).float() / 255.0
+        return tensor, metas
+
+    # ----------------- inference -----------------
+    def detect(self, frame, heads=HEADS, person_boxes=None):
+        """Run the requested heads on one frame; returns dict head -> Detections"""
+        return self.detect_batch([frame], heads=heads, per_frame_boxes=[person_boxes])[0]
+
+    def detect_batch(self, frames, heads=HEADS, per_frame_heads=None, per_frame_boxes=None):
+        """
+        Run the requested heads on a list of frames; returns one dict per frame.
+        per_frame_heads: optional list (one entry per frame) of heads to run for that
+        frame - each model still runs once, on the sub-batch of frames that want it.
+        per_frame_boxes: optional list of person boxes per frame, used by weapon_roi on
+        frames where the crowd head does not run (None = no boxes known)
+        """
+        out = [{} for _ in frames]
+        if not frames:
+            return out
+        if per_frame_heads is None:
+            per_frame_heads = [heads] * len(frames)
+        available = self.available_heads
+        per_frame_heads = [[h for h in hs if h in available] for hs in per_frame_heads]
+        wanted = [h for h in HEADS if any(h in hs for hs in per_frame_heads)]
+        if not wanted:
+            return out
+
+        if self.merged is None and self.weapon_roi is not None and wanted == ["weapon"]:
+            tensor, metas = None, None  # only person crops reach the model
+        else:
+            tensor, metas = self.preprocess(frames)
+
+        if self.merged is not None:
+            # One forward pass at the lowest requested threshold, split per head afterwards
+            conf = min(self.head_args[h].get("conf", 0.25) for h in wanted)
+            max_det = sum(self.head_args[h].get("max_det", 300) for h in wanted)
+            results = self.merged.predict(tensor, conf=conf, max_det=max_det, verbose=False)
+            for i, r in enumerate(results):
+                boxes, confs, classes = self._unpack(r, metas[i])
+                for h in per_frame_heads[i]:
+                    keep = np.array([self.merged_heads.get(int(c)) == h for c in classes], dtype=bool)
+                    if len(keep):
+                        keep &= confs >= self.head_args[h].get("conf", 0.0)
+                    out[i][h] = self._detections(boxes[keep], confs[keep], classes[keep], self.merged)
+            return out
+
+        for h in wanted:
+            model = self.models[h]
+            idx = [i for i, hs in enumerate(per_frame_heads) if h in hs]
+            if h == "weapon" and self.weapon_roi is not None:
+                self._detect_weapon_rois(frames, idx, out, per_frame_boxes)
+                continue
+            sub = tensor if len(idx) == len(frames) else tensor[idx]
+            results = model.predict(sub, verbose=False, **self.head_args[h])
+            for i, r in zip(idx, results):
+                boxes, confs, classes = self._unpack(r, metas[i])
+                out[i][h] = self._detections(boxes, confs, classes, model)
+        return out
+
+    def _detect_weapon_rois(self, frames, idx, out, per_frame_boxes):
+        """
+        Weapon head on the people of each frame: this call's crowd boxes, else the
+        caller's person boxes. Frames with no idea where the people are (no crowd
+        model, no boxes given) fall back to the whole frame.
+        """
+        model = self.models["weapon"]
+        people, roi_idx, full_idx = [], [], []
+        for i in idx:
+            if "crowd" in out[i]:
+                boxes = out[i]["crowd"].boxes
+            elif per_frame_boxes is not None and per_frame_boxes[i] is not None:
+                boxes = [b[:4] for b in per_frame_boxes[i]]
+            else:
+                full_idx.append(i)
+                continue
+            roi_idx.append(i)
+            people.append(boxes)
+
+        if roi_idx:
+            found = self.weapon_roi.detect(model, [frames[i] for i in roi_idx], people, self.head_args["weapon"])
+            for i, (boxes, confs, classes) in zip(roi_idx, found):
+                out[i]["weapon"] = self._detections(boxes, confs, classes, model)
+        if full_idx:
+            tensor, metas = self.preprocess([frames[i] for i in full_idx])
+            results = model.predict(tensor, verbose=False, **self.head_args["weapon"])
+            for i, r, meta in zip(full_idx, results, metas):
+                out[i]["weapon"] = self._detections(*self._unpack(r, meta), model)
+
+    def _unpack(self, r, meta):
+        if not hasattr(r, "boxes") or r.boxes is None or len(r.boxes) == 0:
+            d = empty_detections()
+            return d.boxes, d.confs, d.classes
+        ratio, pad, shape = meta
+        boxes = scale_boxes_back(r.boxes.xyxy.cpu().numpy().astype(np.float32), ratio, pad, shape)
+        confs = r.boxes.conf.cpu().numpy()
+        classes = r.boxes.cls.cpu().numpy().astype(int)
+        return boxes, confs, classes
+
+    @staticmethod
+    def _detections(boxes, confs, classes, model):
+        names = getattr(model, "names", {}) or {}
+        labels = [names.get(int(c), str(int(c))) for c in classes]
+        return Detections(boxes, confs, classes, labels)
@@ -0,0 +1,230 @@
+# src/detector/roi_inference.py
+# Weapon inference restricted to the people in the frame.
+#
+# Letterboxing a 1080p/4K frame to 640 px shrinks a handgun to a few pixels.
+# Instead of raising imgsz for the whole frame, RegionInference runs the model
+# only where the crowd head found people:
+#   "persons" - one crop per (padded) person box, crops overlapping each other
+#               are merged, every crop is letterboxed to roi_imgsz and the
+#               crops of all frames go through the model as one batch. A crop
+#               larger than roi_imgsz (a close-up person, a merged group) is
+#               split into overlapping roi_imgsz tiles, so the model never sees
+#               the people below native resolution
+#   "tiles"   - SAHI-style overlapping tiles at native resolution; only the
+#               tiles touching a person box are run, with the pixels outside
+#               the person boxes greyed out
+# Boxes are mapped back to frame pixels and duplicates from overlapping
+# crops/tiles are removed with class-wise NMS. Pixels with no people in them
+# never reach the model.
+
+import numpy as np
+import torch
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from torchvision.ops import batched_nms
+
+from src.detector.multi_head import letterbox, scale_boxes_back
+
+
+ROI_MODES = ("full", "persons", "tiles")
+
+
+def expand_boxes(boxes, shape, pad_x=0.5, pad_y=0.2, min_side=64):
+    """
+    Grow xyxy person boxes by a fraction of their width/height on each side (a weapon
+    is held at arm's length) and clip them to the frame; returns int (N,4).
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    if len(boxes) == 0:
+        return np.zeros((0, 4), dtype=int)
+    h, w = shape[:2]
+    bw = np.maximum(boxes[:, 2] - boxes[:, 0], min_side)
+    bh = np.maximum(boxes[:, 3] - boxes[:, 1], min_side)
+    cx = (boxes[:, 0] + boxes[:, 2]) / 2
+    cy = (boxes[:, 1] + boxes[:, 3]) / 2
+    half_w = bw * (0.5 + pad_x)
+    half_h = bh * (0.5 + pad_y)
+    out = np.stack([cx - half_w, cy - half_h, cx + half_w, cy + half_h], axis=1)
+    out[:, [0, 2]] = out[:, [0, 2]].clip(0, w)
+    out[:, [1, 3]] = out[:, [1, 3]].clip(0, h)
+    return out.round().astype(int)
+
+
+def _intersections(a, b):
+    ix = np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0])
+    iy = np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1])
+    return np.clip(ix, 0, None) * np.clip(iy, 0, None)
+
+
+def merge_rois(rois, min_overlap=0.5):
+    """
+    Union regions that mostly cover each other (intersection >= min_overlap of the
+    smaller one), so people standing together are cropped once. Repeats until stable.
+    """
+    rois = np.asarray(rois).reshape(-1, 4)
+    while len(rois) > 1:
+        area = (rois[:, 2] - rois[:, 0]) * (rois[:, 3] - rois[:, 1])
+        inter = _intersections(rois, rois)
+        smaller = np.minimum(area[:, None], area[None, :])
+        i, j = np.nonzero(np.triu(inter >= min_overlap * np.maximum(smaller, 1), k=1))
+        if len(i) == 0:
+            break
+        n, labels = connected_components(coo_matrix((np.ones(len(i)), (i, j)), shape=(len(rois),) * 2),
+                                         directed=False)
+        merged = np.zeros((n, 4), dtype=rois.dtype)
+        merged[:, :2] = np.iinfo(np.int32).max
+        np.minimum.at(merged[:, 0], labels, rois[:, 0])
+        np.minimum.at(merged[:, 1], labels, rois[:, 1])
+        np.maximum.at(merged[:, 2], labels, rois[:, 2])
+        np.maximum.at(merged[:, 3], labels, rois[:, 3])
+        rois = merged
+    return rois
+
+
+def tile_grid(shape, tile=640, overlap=0.2):
+    """Overlapping tile x tile windows covering the frame (edge tiles are shifted inwards)"""
+    h, w = shape[:2]
+    step = max(1, int(tile * (1 - overlap)))
+
+    def starts(size):
+        if size <= tile:
+            return [0]
+        s = list(range(0, size - tile, step))
+        return s + [size - tile]
+
+    return np.array([(x, y, min(x + tile, w), min(y + tile, h))
+                     for y in starts(h) for x in starts(w)], dtype=int)
+
+
+def split_oversized(rois, size, overlap=0.2):
+    """Regions wider or taller than size x size replaced by overlapping size x size tiles of them"""
+    rois = np.asarray(rois).reshape(-1, 4)
+    big = ((rois[:, 2] - rois[:, 0]) > size) | ((rois[:, 3] - rois[:, 1]) > size)
+    if not big.any():
+        return rois
+    parts = [rois[~big]]
+    for x1, y1, x2, y2 in rois[big]:
+        parts.append(tile_grid((y2 - y1, x2 - x1), size, overlap) + np.array([x1, y1, x1, y1]))
+    return np.concatenate(parts).astype(rois.dtype)
+
+
+def tiles_with_people(tiles, rois):
+    """Tiles intersecting at least one region of interest"""
+    if len(tiles) == 0 or len(rois) == 0:
+        return tiles[:0]
+    return tiles[(_intersections(tiles, np.asarray(rois)) > 0).any(axis=1)]
+
+
+def nms_merge(boxes, confs, classes, iou=0.5):
+    """Class-wise NMS over boxes gathered from several crops/tiles"""
+    if len(boxes) < 2:
+        return boxes, confs, classes
+    keep = batched_nms(torch.from_numpy(boxes).float(), torch.from_numpy(confs).float(),
+                       torch.from_numpy(classes).long(), iou).numpy()
+    return boxes[keep], confs[keep], classes[keep]
+
+
+class RegionInference:
+    def __init__(self, mode="persons", roi_imgsz=320, tile=640, overlap=0.2, pad=(0.5, 0.2),
+                 max_batch=16, nms_iou=0.5, device="cpu"):
+        """
+        mode: "persons" (padded person crops) or "tiles" (overlapping tiles touching people)
+        roi_imgsz: size person crops are letterboxed to (tiles always run at `tile`);
+                   larger crops are split into roi_imgsz tiles rather than shrunk
+        overlap: overlap of neighbouring tiles (both modes)
+        pad: (x, y) padding around person boxes as a fraction of their width/height
+        max_batch: crops per model call
+        """
+        if mode not in ROI_MODES[1:]:
+            raise ValueError(f"unknown ROI mode {mode!r} (expected one of {ROI_MODES[1:]})")
+        self.mode = mode
+        self.roi_imgsz = roi_imgsz
+        self.tile = tile
+        self.overlap = overlap
+        self.pad = pad
+        self.max_batch = max(1, int(max_batch))
+        self.nms_iou = nms_iou
+        self.device = device
+        self.stats = {"frames": 0, "regions": 0, "model_calls": 0, "pixel_fraction": 0.0}
+
+    def regions(self, shape, person_boxes):
+        """Frame regions (xyxy int) the model should see for these people"""
+        rois = expand_boxes(person_boxes, shape, *self.pad)
+        if len(rois) == 0:
+            return rois
+        if self.mode == "tiles":
+            return tiles_with_people(tile_grid(shape, self.tile, self.overlap), rois)
+        return split_oversized(merge_rois(rois), self.roi_imgsz, self.overlap)
+
+    def detect(self, model, frames, person_boxes, predict_args=None):
+        """
+        Run `model` on the people regions of each frame.
+        person_boxes: one xyxy array per frame
+        returns one (boxes, confs, classes) tuple per frame, boxes in frame pixels
+        """
+        imgsz = self.tile if self.mode == "tiles" else self.roi_imgsz
+        crops, owners = [], []
+        for i, (frame, people) in enumerate(zip(frames, person_boxes)):
+            rois = expand_boxes(people, frame.shape, *self.pad)
+            regions = self.regions(frame.shape, people)
+            covered = np.zeros((frame.shape[0] // 8 + 1, frame.shape[1] // 8 + 1), dtype=bool)
+            for x1, y1, x2, y2 in regions:
+                if x2 - x1 < 2 or y2 - y1 < 2:
+                    continue
+                if self.mode == "tiles":
+                    crop = self._masked_tile(frame, (x1, y1, x2, y2), rois, covered)
+                else:
+                    crop = frame[y1:y2, x1:x2]
+                    covered[y1 // 8:(y2 + 7) // 8, x1 // 8:(x2 + 7) // 8] = True
+                img, ratio, pad = letterbox(crop, imgsz, auto=False)
+                crops.append(img)
+                owners.append((i, ratio, pad, (y2 - y1, x2 - x1), (x1, y1)))
+            self.stats["frames"] += 1
+            self.stats["regions"] += len(regions)
+            frac = covered.mean()  # share of the frame (at 1/8 resolution) the model saw
+            self.stats["pixel_fraction"] += (frac - self.stats["pixel_fraction"]) / self.stats["frames"]
+
+        found = [([], [], []) for _ in frames]
+        for start in range(0, len(crops), self.max_batch):
+            chunk = np.stack(crops[start:start + self.max_batch])[..., ::-1].transpose(0, 3, 1, 2)
+            tensor = torch.from_numpy(np.ascontiguousarray(chunk)).to(self.device).float() / 255.0
+            results = model.predict(tensor, verbose=False, **(predict_args or {}))
+            self.stats["model_calls"] += 1
+            for r, (i, ratio, pad, crop_shape, (ox, oy)) in zip(results, owners[start:start + self.max_batch]):
+                if not hasattr(r, "boxes") or r.boxes is None or len(r.boxes) == 0:
+                    continue
+                boxes = scale_boxes_back(r.boxes.xyxy.cpu().numpy().astype(np.float32), ratio, pad, crop_shape)
+                boxes[:, [0, 2]] += ox
+                boxes[:, [1, 3]] += oy
+                found[i][0].append(boxes)
+                found[i][1].append(r.boxes.conf.cpu().numpy().astype(np.float32))
+                found[i][2].append(r.boxes.cls.cpu().numpy().astype(int))
+
+        out = []
+        for boxes, confs, classes in found:
+            if not boxes:
+                out.append((np.zeros((0, 4), dtype=np.float32), np.zeros((0,), dtype=np.float32),
+                            np.zeros((0,), dtype=int)))
+                continue
+            out.append(nms_merge(np.concatenate(boxes), np.concatenate(confs), np.concatenate(classes),
+                                 self.nms_iou))
+        return out
+
+    @staticmethod
+    def _masked_tile(frame, tile, rois, covered):
+        """Copy of a tile with everything outside the people regions greyed out"""
+        x1, y1, x2, y2 = tile
+        out = np.full((y2 - y1, x2 - x1, 3), 114, dtype=frame.dtype)
+        for rx1, ry1, rx2, ry2 in rois:
+            ax1, ay1, ax2, ay2 = max(x1, rx1), max(y1, ry1), min(x2, rx2), min(y2, ry2)
+            if ax2 > ax1 and ay2 > ay1:
+                out[ay1 - y1:ay2 - y1, ax1 - x1:ax2 - x1] = frame[ay1:ay2, ax1:ax2]
+                covered[ay1 // 8:(ay2 + 7) // 8, ax1 // 8:(ax2 + 7) // 8] = True
+        return out
+
+    def get_stats(self):
+        out = dict(self.stats)
+        out["pixel_fraction"] = round(out["pixel_fraction"], 3)
+        out["regions_per_frame"] = round(out["regions"] / max(1, out["frames"]), 2)
+        out["mode"] = self.mode
+        return out
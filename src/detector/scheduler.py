@@ -0,0 +1,118 @@
+# src/detector/scheduler.py
+# Motion-gated model scheduling for one camera.
+#
+# Fixed cameras spend long stretches looking at a static scene. MotionGate
+# compares a small blurred greyscale copy of each frame with a running-average
+# background, so slow walkers still register. HeadScheduler uses it to pick
+# which heads run on a frame. Each head has a (min, max) cadence in frames:
+# while there is motion or something was just detected it runs every `min`
+# frames, on idle frames only every `max` frames (the caller reuses the last
+# results in between). The switch back to the fast cadence happens on the very
+# frame motion or a detection shows up. Cadence, hold time and motion
+# threshold come from the `scheduler:` section of config.yaml
+# (src/detector/factory.py).
+
+import cv2
+import numpy as np
+
+
+DEFAULT_CADENCE = {
+    "crowd": (1, 15),
+    "weapon": (2, 30),
+    "fight": (1, 15),
+}
+
+
+class MotionGate:
+    def __init__(self, width=160, blur=5, pixel_thresh=20, min_area=0.002, adapt=0.05):
+        """
+        width: frames are shrunk to this width before differencing
+        pixel_thresh: grey-level difference from the background for a pixel to count as moving
+        min_area: fraction of moving pixels that makes the frame 'moving'
+        adapt: how fast the background follows the scene (running average weight)
+        """
+        self.width = width
+        self.blur = blur
+        self.pixel_thresh = pixel_thresh
+        self.min_area = min_area
+        self.adapt = adapt
+        self._background = None
+        self.last_score = 0.0
+
+    def _small(self, frame):
+        h, w = frame.shape[:2]
+        size = (self.width, max(1, int(h * self.width / w)))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (self.blur, self.blur), 0).astype(np.float32)
+
+    def update(self, frame):
+        """Returns True if the frame differs enough from the (slowly adapting) background"""
+        small = self._small(frame)
+        if self._background is None or self._background.shape != small.shape:
+            self._background = small
+            self.last_score = 1.0
+            return True
+        moving = cv2.absdiff(small, self._background) > self.pixel_thresh
+        cv2.accumulateWeighted(small, self._background, self.adapt)
+        self.last_score = float(np.count_nonzero(moving)) / moving.size
+        return self.last_score >= self.min_area
+
+
+class HeadScheduler:
+    def __init__(self, cadence=None, gate=None, hold_frames=30, heads=None):
+        """
+        cadence: head -> (min, max) frames between runs (merged over DEFAULT_CADENCE)
+        gate: MotionGate (a default one is created)
+        hold_frames: frames to stay on the fast cadence after the last motion/detection
+        heads: heads to schedule (default: every head in cadence)
+        """
+        self.cadence = dict(DEFAULT_CADENCE)
+        self.cadence.update(cadence or {})
+        self.heads = list(heads) if heads is not None else list(self.cadence)
+        self.gate = gate or MotionGate()
+        self.hold_frames = hold_frames
+
+        self._last_run = {h: None for h in self.heads}
+        self._active_until = -1
+        self.frames = 0
+        self.active_frames = 0
+        self.runs = {h: 0 for h in self.heads}
+        self.skipped = {h: 0 for h in self.heads}
+
+    def plan(self, frame, frame_idx):
+        """Heads to run on this frame"""
+        self.frames += 1
+        if self.gate.update(frame):
+            self._active_until = frame_idx + self.hold_frames
+        active = frame_idx <= self._active_until
+        self.active_frames += active
+
+        heads = []
+        for h in self.heads:
+            lo, hi = self.cadence[h]
+            every = lo if active else hi
+            last = self._last_run[h]
+            if last is None or frame_idx - last >= every or frame_idx < last:
+                heads.append(h)
+                self._last_run[h] = frame_idx
+                self.runs[h] += 1
+            else:
+                self.skipped[h] += 1
+        return heads
+
+    def observe(self, frame_idx, detected):
+        """Report whether this frame's results had something worth watching closely"""
+        if detected:
+            self._active_until = max(self._active_until, frame_idx + self.hold_frames)
+
+    def get_stats(self):
+        return {
+            "frames": self.frames,
+            "active_frames": self.active_frames,
+            "motion_score": round(self.gate.last_score, 4),
+            "heads": {h: {"runs": self.runs[h], "skipped": self.skipped[h],
+                          "skip_rate": round(self.skipped[h] / max(1, self.frames), 3)}
+                      for h in self.heads},
+        }
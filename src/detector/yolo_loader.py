@@ -2,10 +2,30 @@
 from ultralytics import YOLO
 from pathlib import Path
 
-def load_yolo(path, device="cpu"):
+from src.detector.backends import BACKENDS, load_exported
+
+def load_yolo(path, device="cpu", backend="torch", threads=0, inter_threads=1, imgsz=640, cache_dir=None,
+              precision="fp32"):
+    """
+    backend: "torch" (ultralytics YOLO), "onnx" (ONNX Runtime) or "openvino".
+    The exported backends are CPU-only; .pt weights are exported once and cached
+    by weight hash (src/detector/backends.py). precision="int8" picks the INT8
+    model promoted by src/utils/quantize.py. If the runtime is missing or the
+    export fails, the PyTorch model is used instead.
+    """
     p = Path(path)
     if not p.exists():
         raise FileNotFoundError(f"YOLO model not found: {p}")
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend {backend!r} (expected one of {BACKENDS})")
+    if backend != "torch":
+        try:
+            model = load_exported(p, backend, threads=threads, inter_threads=inter_threads,
+                                  imgsz=imgsz, cache_dir=cache_dir, precision=precision)
+            print(f"✅ {p.name} running on {backend}")
+            return model
+        except Exception as e:
+            print(f"⚠ {backend} backend unavailable for {p.name} ({e}) - using PyTorch")
     model = YOLO(str(p))
     # set device if needed (ultralytics chooses automatically)
     model.to(device)
@@ -0,0 +1,195 @@
+# src/storage/alert_store.py
+# Indexed store for alerts posted to /api/alerts (SQLite, stdlib only).
+#
+# Alerts get monotonically increasing integer IDs from SQLite (AUTOINCREMENT,
+# never reused), so an insert is one indexed row write no matter how many
+# alerts exist, and concurrent posts can't collide on a name. Lists are
+# newest first and paginated with an ID cursor ("older than id N"), so every
+# page - the first or the ten-thousandth - is an index range scan of `limit`
+# rows. Type and camera filters have (column, id) indexes. Time filters are
+# plain predicates on the receive time (or the alert's own timestamp) over
+# (time, id) indexes - the receive time does not always grow with the ID
+# (imported legacy files carry their mtime, the wall clock can step back).
+# A time-bounded query is ordered and paginated on (time, id) so each page
+# is still an index range scan; the cursor stays the last row's ID.
+
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    received    REAL NOT NULL,      -- epoch seconds when the server stored it
+    ts          REAL,               -- epoch seconds of the alert's own 'timestamp' (if any)
+    type        TEXT,
+    camera      TEXT,
+    severity    TEXT,
+    data        TEXT NOT NULL       -- the posted JSON
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_received ON alerts (received, id);
+CREATE INDEX IF NOT EXISTS idx_alerts_ts ON alerts (ts, id);
+CREATE INDEX IF NOT EXISTS idx_alerts_type ON alerts (type, id);
+CREATE INDEX IF NOT EXISTS idx_alerts_camera ON alerts (camera, id);
+CREATE INDEX IF NOT EXISTS idx_alerts_camera_type ON alerts (camera, type, id);
+"""
+
+MAX_PAGE = 500
+
+
+def parse_time(value):
+    """Epoch seconds from an ISO string / epoch number; None if missing or unparseable"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class AlertStore:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        """One connection per thread (Flask serves requests on several threads)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            # WAL: readers never wait for the writer; NORMAL sync is durable across app crashes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ----------------- writes -----------------
+    def add(self, alert, received=None):
+        """Store one alert dict; returns its new ID"""
+        return self.add_many([alert], received)[0]
+
+    def add_many(self, alerts, received=None):
+        """Store alerts in one transaction; returns their IDs in order"""
+        now = received if received is not None else time.time()
+        rows = [(now, parse_time(a.get("timestamp")), _str(a.get("type")), _str(a.get("camera")),
+                 _str(a.get("severity")), json.dumps(a)) for a in alerts]
+        conn = self._conn()
+        with self._write_lock, conn:
+            ids = []
+            for row in rows:
+                cur = conn.execute("INSERT INTO alerts (received, ts, type, camera, severity, data) "
+                                   "VALUES (?, ?, ?, ?, ?, ?)", row)
+                ids.append(cur.lastrowid)
+        return ids
+
+    def import_legacy(self, directory):
+        """
+        One-off import of the old alerts/alert_<N>.json files into an empty store,
+        keeping N as the ID. Returns the number imported.
+        """
+        conn = self._conn()
+        if conn.execute("SELECT 1 FROM alerts LIMIT 1").fetchone() is not None:
+            return 0
+        rows = []
+        for p in Path(directory).glob("alert_*.json"):
+            try:
+                n = int(p.stem.split("_", 1)[1])
+                alert = json.loads(p.read_text())
+            except (ValueError, OSError):
+                continue
+            if not isinstance(alert, dict):
+                alert = {"data": alert}
+            rows.append((n, p.stat().st_mtime, parse_time(alert.get("timestamp")), _str(alert.get("type")),
+                         _str(alert.get("camera")), _str(alert.get("severity")), json.dumps(alert)))
+        rows.sort()
+        with self._write_lock, conn:
+            conn.executemany("INSERT INTO alerts (id, received, ts, type, camera, severity, data) "
+                             "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    # ----------------- reads -----------------
+    def get(self, alert_id):
+        row = self._conn().execute("SELECT * FROM alerts WHERE id = ?", (int(alert_id),)).fetchone()
+        return _record(row) if row is not None else None
+
+    def query(self, limit=50, cursor=None, type=None, camera=None, severity=None, since=None, until=None,
+              ts_since=None, ts_until=None):
+        """
+        Newest-first page of alerts: (alerts, next_cursor). Pass next_cursor back as
+        `cursor` for the following (older) page; it is None on the last page.
+        since / until: receive-time bounds (epoch seconds or ISO strings); with either
+            set, pages are newest-received first
+        ts_since / ts_until: bounds on the alert's own 'timestamp'; pages are ordered by
+            it when no receive-time bound is given
+        """
+        limit = max(1, min(int(limit), MAX_PAGE))
+        conn = self._conn()
+        where, args = [], []
+        bounds = (("received >= ?", since), ("received < ?", until), ("ts >= ?", ts_since), ("ts < ?", ts_until))
+        for clause, value in bounds:
+            value = parse_time(value)
+            if value is not None:
+                where.append(clause)
+                args.append(value)
+        # a time-bounded query walks its (time, id) index newest first
+        order = next((c.split()[0] for c in where), None)
+        if cursor is not None:
+            if order is not None:
+                row = conn.execute(f"SELECT {order} FROM alerts WHERE id = ?", (int(cursor),)).fetchone()
+                if row is None:
+                    return [], None
+                where.append(f"({order}, id) < (?, ?)")
+                args.extend([row[0], int(cursor)])
+            else:
+                where.append("id < ?")
+                args.append(int(cursor))
+        for column, value in (("type", type), ("camera", camera), ("severity", severity)):
+            if value:
+                # unary + keeps SQLite on the time index instead of a (column, id) one plus a sort
+                where.append(f"{'+' if order else ''}{column} = ?")
+                args.append(value)
+        sql = "SELECT * FROM alerts"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order} DESC, id DESC LIMIT ?" if order else " ORDER BY id DESC LIMIT ?"
+        rows = conn.execute(sql, args + [limit + 1]).fetchall()
+        more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = rows[-1]["id"] if more else None
+        return [_record(r) for r in rows], next_cursor
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM alerts").fetchone()[0]
+
+    def last_id(self):
+        row = self._conn().execute("SELECT MAX(id) FROM alerts").fetchone()
+        return row[0] or 0
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def _str(value):
+    return None if value is None else str(value)
+
+
+def _record(row):
+    alert = json.loads(row["data"])
+    return {"id": row["id"], "received": datetime.fromtimestamp(row["received"]).isoformat(), "alert": alert}
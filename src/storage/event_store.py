@@ -0,0 +1,180 @@
+# src/storage/event_store.py
+# Append-only detection event log (newline-delimited JSON, one file per day).
+#
+# append() only enqueues; a single background writer drains the queue and
+# appends whole batches to detections/YYYY-MM-DD.jsonl, so the per-event cost
+# stays constant through the day and concurrent cameras never race on the file.
+# Legacy detections/YYYY-MM-DD.json arrays are still read.
+
+import json
+import queue
+import threading
+from datetime import datetime
+from pathlib import Path
+
+
+class DetectionEventStore:
+    def __init__(self, directory, flush_interval=0.5, max_batch=1000):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._q = queue.Queue()
+        self._thread = None
+        self._running = False
+        self._listeners = []
+        self._files = {}  # date -> open append handle
+        self.written = 0
+
+    # ----------------- lifecycle -----------------
+    def start(self):
+        if self._running:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._writer, name="event-store-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        if not self._running:
+            return
+        self._running = False
+        self._q.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._close_files()
+
+    def add_listener(self, fn):
+        """fn(events) is called from the writer thread after every flushed batch"""
+        self._listeners.append(fn)
+
+    # ----------------- writes -----------------
+    def append(self, event):
+        """
+        Queue one event dict (must carry an ISO 'timestamp'); never blocks on disk.
+        Falls back to a synchronous write when the writer is not running.
+        """
+        if self._running:
+            self._q.put(event)
+        else:
+            self._write_batch([event])
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far is on disk"""
+        if not self._running:
+            return True
+        done = threading.Event()
+        self._q.put(done)
+        return done.wait(timeout)
+
+    def _writer(self):
+        while True:
+            try:
+                item = self._q.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch, markers, stop = [], [], False
+            # Drain whatever else is queued into the same batch
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+                if len(batch) >= self.max_batch:
+                    break
+                try:
+                    item = self._q.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    print(f"❌ Failed to write detection events: {e}")
+            for m in markers:
+                m.set()
+            if stop:
+                break
+
+    def _write_batch(self, events):
+        by_date = {}
+        for ev in events:
+            by_date.setdefault(str(ev.get("timestamp", ""))[:10], []).append(ev)
+        for date_str, evs in by_date.items():
+            f = self._file_for(date_str)
+            f.write("".join(json.dumps(ev) + "\n" for ev in evs))
+            f.flush()
+        self.written += len(events)
+        for fn in self._listeners:
+            try:
+                fn(events)
+            except Exception as e:
+                print(f"⚠️ Event listener failed: {e}")
+
+    def _file_for(self, date_str):
+        f = self._files.get(date_str)
+        if f is None:
+            # Only keep today's (and maybe yesterday's) handles open
+            if len(self._files) >= 2:
+                self._close_files()
+            f = open(self.dir / f"{date_str}.jsonl", "a", encoding="utf-8")
+            self._files[date_str] = f
+        return f
+
+    def _close_files(self):
+        for f in self._files.values():
+            try:
+                f.close()
+            except Exception:
+                pass
+        self._files = {}
+
+    # ----------------- reads -----------------
+    def dates(self):
+        """All dates (YYYY-MM-DD) that have events, sorted"""
+        return sorted({p.stem for p in self.dir.glob("*.jsonl")} | {p.stem for p in self.dir.glob("*.json")})
+
+    def read_day(self, date_str, filter_type=None):
+        events = []
+        legacy = self.dir / f"{date_str}.json"
+        if legacy.exists():
+            with open(legacy, "r") as f:
+                events.extend(json.load(f))
+        log = self.dir / f"{date_str}.jsonl"
+        if log.exists():
+            with open(log, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        # a torn last line from a crash - skip it
+                        continue
+        if filter_type:
+            events = [d for d in events if d.get("type") == filter_type]
+        return events
+
+    def read_range(self, start_date=None, end_date=None, filter_type=None):
+        out = []
+        for date_str in self.dates():
+            if (not start_date or date_str >= start_date) and (not end_date or date_str <= end_date):
+                out.extend(self.read_day(date_str, filter_type))
+        return out
+
+
+def make_event(camera_id, detection_type, count=0, confidence=0.0, timestamp=None, screenshot=None):
+    """Detection record in the shape served by /api/detections"""
+    event = {
+        "timestamp": timestamp or datetime.now().isoformat(),
+        "camera": camera_id,
+        "type": detection_type,
+        "count": count,
+        "confidence": confidence,
+    }
+    if screenshot:
+        event["screenshot"] = screenshot
+    return event
@@ -0,0 +1,124 @@
+# src/storage/evidence_writer.py
+# Background JPEG writer for alert screenshots / evidence crops.
+#
+# cv2.imwrite on a full-resolution frame costs 10 ms or more of JPEG encoding
+# plus the disk write. EvidenceWriter takes a private copy of the image and
+# downscales (to max_side), encodes and writes it on a small worker pool;
+# submit() returns a Future with the final path. File names carry a hash of
+# the encoded bytes, so two alerts in the same second never overwrite each
+# other and re-saving an identical image is a no-op.
+
+import hashlib
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+
+
+def evidence_filename(prefix, data, when=None):
+    """<prefix>_<YYYYmmdd_HHMMSS>_<first 12 hex chars of sha1(data)>.jpg"""
+    stamp = (when or datetime.now()).strftime("%Y%m%d_%H%M%S")
+    return f"{prefix}_{stamp}_{hashlib.sha1(data).hexdigest()[:12]}.jpg"
+
+
+def downscale(image, max_side):
+    """Shrink image so its longer side is at most max_side (returns a new array or the input)"""
+    if not max_side:
+        return image
+    h, w = image.shape[:2]
+    scale = max_side / float(max(h, w))
+    if scale >= 1.0:
+        return image
+    return cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+
+def write_evidence(image, outdir, prefix="alert", jpeg_quality=90, when=None):
+    """Encode and write one image synchronously; returns the path (content-addressed name)"""
+    ok, buf = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, int(jpeg_quality)])
+    if not ok:
+        raise RuntimeError("JPEG encoding failed")
+    data = buf.tobytes()
+    outdir = Path(outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    path = outdir / evidence_filename(prefix, data, when)
+    if not path.exists():
+        tmp = path.with_suffix(".part")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+    return str(path)
+
+
+class EvidenceWriter:
+    def __init__(self, workers=2, max_queue=32, jpeg_quality=90, max_side=1280):
+        """
+        max_queue: images waiting or being encoded; submit() drops new ones beyond this
+        max_side: downscale so the longer side is at most this many pixels (None = keep size)
+        """
+        self.workers = workers
+        self.max_queue = max_queue
+        self.jpeg_quality = jpeg_quality
+        self.max_side = max_side
+        self._pool = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.stats = {"submitted": 0, "written": 0, "dropped": 0, "errors": 0, "avg_write_ms": 0.0}
+
+    # ----------------- lifecycle -----------------
+    def start(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="evidence")
+        return self
+
+    def stop(self, wait=True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+    # ----------------- producers -----------------
+    def submit(self, image, outdir, prefix="alert", jpeg_quality=None, max_side=None, copy=True):
+        """
+        Queue an image for writing; returns a Future resolving to the saved path
+        (None if the queue was full or the write failed). The image is copied
+        here, so the caller may keep drawing on it; copy=False hands over an
+        image the caller no longer touches (e.g. an alert snapshot) without that copy.
+        """
+        fut = Future()
+        with self._lock:
+            self.stats["submitted"] += 1
+            if self._pool is None or self._pending >= self.max_queue:
+                self.stats["dropped"] += 1
+                fut.set_result(None)
+                return fut
+            self._pending += 1
+
+        # the only work on the caller's thread: at most one memcpy of the image
+        self._pool.submit(self._write, fut, image.copy() if copy else image, outdir, prefix,
+                          jpeg_quality or self.jpeg_quality, max_side or self.max_side, datetime.now())
+        return fut
+
+    def _write(self, fut, image, outdir, prefix, quality, max_side, when):
+        t0 = time.time()
+        try:
+            path = write_evidence(downscale(image, max_side), outdir, prefix, quality, when)
+        except Exception as e:
+            print(f"❌ Error saving evidence image: {e}")
+            path = None
+        ms = (time.time() - t0) * 1000
+        with self._lock:
+            self._pending -= 1
+            if path is None:
+                self.stats["errors"] += 1
+            else:
+                self.stats["written"] += 1
+                self.stats["avg_write_ms"] = round(0.9 * self.stats["avg_write_ms"] + 0.1 * ms
+                                                   if self.stats["written"] > 1 else ms, 1)
+        fut.set_result(path)
+
+    def get_stats(self):
+        with self._lock:
+            out = dict(self.stats)
+            out["pending"] = self._pending
+        return out
@@ -0,0 +1,213 @@
+# src/storage/excel_reporter.py
+# Background Excel reporting.
+#
+# openpyxl has to load and re-save the whole workbook for every change, which
+# takes hundreds of milliseconds once the sheet grows. ExcelReporter collects
+# rows in memory and writes them in one load/save per interval on its own
+# thread, so the frame loop never touches the spreadsheet. If saving keeps
+# failing (workbook open in Excel, disk full) the backlog is capped at
+# max_pending rows; the oldest are dropped and counted in get_stats().
+
+import io
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import openpyxl
+from openpyxl.styles import Font, Alignment, PatternFill
+
+
+class ExcelReporter:
+    def __init__(self, excel_path, headers, to_row, title="Alerts", interval=5.0,
+                 style_header=None, style_row=None, max_pending=10000):
+        """
+        headers: header row written when the workbook is created
+        to_row: callable(record, alert_num) -> list of cell values
+        style_header: optional callable(ws) applied to a new sheet
+        style_row: optional callable(ws, row_num, record) applied to each appended row
+        max_pending: rows kept while the workbook can't be saved; older ones are dropped
+        """
+        self.excel_path = Path(excel_path)
+        self.headers = headers
+        self.to_row = to_row
+        self.title = title
+        self.interval = interval
+        self.style_header = style_header
+        self.style_row = style_row
+        self.max_pending = max_pending
+
+        self._pending = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.last_flush_ms = 0.0
+
+    # ----------------- lifecycle -----------------
+    def start(self):
+        if self._running:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name=f"excel-{self.excel_path.stem}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=10.0):
+        if not self._running:
+            return
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+    # ----------------- producers -----------------
+    def enqueue(self, record):
+        """Queue one row (never touches the workbook)"""
+        with self._lock:
+            self._pending.append(record)
+            self._trim()
+
+    def enqueue_many(self, records):
+        with self._lock:
+            self._pending.extend(records)
+            self._trim()
+
+    def _trim(self):
+        """Drop the oldest rows beyond max_pending (lock held)"""
+        excess = len(self._pending) - self.max_pending
+        if excess > 0:
+            del self._pending[:excess]
+            self.rows_dropped += excess
+
+    # ----------------- writer -----------------
+    def _loop(self):
+        while self._running:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Write every pending row with a single load/save"""
+        with self._lock:
+            records, self._pending = self._pending, []
+        if not records:
+            return 0
+        with self._write_lock:
+            t0 = time.time()
+            try:
+                wb, ws = self._open()
+                for rec in records:
+                    row_num = ws.max_row + 1
+                    ws.append(self.to_row(rec, row_num - 1))
+                    if self.style_row:
+                        self.style_row(ws, row_num, rec)
+                wb.save(self.excel_path)
+            except Exception as e:
+                print(f"❌ Error saving to Excel: {e}")
+                # keep the rows for the next attempt
+                with self._lock:
+                    self._pending = records + self._pending
+                    self._trim()
+                    if self.rows_dropped:
+                        print(f"⚠ Excel backlog capped at {self.max_pending} rows - {self.rows_dropped} oldest dropped so far")
+                return 0
+            self.rows_written += len(records)
+            self.last_flush_ms = (time.time() - t0) * 1000
+        print(f"📝 Wrote {len(records)} row(s) to {self.excel_path.name}")
+        return len(records)
+
+    def _open(self):
+        if self.excel_path.exists():
+            wb = openpyxl.load_workbook(self.excel_path)
+            return wb, wb.active
+        return new_workbook(self.headers, self.title, self.style_header)
+
+    def get_stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {"pending": pending, "rows_written": self.rows_written, "rows_dropped": self.rows_dropped,
+                "last_flush_ms": round(self.last_flush_ms, 1)}
+
+
+def new_workbook(headers, title, style_header=None):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = title
+    ws.append(headers)
+    if style_header:
+        style_header(ws)
+    return wb, ws
+
+
+# --------------------- Detection alert sheet (src/app.py) ---------------------
+ALERT_HEADERS = ["#", "Date", "Time", "Camera", "Detection Type", "Confidence", "Screenshot"]
+
+# Color code by detection type
+ALERT_TYPE_COLORS = {
+    'weapon': 'FFCCCC',  # Light red
+    'fight': 'FFE6CC',   # Light orange
+    'crowd': 'FFFFCC'    # Light yellow
+}
+
+
+def style_alert_header(ws):
+    header_fill = PatternFill(start_color="1F4788", end_color="1F4788", fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF", size=12)
+    for col_num in range(1, len(ALERT_HEADERS) + 1):
+        cell = ws.cell(row=1, column=col_num)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = Alignment(horizontal='center', vertical='center')
+
+    # Set column widths
+    for col, width in zip("ABCDEFG", (8, 15, 12, 12, 18, 12, 25)):
+        ws.column_dimensions[col].width = width
+
+
+def alert_row(event, alert_num):
+    """Detection event (see event_store.make_event) -> alert sheet row"""
+    try:
+        ts = datetime.fromisoformat(str(event.get('timestamp')))
+    except ValueError:
+        ts = datetime.now()
+    confidence = float(event.get('confidence') or 0.0)
+    return [
+        alert_num,
+        ts.strftime('%Y-%m-%d'),
+        ts.strftime('%H:%M:%S'),
+        event.get('camera', ''),
+        str(event.get('type', '')).upper(),
+        f"{confidence:.2%}" if confidence > 0 else "N/A",
+        event.get('screenshot', ''),
+    ]
+
+
+def style_alert_row(ws, row_num, event):
+    fill = None
+    color = ALERT_TYPE_COLORS.get(event.get('type'))
+    if color:
+        fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
+    for col_num in range(1, len(ALERT_HEADERS) + 1):
+        cell = ws.cell(row=row_num, column=col_num)
+        cell.alignment = Alignment(horizontal='center', vertical='center')
+        if fill:
+            cell.fill = fill
+    # Set row height for better visibility
+    ws.row_dimensions[row_num].height = 20
+
+
+def build_alert_workbook(events):
+    """Styled workbook of the given detection events, returned as .xlsx bytes"""
+    wb, ws = new_workbook(ALERT_HEADERS, "Detection Alerts", style_alert_header)
+    for i, ev in enumerate(events, 1):
+        ws.append(alert_row(ev, i))
+        style_alert_row(ws, i + 1, ev)
+    buf = io.BytesIO()
+    wb.save(buf)
+    buf.seek(0)
+    return buf
@@ -0,0 +1,184 @@
+# src/storage/rollups.py
+# Pre-aggregated detection analytics (SQLite, stdlib only).
+#
+# Every flushed batch of detection events is folded into per-minute, per-hour
+# and per-day buckets keyed by (bucket, camera, type), each holding the event
+# count and the highest confidence. Buckets are the local wall-clock prefix of
+# the event's ISO timestamp ("2024-05-01T14:05", "2024-05-01T14",
+# "2024-05-01"), the same clock the daily event files use, so a range query is
+# a primary-key range scan over a few hundred rows instead of reading and
+# shipping every raw event of the range.
+
+import sqlite3
+import threading
+from collections import deque
+from pathlib import Path
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    grain           TEXT NOT NULL,      -- minute / hour / day
+    bucket          TEXT NOT NULL,      -- local time prefix, e.g. 2024-05-01T14
+    camera          TEXT NOT NULL,
+    type            TEXT NOT NULL,
+    events          INTEGER NOT NULL,
+    max_confidence  REAL NOT NULL,
+    PRIMARY KEY (grain, bucket, camera, type)
+) WITHOUT ROWID;
+"""
+
+# grain -> length of the ISO timestamp prefix that names its bucket
+GRAINS = {"minute": 16, "hour": 13, "day": 10}
+
+# the ways a range can be broken down: name -> columns kept besides the bucket
+GROUPINGS = {
+    "type": ("type",),
+    "camera": ("camera",),
+    "camera,type": ("camera", "type"),
+    "none": (),
+}
+
+UPSERT = ("INSERT INTO rollups (grain, bucket, camera, type, events, max_confidence) VALUES (?, ?, ?, ?, ?, ?) "
+          "ON CONFLICT (grain, bucket, camera, type) DO UPDATE SET "
+          "events = events + excluded.events, max_confidence = MAX(max_confidence, excluded.max_confidence)")
+
+
+class DetectionRollups:
+    def __init__(self, path, recent=100):
+        """recent: how many of the newest raw events to keep in memory for 'latest alerts' lists"""
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self.recent = deque(maxlen=recent)
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        """One connection per thread (updates come from the event writer, reads from Flask)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ----------------- updates -----------------
+    def add(self, events):
+        """Fold a batch of event dicts into the buckets (a DetectionEventStore listener)"""
+        acc = {}
+        for ev in events:
+            ts = str(ev.get("timestamp") or "").replace(" ", "T")
+            if len(ts) < GRAINS["minute"]:
+                continue
+            camera = str(ev.get("camera") or "unknown")
+            dtype = str(ev.get("type") or "unknown")
+            try:
+                conf = float(ev.get("confidence") or 0.0)
+            except (TypeError, ValueError):
+                conf = 0.0
+            for grain, n in GRAINS.items():
+                key = (grain, ts[:n], camera, dtype)
+                cur = acc.get(key)
+                acc[key] = [1, conf] if cur is None else [cur[0] + 1, max(cur[1], conf)]
+            self.recent.append(ev)
+        if not acc:
+            return 0
+        conn = self._conn()
+        with self._write_lock, conn:
+            conn.executemany(UPSERT, [k + (v[0], v[1]) for k, v in acc.items()])
+        return len(acc)
+
+    def rebuild(self, event_store):
+        """Recompute every bucket from the event store's files (e.g. on first start)"""
+        conn = self._conn()
+        with self._write_lock, conn:
+            conn.execute("DELETE FROM rollups")
+        self.recent.clear()
+        for date_str in event_store.dates():
+            self.add(event_store.read_day(date_str))
+
+    def attach(self, event_store):
+        """
+        Keep the buckets updated from `event_store`: built from its files on first use,
+        then updated by every flushed batch. Call before any events are logged.
+        """
+        if self.is_empty():
+            self.rebuild(event_store)
+        else:
+            dates = event_store.dates()
+            if dates:
+                self.recent.extend(event_store.read_day(dates[-1])[-self.recent.maxlen:])
+        event_store.add_listener(self.add)
+        return self
+
+    def is_empty(self):
+        return self._conn().execute("SELECT 1 FROM rollups LIMIT 1").fetchone() is None
+
+    # ----------------- reads -----------------
+    def aggregate(self, grain="hour", start=None, end=None, camera=None, type=None, by="type"):
+        """
+        Buckets of `grain` from `start` to `end` (dates or ISO datetimes, both inclusive,
+        as in /api/detections/range) broken down by `by` (see GROUPINGS):
+        [{"bucket", <by columns>, "events", "max_confidence"}] in time order
+        """
+        if grain not in GRAINS:
+            raise ValueError(f"unknown grain {grain!r} (one of {', '.join(GRAINS)})")
+        if by not in GROUPINGS:
+            raise ValueError(f"unknown grouping {by!r} (one of {', '.join(GROUPINGS)})")
+        keep = GROUPINGS[by]
+        where, args = ["grain = ?"], [grain]
+        if start:
+            where.append("bucket >= ?")
+            args.append(str(start).replace(" ", "T")[:GRAINS[grain]])
+        if end:
+            # every bucket that starts with `end` ("2024-05-01" includes all of that day)
+            where.append("bucket <= ?")
+            args.append(str(end).replace(" ", "T")[:GRAINS[grain]] + "~")
+        for column, value in (("camera", camera), ("type", type)):
+            if value:
+                where.append(f"{column} = ?")
+                args.append(value)
+        columns = ", ".join(("bucket",) + keep)
+        sql = (f"SELECT {columns}, SUM(events), MAX(max_confidence) FROM rollups "
+               f"WHERE {' AND '.join(where)} GROUP BY {columns} ORDER BY {columns}")
+        out = []
+        for row in self._conn().execute(sql, args):
+            item = {"bucket": row[0]}
+            item.update(zip(keep, row[1:1 + len(keep)]))
+            item["events"] = row[-2]
+            item["max_confidence"] = round(row[-1], 4)
+            out.append(item)
+        return out
+
+    def latest(self, limit=10, type=None):
+        """The newest raw events seen (newest first)"""
+        out = []
+        for ev in reversed(list(self.recent)):  # snapshot: the writer thread appends concurrently
+            if type and ev.get("type") != type:
+                continue
+            out.append(ev)
+            if len(out) >= limit:
+                break
+        return out
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def totals(buckets, by="type"):
+    """Whole-range totals per `by` group of aggregate() rows, most events first"""
+    keep = GROUPINGS[by]
+    acc = {}
+    for r in buckets:
+        key = tuple(r[c] for c in keep)
+        cur = acc.get(key)
+        if cur is None:
+            acc[key] = dict({c: r[c] for c in keep}, events=r["events"], max_confidence=r["max_confidence"])
+        else:
+            cur["events"] += r["events"]
+            cur["max_confidence"] = max(cur["max_confidence"], r["max_confidence"])
+    return sorted(acc.values(), key=lambda t: -t["events"])
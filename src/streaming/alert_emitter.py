@@ -0,0 +1,175 @@
+# src/streaming/alert_emitter.py
+# Coalesced Socket.IO alert emission.
+#
+# Alerts used to be emitted one by one, straight from the stream threads and
+# the /api/alerts handler, so a weapon in view on a few cameras flooded the
+# server and every browser. AlertEmitter sits in between:
+#   - dedupe: per (camera, type) only the first alert of a `window` is sent;
+#     later ones are folded into it while it is still queued, or counted and
+#     sent once as a trailing alert ("repeats": n) when the window ends
+#   - batching: a sender thread emits each room's queued alerts as one
+#     'new_alerts' list every `interval`
+#   - backpressure: each room's queue is bounded; when it is full the lowest
+#     severity (oldest first) alert is dropped, so weapon / fight alerts
+#     survive a burst of crowd alerts
+# submit() never blocks on the sockets.
+
+import threading
+import time
+
+
+SEVERITY_RANK = {"low": 0, "info": 0, "medium": 1, "med": 1, "high": 2, "critical": 3}
+DEFAULT_SEVERITY = 1  # alerts without a (known) severity rank as medium
+
+
+def severity_of(alert):
+    return SEVERITY_RANK.get(str(alert.get("severity", "")).lower(), DEFAULT_SEVERITY)
+
+
+class AlertEmitter:
+    def __init__(self, emit, window=5.0, interval=0.25, max_queue=50, event="new_alerts"):
+        """
+        emit(event, alerts, room): sends a list of alerts to a Socket.IO room (None = everyone)
+        window: seconds during which repeats of a (camera, type) alert are suppressed
+        interval: seconds between batched emits
+        max_queue: alerts waiting per room before low-severity ones are dropped
+        """
+        self.emit = emit
+        self.window = window
+        self.interval = interval
+        self.max_queue = max_queue
+        self.event = event
+        self._lock = threading.Lock()
+        self._queues = {}    # room -> [entry] waiting for the next batch
+        self._keys = {}      # (camera, type) -> dedupe state
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+        self.stats = {"submitted": 0, "emitted": 0, "suppressed": 0, "dropped": 0, "batches": 0,
+                      "last_flush_ms": 0.0}
+        self.by_type = {}    # alert type -> {"submitted", "emitted", "suppressed", "dropped"}
+
+    # ----------------- lifecycle -----------------
+    def start(self):
+        if self._running:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="alert-emitter", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        if not self._running:
+            return
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+    # ----------------- producers -----------------
+    def submit(self, alert, rooms=(None,)):
+        """Queue an alert for the next batch; returns False if it was folded into an earlier one"""
+        key = (str(alert.get("camera") or "unknown"), str(alert.get("type") or "unknown"))
+        now = time.monotonic()
+        with self._lock:
+            self._count(key[1], "submitted")
+            state = self._keys.get(key)
+            if state is not None and state["entry"] is not None:
+                # the key's alert hasn't been sent yet: send the newest payload instead
+                entry = state["entry"]
+                entry["alert"] = alert
+                entry["repeats"] += 1
+                entry["severity"] = max(entry["severity"], severity_of(alert))
+                self._count(key[1], "suppressed")
+                return False
+            if state is not None and now - state["sent_at"] < self.window:
+                state["suppressed"] += 1
+                state["latest"] = (alert, rooms)
+                self._count(key[1], "suppressed")
+                return False
+            self._enqueue(key, alert, rooms, repeats=0, now=now)
+        return True
+
+    def _enqueue(self, key, alert, rooms, repeats, now):
+        """Put an alert in every room's queue, evicting low-severity ones when full (lock held)"""
+        entry = {"key": key, "alert": alert, "repeats": repeats, "severity": severity_of(alert),
+                 "queued_at": now, "rooms": 0}
+        self._keys[key] = {"sent_at": now, "suppressed": 0, "latest": None, "entry": entry}
+        for room in rooms:
+            queue = self._queues.setdefault(room, [])
+            queue.append(entry)
+            entry["rooms"] += 1
+            if len(queue) > self.max_queue:
+                victim = min(queue, key=lambda e: (e["severity"], e["queued_at"]))
+                queue.remove(victim)
+                victim["rooms"] -= 1
+                self._count(victim["key"][1], "dropped")
+                if victim["rooms"] == 0 and self._keys.get(victim["key"], {}).get("entry") is victim:
+                    del self._keys[victim["key"]]  # nothing was sent: don't suppress the next one
+
+    # ----------------- sender -----------------
+    def _loop(self):
+        while self._running:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Alert emit failed: {e}")
+
+    def flush(self):
+        """Emit every room's queued alerts as one batch each; returns the number of alerts sent"""
+        t0 = time.perf_counter()
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            queues, self._queues = self._queues, {}
+            batches = []
+            for room, entries in queues.items():
+                if not entries:
+                    continue
+                batch = []
+                for e in entries:
+                    state = self._keys.get(e["key"])
+                    if state is not None and state["entry"] is e:
+                        state["entry"] = None
+                    batch.append(dict(e["alert"], repeats=e["repeats"]) if e["repeats"] else e["alert"])
+                    self._count(e["key"][1], "emitted")
+                batches.append((room, batch))
+        sent = 0
+        for room, batch in batches:
+            self.emit(self.event, batch, room)
+            sent += len(batch)
+        if batches:
+            self.stats["batches"] += len(batches)
+            self.stats["last_flush_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+        return sent
+
+    def _expire(self, now):
+        """Queue trailing alerts for windows that ended with suppressed repeats; forget idle keys (lock held)"""
+        for key, state in list(self._keys.items()):
+            if state["entry"] is not None or now - state["sent_at"] < self.window:
+                continue
+            if state["suppressed"]:
+                # the newest suppressed alert goes out after all, standing for the others
+                alert, rooms = state["latest"]
+                self._count(key[1], "suppressed", -1)
+                self._enqueue(key, alert, rooms, repeats=state["suppressed"] - 1, now=now)
+            else:
+                del self._keys[key]
+
+    # ----------------- metrics -----------------
+    def _count(self, alert_type, what, n=1):
+        self.stats[what] += n
+        counts = self.by_type.get(alert_type)
+        if counts is None:
+            counts = self.by_type[alert_type] = {"submitted": 0, "emitted": 0, "suppressed": 0, "dropped": 0}
+        counts[what] += n
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats,
+                        by_type={t: dict(c) for t, c in self.by_type.items()},
+                        queued={str(room): len(q) for room, q in self._queues.items()},
+                        window_sec=self.window)
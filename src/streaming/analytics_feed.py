@@ -0,0 +1,168 @@
+# src/streaming/analytics_feed.py
+# Incremental analytics push over Socket.IO.
+#
+# Instead of every open dashboard re-downloading the day's detections on a
+# timer, AnalyticsFeed collects the events flushed by the DetectionEventStore
+# and, once per interval, sends each subscribed room one coalesced delta:
+# the new events (newest few) and the current values of the rollup buckets
+# they touched. Bucket values are absolute, so applying a delta twice is
+# harmless.
+#
+# There is one stream per camera (room "analytics:<camera>") and one for all
+# cameras ("analytics:all"), each with its own sequence numbers and a short
+# history. A client that reconnects passes its stream, epoch and last seq and
+# gets the missed deltas replayed, or is told to reload a snapshot over HTTP
+# when they are no longer kept (or the server restarted: new epoch).
+
+import threading
+import time
+import uuid
+from collections import deque
+
+
+ALL = "all"
+GRAINS = ("minute", "hour", "day")
+
+
+def room_for(stream):
+    return f"analytics:{stream}"
+
+
+class AnalyticsFeed:
+    def __init__(self, rollups, emit, interval=1.0, history=300, max_events=50):
+        """
+        rollups: the DetectionRollups the deltas read bucket values from (must see each
+            batch before this feed does - attach it to the event store first)
+        emit(event, data, room): sends a Socket.IO message to a room
+        interval: seconds between coalesced deltas
+        history: deltas kept per stream for reconnecting clients
+        max_events: newest raw events included per delta (bucket counts stay exact)
+        """
+        self.rollups = rollups
+        self.emit = emit
+        self.interval = interval
+        self.history = history
+        self.max_events = max_events
+        self.epoch = uuid.uuid4().hex[:8]
+        self._pending = []
+        self._lock = threading.Lock()
+        self._seq = {}       # stream -> last seq sent
+        self._sent = {}      # stream -> deque of recent deltas
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+        self.deltas_sent = 0
+        self.last_flush_ms = 0.0
+
+    # ----------------- lifecycle -----------------
+    def start(self):
+        if self._running:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="analytics-feed", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        if not self._running:
+            return
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+    # ----------------- producer -----------------
+    def add(self, events):
+        """Queue a flushed batch of events (a DetectionEventStore listener)"""
+        with self._lock:
+            self._pending.extend(events)
+
+    # ----------------- sender -----------------
+    def _loop(self):
+        while self._running:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Analytics push failed: {e}")
+
+    def flush(self):
+        """Send one delta per stream with new events; returns the number sent"""
+        with self._lock:
+            events, self._pending = self._pending, []
+        if not events:
+            return 0
+        t0 = time.perf_counter()
+        by_camera = {}
+        for ev in events:
+            by_camera.setdefault(str(ev.get("camera") or "unknown"), []).append(ev)
+        deltas = [(camera, evs, camera) for camera, evs in by_camera.items()]
+        deltas.append((ALL, events, None))
+        for stream, evs, camera in deltas:
+            buckets = self._buckets(evs, camera)
+            self._send(stream, evs, buckets)
+        self.last_flush_ms = round((time.perf_counter() - t0) * 1000, 2)
+        return len(deltas)
+
+    def _buckets(self, events, camera):
+        """Current per-type values of every minute / hour / day bucket the events fall in"""
+        keys = set()
+        for ev in events:
+            ts = str(ev.get("timestamp") or "").replace(" ", "T")
+            keys.update({("minute", ts[:16]), ("hour", ts[:13]), ("day", ts[:10])})
+        out = []
+        for grain, bucket in sorted(keys):
+            for row in self.rollups.aggregate(grain, bucket, bucket, camera=camera, by="type"):
+                row["grain"] = grain
+                out.append(row)
+        return out
+
+    def _send(self, stream, events, buckets):
+        with self._lock:
+            seq = self._seq.get(stream, 0) + 1
+            self._seq[stream] = seq
+            delta = {
+                "stream": stream,
+                "epoch": self.epoch,
+                "seq": seq,
+                "events": events[-self.max_events:],
+                "skipped_events": max(0, len(events) - self.max_events),
+                "buckets": buckets,
+            }
+            self._sent.setdefault(stream, deque(maxlen=self.history)).append(delta)
+        self.emit("analytics_delta", delta, room_for(stream))
+        self.deltas_sent += 1
+
+    # ----------------- subscribers -----------------
+    def resume(self, stream, epoch=None, since=None):
+        """
+        What a (re)subscribing client needs to catch up from `since`:
+        {"stream", "epoch", "seq", "replay": [missed deltas]} or, when the gap can't be
+        replayed, {"stream", "epoch", "seq", "full": True} - reload the snapshot over HTTP
+        and apply deltas after `seq`
+        """
+        with self._lock:
+            seq = self._seq.get(stream, 0)
+            sent = list(self._sent.get(stream, ()))
+        reply = {"stream": stream, "epoch": self.epoch, "seq": seq}
+        if since is None or epoch != self.epoch or since > seq:
+            reply["full"] = True
+            return reply
+        missed = [d for d in sent if d["seq"] > since]
+        if len(missed) < seq - since:
+            reply["full"] = True  # older than the history kept
+            return reply
+        reply["replay"] = missed
+        return reply
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "epoch": self.epoch,
+                "streams": dict(self._seq),
+                "pending_events": len(self._pending),
+                "deltas_sent": self.deltas_sent,
+                "last_flush_ms": self.last_flush_ms,
+            }
@@ -0,0 +1,320 @@
+# src/streaming/broadcaster.py
+# One processing pipeline per camera, shared by every viewer.
+#
+# FrameBroadcaster holds only the newest encoded frame. publish() swaps it in
+# and wakes the viewers - it never waits for them - and each Subscriber hands
+# its client the newest frame it hasn't sent yet, so a slow client skips
+# frames instead of holding up the pipeline or the other viewers.
+#
+# StreamHub starts a camera's pipeline for its first viewer and stops it a
+# short while after the last one leaves (a page reload doesn't restart the
+# models). Any number of viewers attach to the running pipeline, so the
+# capture + inference cost of a camera no longer grows with its audience.
+# restart() swaps a camera's pipeline (e.g. for a new source) under its
+# viewers: their connections stay open and simply continue with new frames.
+
+import threading
+import time
+
+
+MJPEG_MIMETYPE = "multipart/x-mixed-replace; boundary=frame"
+
+
+def mjpeg_part(frame_bytes):
+    return b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n'
+
+
+class FrameBroadcaster:
+    """Latest-frame fan-out: a StreamPipeline sink that any number of Subscribers read"""
+
+    def __init__(self, name=""):
+        self.name = name
+        self._cond = threading.Condition()
+        self._frame = None
+        self._seq = 0
+        self._closed = False
+        self._subscribers = set()
+        self.dropped = 0  # frames subscribers skipped because they were still sending the previous one
+
+    # ----------------- producer side -----------------
+    def put(self, frame_bytes):
+        """Publish a frame (O(1), never blocks on subscribers)"""
+        with self._cond:
+            if self._closed:
+                return
+            self._frame = frame_bytes
+            self._seq += 1
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def active(self):
+        """Whether anyone is subscribed (the pipeline skips encoding otherwise)"""
+        return bool(self._subscribers)
+
+    @property
+    def closed(self):
+        return self._closed
+
+    # ----------------- consumer side -----------------
+    def subscribe(self):
+        sub = Subscriber(self)
+        with self._cond:
+            self._subscribers.add(sub)
+        return sub
+
+    def _unsubscribe(self, sub):
+        with self._cond:
+            self._subscribers.discard(sub)
+
+    def _next(self, after_seq, timeout):
+        """(seq, frame) of the newest frame after `after_seq`; (after_seq, None) on timeout / close"""
+        with self._cond:
+            if self._seq <= after_seq and not self._closed:
+                self._cond.wait(timeout)
+            if self._seq <= after_seq:
+                return after_seq, None
+            return self._seq, self._frame
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def get_stats(self):
+        with self._cond:
+            subs = list(self._subscribers)
+            published = self._seq
+        return {
+            "subscribers": len(subs),
+            "published": published,
+            "dropped": self.dropped,
+            "clients": [s.get_stats() for s in subs],
+        }
+
+
+class Subscriber:
+    """One viewer of a FrameBroadcaster; iterate it for frames, close() to detach"""
+
+    def __init__(self, broadcaster):
+        self.broadcaster = broadcaster
+        self.seq = broadcaster._seq  # start from the next frame published
+        self.sent = 0
+        self.dropped = 0
+        self.connected_at = time.time()
+        self._closed = False
+
+    def get(self, timeout=1.0):
+        """The next frame to send (the newest one), or None on timeout"""
+        seq, frame = self.broadcaster._next(self.seq, timeout)
+        if frame is None:
+            return None
+        skipped = seq - self.seq - 1
+        if skipped > 0 and self.sent:
+            self.dropped += skipped
+            self.broadcaster.dropped += skipped
+        self.seq = seq
+        self.sent += 1
+        return frame
+
+    def __iter__(self):
+        while not self._closed and not self.broadcaster.closed:
+            frame = self.get()
+            if frame is not None:
+                yield frame
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self.broadcaster._unsubscribe(self)
+
+    def get_stats(self):
+        return {
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "connected_sec": round(time.time() - self.connected_at, 1),
+        }
+
+
+class CameraStream:
+    """A running pipeline and its broadcasters (one per output variant)"""
+
+    def __init__(self, camera_id, pipeline, broadcasters):
+        self.camera_id = camera_id
+        self.pipeline = pipeline
+        self.broadcasters = broadcasters
+        self.viewers = 0
+        self.idle_timer = None
+
+    @property
+    def alive(self):
+        return self.pipeline.running
+
+
+class StreamHub:
+    def __init__(self, start_pipeline, variants=("overlay",), linger_sec=3.0, on_stop=None, stop_timeout=0.5):
+        """
+        start_pipeline(camera_id, outputs) -> started StreamPipeline (or None if the source can't be
+            opened); outputs maps each variant name to the FrameBroadcaster it must feed
+        variants: output variants every camera provides (e.g. with / without overlays)
+        linger_sec: keep the pipeline running this long after the last viewer leaves
+        on_stop(camera_id, pipeline): called after a camera's pipeline was stopped
+        stop_timeout: seconds to wait for each pipeline thread on stop (the capture is
+            released by its own thread in any case)
+        """
+        self.start_pipeline = start_pipeline
+        self.variants = tuple(variants)
+        self.linger_sec = linger_sec
+        self.on_stop = on_stop
+        self.stop_timeout = stop_timeout
+        self._streams = {}
+        # _lock guards _streams and viewer counts only; starting / stopping a camera's
+        # pipeline (slow: opening a source, joining threads) holds just that camera's lock
+        self._lock = threading.Lock()
+        self._camera_locks = {}
+
+    def _camera_lock(self, camera_id):
+        with self._lock:
+            return self._camera_locks.setdefault(camera_id, threading.Lock())
+
+    def subscribe(self, camera_id, variant=None):
+        """A Subscriber on the camera's shared pipeline (started on demand), or None"""
+        variant = variant or self.variants[0]
+        if variant not in self.variants:
+            raise ValueError(f"unknown stream variant {variant!r}")
+        with self._camera_lock(camera_id):
+            with self._lock:
+                stream = self._streams.get(camera_id)
+                if stream is not None and stream.alive:
+                    return self._attach(stream, variant)
+                if stream is not None:
+                    self._forget(stream)
+            if stream is not None:
+                self._stop_stream(stream)
+            broadcasters = {v: FrameBroadcaster(f"{camera_id}/{v}") for v in self.variants}
+            pipeline = self.start_pipeline(camera_id, broadcasters)
+            if pipeline is None:
+                return None
+            stream = CameraStream(camera_id, pipeline, broadcasters)
+            print(f"📡 Started shared pipeline for {camera_id}")
+            with self._lock:
+                self._streams[camera_id] = stream
+                return self._attach(stream, variant)
+
+    def _attach(self, stream, variant):
+        """One more viewer (caller holds the lock)"""
+        if stream.idle_timer is not None:
+            stream.idle_timer.cancel()
+            stream.idle_timer = None
+        stream.viewers += 1
+        return stream.broadcasters[variant].subscribe()
+
+    def unsubscribe(self, camera_id, sub):
+        sub.close()
+        with self._camera_lock(camera_id):
+            with self._lock:
+                stream = self._streams.get(camera_id)
+                if stream is None or sub.broadcaster not in stream.broadcasters.values():
+                    return
+                stream.viewers -= 1
+                if stream.viewers > 0:
+                    return
+                if stream.alive and self.linger_sec > 0:
+                    stream.idle_timer = threading.Timer(self.linger_sec, self._stop_if_idle, args=(stream,))
+                    stream.idle_timer.daemon = True
+                    stream.idle_timer.start()
+                    return
+                self._forget(stream)
+            self._stop_stream(stream)
+
+    def stream(self, camera_id, variant=None):
+        """Generator of MJPEG parts for one HTTP client"""
+        sub = self.subscribe(camera_id, variant)
+        if sub is None:
+            return
+        try:
+            for frame_bytes in sub:
+                yield mjpeg_part(frame_bytes)
+        finally:
+            self.unsubscribe(camera_id, sub)
+
+    def _stop_if_idle(self, stream):
+        with self._camera_lock(stream.camera_id):
+            with self._lock:
+                if stream.viewers != 0 or self._streams.get(stream.camera_id) is not stream:
+                    return
+                self._forget(stream)
+            self._stop_stream(stream)
+
+    def _forget(self, stream):
+        """Take a stream out of the hub (caller holds the lock)"""
+        if self._streams.get(stream.camera_id) is stream:
+            del self._streams[stream.camera_id]
+        if stream.idle_timer is not None:
+            stream.idle_timer.cancel()
+
+    def _stop_stream(self, stream):
+        """Stop a forgotten stream's pipeline (caller holds the camera's lock); its subscribers' iterators end"""
+        stream.pipeline.stop(timeout=self.stop_timeout)
+        print(f"📹 Stopped shared pipeline for {stream.camera_id}")
+        if self.on_stop is not None:
+            self.on_stop(stream.camera_id, stream.pipeline)
+
+    def restart(self, camera_id):
+        """
+        Replace a camera's pipeline with a freshly started one (its source changed).
+        Viewers stay attached to the same broadcasters; returns True if any were moved over.
+        """
+        with self._camera_lock(camera_id):
+            with self._lock:
+                stream = self._streams.get(camera_id)
+                if stream is None:
+                    return False
+                idle = stream.viewers == 0
+                if idle:
+                    self._forget(stream)
+            if idle:
+                self._stop_stream(stream)
+                return False
+            old = stream.pipeline
+            old.stop(timeout=self.stop_timeout, close_outputs=False)
+            if self.on_stop is not None:
+                self.on_stop(camera_id, old)
+            pipeline = self.start_pipeline(camera_id, stream.broadcasters)
+            if pipeline is None:
+                with self._lock:
+                    self._forget(stream)
+                for b in stream.broadcasters.values():
+                    b.close()
+                return False
+            stream.pipeline = pipeline
+            print(f"🔀 Restarted shared pipeline for {camera_id} ({stream.viewers} viewer(s) kept)")
+            return True
+
+    def stop(self, camera_id):
+        """Stop a camera's pipeline now (e.g. its source changed); viewers are disconnected"""
+        with self._camera_lock(camera_id):
+            with self._lock:
+                stream = self._streams.get(camera_id)
+                if stream is None:
+                    return
+                self._forget(stream)
+            self._stop_stream(stream)
+
+    def stop_all(self):
+        with self._lock:
+            camera_ids = list(self._streams)
+        for camera_id in camera_ids:
+            self.stop(camera_id)
+
+    def viewers(self, camera_id):
+        stream = self._streams.get(camera_id)
+        return stream.viewers if stream is not None else 0
+
+    def get_stats(self, camera_id):
+        stream = self._streams.get(camera_id)
+        if stream is None:
+            return None
+        return {v: b.get_stats() for v, b in stream.broadcasters.items()}
@@ -0,0 +1,189 @@
+# src/streaming/frame_ring.py
+# Shared-memory ring of raw frames between processes.
+#
+# A capture process writes decoded frames into a fixed number of slots of a
+# multiprocessing.shared_memory block; the inference process reads the newest
+# one. Nothing is pickled and nothing goes through a pipe: a frame costs one
+# copy in and one copy out. Each slot carries the sequence number of the
+# frame in it, set to -1 while the writer fills the slot, so a reader that
+# was overtaken mid-copy notices and takes the next frame instead of a torn
+# one. Frames larger than the ring's max size are scaled down to fit.
+
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import cv2
+import numpy as np
+
+
+# header: int64 words
+HEAD_SEQ, HEAD_FPS_MILLI, HEAD_CLOSED, HEAD_WORDS = 0, 1, 2, 4
+# per-slot words: sequence number, frame index, height, width
+SLOT_WORDS = 4
+
+
+class FrameRing:
+    def __init__(self, shm, slots, max_w, max_h, owner):
+        self.shm = shm
+        self.name = shm.name
+        self.slots = slots
+        self.max_w, self.max_h = max_w, max_h
+        self.owner = owner
+        meta_words = HEAD_WORDS + SLOT_WORDS * slots
+        self._meta = np.ndarray((meta_words,), np.int64, buffer=shm.buf)
+        self._head = self._meta[:HEAD_WORDS]
+        self._slot_meta = self._meta[HEAD_WORDS:].reshape(slots, SLOT_WORDS)
+        slot_bytes = max_w * max_h * 3
+        self._data = np.ndarray((slots, slot_bytes), np.uint8, buffer=shm.buf, offset=meta_words * 8)
+        self._last = 0          # reader: newest sequence number read
+        self.overruns = 0       # reader: copies that were overtaken by the writer and retried
+        self.resized = 0        # writer: frames scaled down to fit a slot
+
+    # ----------------- lifecycle -----------------
+    @classmethod
+    def create(cls, slots=4, max_w=1920, max_h=1080, name=None):
+        size = 8 * (HEAD_WORDS + SLOT_WORDS * slots) + slots * max_w * max_h * 3
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        ring = cls(shm, slots, max_w, max_h, owner=True)
+        ring._meta[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name, slots, max_w, max_h):
+        """Map a ring created by another process (which stays in charge of unlinking it)"""
+        shm = shared_memory.SharedMemory(name=name)
+        # This process must not unlink the block when it exits (Python < 3.13 tracks attached blocks too)
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return cls(shm, slots, max_w, max_h, owner=False)
+
+    def close(self):
+        """Unmap (and unlink, for the creator). The writer's readers see the ring as closed."""
+        self._meta = self._head = self._slot_meta = self._data = None
+        try:
+            self.shm.close()
+        except Exception:
+            pass
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    # ----------------- writer -----------------
+    def set_fps(self, fps):
+        self._head[HEAD_FPS_MILLI] = int(round((fps or 0) * 1000))
+
+    def mark_closed(self):
+        """No more frames (the source ended or was released)"""
+        if self._head is not None:
+            self._head[HEAD_CLOSED] = 1
+
+    def write(self, frame, frame_idx):
+        """Copy a BGR frame into the next slot and publish it"""
+        h, w = frame.shape[:2]
+        if w > self.max_w or h > self.max_h:
+            scale = min(self.max_w / w, self.max_h / h)
+            frame = cv2.resize(frame, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+            h, w = frame.shape[:2]
+            self.resized += 1
+        seq = int(self._head[HEAD_SEQ]) + 1
+        i = seq % self.slots
+        meta = self._slot_meta[i]
+        meta[0] = -1  # being written
+        self._data[i, :h * w * 3].reshape(h, w, 3)[:] = frame
+        meta[1], meta[2], meta[3] = frame_idx, h, w
+        meta[0] = seq
+        self._head[HEAD_SEQ] = seq
+        return seq
+
+    # ----------------- reader -----------------
+    @property
+    def fps(self):
+        return self._head[HEAD_FPS_MILLI] / 1000.0
+
+    @property
+    def closed(self):
+        return self._head is None or bool(self._head[HEAD_CLOSED])
+
+    @property
+    def seq(self):
+        return int(self._head[HEAD_SEQ])
+
+    def read_latest(self, out=None):
+        """
+        (seq, frame_idx, frame) of the newest frame not read yet, or None if there is none.
+        The frame is copied out of shared memory (into `out` when its shape matches).
+        """
+        while True:
+            seq = int(self._head[HEAD_SEQ])
+            if seq <= self._last:
+                return None
+            i = seq % self.slots
+            meta = self._slot_meta[i]
+            if meta[0] != seq:
+                continue  # the writer is already refilling it - take the newer frame
+            frame_idx, h, w = int(meta[1]), int(meta[2]), int(meta[3])
+            src = self._data[i, :h * w * 3].reshape(h, w, 3)
+            if out is None or out.shape != (h, w, 3):
+                out = np.empty((h, w, 3), np.uint8)
+            np.copyto(out, src)
+            if meta[0] != seq:
+                self.overruns += 1  # overwritten while copying
+                continue
+            self._last = seq
+            return seq, frame_idx, out
+
+    def wait_latest(self, timeout=None, should_stop=None):
+        """
+        Block until a new frame is published (polling, paced by the writer's fps).
+        Returns (seq, frame_idx, frame), or None on timeout / ring closed / should_stop().
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            item = self.read_latest()
+            if item is not None:
+                return item
+            if self.closed or (should_stop is not None and should_stop()):
+                return None
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            fps = self.fps
+            # a quarter frame interval between polls (1-5 ms) keeps latency low without spinning
+            time.sleep(min(0.005, max(0.001, 0.25 / fps)) if fps > 0 else 0.005)
+
+
+class RingCapture:
+    """
+    cv2.VideoCapture-like reader of a FrameRing, so a StreamPipeline can run on frames
+    captured by another process. read() blocks for the next frame; it returns (False, None)
+    once the ring is closed, should_stop() is true or interrupt() was called.
+    """
+
+    def __init__(self, ring, should_stop=None):
+        self.ring = ring
+        self.should_stop = should_stop
+        self._interrupted = False
+
+    def _stopping(self):
+        return self._interrupted or (self.should_stop is not None and self.should_stop())
+
+    def read(self):
+        item = self.ring.wait_latest(should_stop=self._stopping)
+        if item is None:
+            return False, None
+        return True, item[2]
+
+    def get(self, prop):
+        return self.ring.fps if prop == cv2.CAP_PROP_FPS else 0
+
+    def set(self, prop, value):
+        return False
+
+    def interrupt(self):
+        self._interrupted = True
+
+    def release(self):
+        self._interrupted = True
@@ -0,0 +1,318 @@
+# src/streaming/pipeline.py
+# Staged capture -> inference -> encode pipeline for MJPEG streams.
+#
+# Each stage runs on its own thread and stages are joined by bounded
+# drop-oldest queues, so a slow model never stalls capture or the output:
+#   - capture reads frames at camera (or file) rate
+#   - inference always picks the freshest frame and publishes its result
+#   - encode draws the latest result onto every captured frame and JPEG-encodes it
+#     (once per output - e.g. with and without overlays, or per stream profile -
+#     and only for outputs someone is watching)
+
+import threading
+import time
+from collections import deque
+
+import cv2
+
+
+class DropOldestQueue:
+    """Bounded FIFO that discards the oldest item instead of blocking the producer"""
+
+    def __init__(self, maxsize=1):
+        self.maxsize = max(1, maxsize)
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._closed:
+                return
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Return the oldest queued item, or None on timeout / close"""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class StageStats:
+    """Latency counters for one pipeline stage (milliseconds)"""
+
+    def __init__(self, name, alpha=0.1):
+        self.name = name
+        self.alpha = alpha
+        self.count = 0
+        self.last_ms = 0.0
+        self.avg_ms = 0.0
+        self.max_ms = 0.0
+        self.total_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, ms):
+        with self._lock:
+            self.count += 1
+            self.last_ms = ms
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+            # exponential moving average so the number tracks recent load
+            self.avg_ms = ms if self.count == 1 else (1 - self.alpha) * self.avg_ms + self.alpha * ms
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "count": self.count,
+                "last_ms": round(self.last_ms, 2),
+                "avg_ms": round(self.avg_ms, 2),
+                "max_ms": round(self.max_ms, 2),
+                "mean_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            }
+
+
+class StreamPipeline:
+    """
+    Threaded pipeline around one cv2.VideoCapture.
+
+    analyze(frame, frame_idx) -> result   runs on the inference thread
+    render(frame, result) -> frame        runs on the encode thread (must not modify `frame` in place;
+                                          may return a reused buffer - it is encoded before the next call)
+    outputs: [(render, sink[, profile])]  encode each frame once per output into sinks with put(bytes)
+                                          and close() (e.g. FrameBroadcaster); a sink whose `active` is
+                                          False is skipped. A StreamProfile sets the output's size, JPEG
+                                          quality and frame rate. Default: `render` into output_q / frames()
+    on_release()                          called once the capture has been released
+
+    The capture thread owns `cap` and releases it when it exits, so a stop()
+    whose join times out (e.g. a camera blocked in read()) still never leaks it.
+    """
+
+    def __init__(self, name, cap, analyze, render=None, is_live=False, fps=None,
+                 queue_size=2, jpeg_quality=None, outputs=None, on_release=None):
+        self.name = name
+        self.cap = cap
+        self.analyze = analyze
+        self.render = render
+        self.is_live = is_live
+        self.fps = fps or cap.get(cv2.CAP_PROP_FPS) or 30
+        self.encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), int(jpeg_quality)] if jpeg_quality else []
+
+        # Inference only ever needs the freshest frame
+        self.infer_q = DropOldestQueue(maxsize=1)
+        self.encode_q = DropOldestQueue(maxsize=queue_size)
+        self.output_q = DropOldestQueue(maxsize=queue_size)
+        self.outputs = [tuple(o) + (None,) * (3 - len(o)) for o in (outputs or [(render, self.output_q)])]
+        self._last_sent = [0.0] * len(self.outputs)
+
+        self.stats = {
+            "capture": StageStats("capture"),
+            "inference": StageStats("inference"),
+            "encode": StageStats("encode"),
+        }
+
+        self._result = None
+        self._result_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._released = threading.Event()
+        self._release_lock = threading.Lock()
+        self._keep_outputs = False
+        self.on_release = on_release
+        self._threads = []
+        self.started_at = None
+        self.stopped_at = None
+
+    # ----------------- lifecycle -----------------
+    def start(self):
+        self.started_at = time.time()
+        for target, label in ((self._capture_loop, "capture"),
+                              (self._inference_loop, "inference"),
+                              (self._encode_loop, "encode")):
+            t = threading.Thread(target=target, name=f"{self.name}-{label}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self, timeout=2.0, close_outputs=True):
+        """
+        Stop all stages, waiting up to `timeout` seconds for each thread.
+        close_outputs=False leaves the sinks open (e.g. a new pipeline takes them over).
+        """
+        if close_outputs is False:
+            self._keep_outputs = True
+        self._stop.set()
+        if self.stopped_at is None:
+            self.stopped_at = time.time()
+        self._close_queues()
+        capture_alive = False
+        for t in self._threads:
+            if t is not threading.current_thread():
+                t.join(timeout)
+            capture_alive = capture_alive or (t.name.endswith("-capture") and t.is_alive())
+        self._threads = []
+        if capture_alive:
+            print(f"⚠️ Capture of {self.name} is still blocked - it is released when the read returns")
+        else:
+            self._release_capture()
+
+    def _close_queues(self):
+        for q in (self.infer_q, self.encode_q, self.output_q):
+            q.close()
+        if self._keep_outputs:
+            return
+        for _, sink, _ in self.outputs:
+            if sink is not self.output_q:
+                sink.close()
+
+    def _release_capture(self):
+        with self._release_lock:
+            if self._released.is_set():
+                return
+            if self.cap is not None:
+                self.cap.release()
+            self._released.set()
+        if self.on_release is not None:
+            try:
+                self.on_release()
+            except Exception as e:
+                print(f"⚠️ Release callback failed for {self.name}: {e}")
+
+    def wait_released(self, timeout=None):
+        """True once the capture has been released"""
+        return self._released.wait(timeout)
+
+    @property
+    def running(self):
+        return not self._stop.is_set()
+
+    def frames(self, timeout=1.0):
+        """Yield encoded JPEG bytes until the pipeline stops"""
+        while not self._stop.is_set():
+            item = self.output_q.get(timeout=timeout)
+            if item is not None:
+                yield item
+
+    def latest_result(self):
+        with self._result_lock:
+            return self._result
+
+    def get_stats(self):
+        out = {name: s.snapshot() for name, s in self.stats.items()}
+        out["dropped"] = {
+            "inference": self.infer_q.dropped,
+            "encode": self.encode_q.dropped,
+            "output": sum(getattr(sink, "dropped", 0) for _, sink, _ in self.outputs),
+        }
+        # The slowest stage (by recent average) is the bottleneck
+        out["bottleneck"] = max(self.stats, key=lambda n: self.stats[n].avg_ms)
+        out["uptime_sec"] = round(time.time() - self.started_at, 1) if self.started_at else 0.0
+        return out
+
+    # ----------------- stages -----------------
+    def _capture_loop(self):
+        try:
+            self._capture_frames()
+        finally:
+            self._stop.set()
+            self._close_queues()
+            self._release_capture()
+
+    def _capture_frames(self):
+        frame_idx = 0
+        frame_time = 1.0 / self.fps
+        next_due = time.time()
+        while not self._stop.is_set():
+            t0 = time.time()
+            ret, frame = self.cap.read()
+            if not ret:
+                # For live camera, stop on error
+                if self.is_live:
+                    if not self._stop.is_set():
+                        print(f"❌ Live camera read error for {self.name}")
+                    break
+                # For video file, loop - restart from beginning
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                continue
+            self.stats["capture"].record((time.time() - t0) * 1000)
+
+            frame_idx += 1
+            item = (frame_idx, frame)
+            self.infer_q.put(item)
+            self.encode_q.put(item)
+
+            # Video files are paced at their native rate; live cameras block in read()
+            if not self.is_live:
+                next_due += frame_time
+                delay = next_due - time.time()
+                if delay > 0:
+                    self._stop.wait(delay)  # wakes at once on stop()
+                else:
+                    next_due = time.time()
+
+    def _inference_loop(self):
+        while not self._stop.is_set():
+            item = self.infer_q.get(timeout=0.5)
+            if item is None:
+                continue
+            frame_idx, frame = item
+            t0 = time.time()
+            try:
+                result = self.analyze(frame, frame_idx)
+            except Exception as e:
+                print(f"⚠️ Inference error on {self.name}: {e}")
+                continue
+            self.stats["inference"].record((time.time() - t0) * 1000)
+            with self._result_lock:
+                self._result = result
+
+    def _encode_loop(self):
+        while not self._stop.is_set():
+            item = self.encode_q.get(timeout=0.5)
+            if item is None:
+                continue
+            frame_idx, frame = item
+            result = self.latest_result()
+            t0 = time.time()
+            encoded = 0
+            rendered = {}  # outputs sharing a renderer (or a renderer + size) draw / resize once
+            for i, (render, sink, profile) in enumerate(self.outputs):
+                if not getattr(sink, "active", True):
+                    continue  # nobody is watching this output - don't draw or encode it
+                params = self.encode_params
+                if profile is not None:
+                    # half a source frame of slack, so e.g. 10 fps from 30 fps is every 3rd frame
+                    if t0 - self._last_sent[i] < profile.interval - 0.5 / self.fps:
+                        continue
+                    params = profile.encode_params
+                key = id(render)
+                if key not in rendered:
+                    rendered[key] = render(frame, result)
+                out = rendered[key]
+                if profile is not None:
+                    size_key = (key, profile.output_size(out.shape[1], out.shape[0]))
+                    if size_key not in rendered:
+                        rendered[size_key] = profile.resize(out)
+                    out = rendered[size_key]
+                ret, buffer = cv2.imencode('.jpg', out, params)
+                if ret and not self._stop.is_set():  # a stopped pipeline's sinks may belong to its successor
+                    sink.put(buffer.tobytes())
+                    self._last_sent[i] = t0
+                    encoded += 1
+            if encoded:
+                self.stats["encode"].record((time.time() - t0) * 1000)
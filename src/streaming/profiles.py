@@ -0,0 +1,64 @@
+# src/streaming/profiles.py
+# Output profiles for the MJPEG streams.
+#
+# A dashboard grid of small tiles doesn't need full-resolution frames at
+# camera rate and default JPEG quality. Each profile caps the width, the JPEG
+# quality and the frame rate of what its viewers receive; the pipeline
+# encodes each profile once per due frame and shares the bytes between all
+# viewers of that profile (see StreamHub). Clients pick one with
+# /api/video_feed/<camera_id>?profile=<name>.
+
+import cv2
+
+
+class StreamProfile:
+    def __init__(self, name, max_width=None, quality=80, fps=None):
+        """
+        max_width: downscale wider frames to this width (None = source size)
+        quality: JPEG quality 1-100
+        fps: frames per second sent at most (None = every encoded frame)
+        """
+        self.name = name
+        self.max_width = int(max_width) if max_width else None
+        self.quality = int(quality)
+        self.fps = float(fps) if fps else None
+        self.encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), self.quality]
+
+    @property
+    def interval(self):
+        return 1.0 / self.fps if self.fps else 0.0
+
+    def output_size(self, width, height):
+        """(w, h) of a frame after this profile's downscale"""
+        if self.max_width is None or width <= self.max_width:
+            return width, height
+        return self.max_width, max(1, round(height * self.max_width / width))
+
+    def resize(self, frame):
+        h, w = frame.shape[:2]
+        size = self.output_size(w, h)
+        if size == (w, h):
+            return frame
+        return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+    def to_dict(self):
+        return {"name": self.name, "max_width": self.max_width, "quality": self.quality, "fps": self.fps}
+
+
+# thumbnails for the camera grid, a mid-size tile, and the focused / fullscreen view
+DEFAULT_PROFILES = {
+    "thumb": {"max_width": 320, "quality": 60, "fps": 5},
+    "grid": {"max_width": 640, "quality": 70, "fps": 10},
+    "full": {"max_width": None, "quality": 85, "fps": None},
+}
+
+
+def load_profiles(cfg=None):
+    """name -> StreamProfile from the `streaming: profiles:` section of config.yaml (or the defaults)"""
+    specs = (cfg or {}).get("profiles") or DEFAULT_PROFILES
+    return {name: StreamProfile(name, **(spec or {})) for name, spec in specs.items()}
+
+
+def stream_variants(profiles):
+    """Output variant names of a camera: each profile with overlays ("grid") and without ("grid:plain")"""
+    return [v for name in profiles for v in (name, f"{name}:plain")]
@@ -0,0 +1,55 @@
+# src/streaming/renderer.py
+# Overlay rendering for the encode stage of StreamPipeline.
+#
+# The captured frame is shared with the inference thread, so overlays can't be
+# drawn on it in place. FrameRenderer copies it into one preallocated buffer
+# per stream (np.copyto - no allocation per frame) and draws there; the encode
+# thread JPEG-encodes the buffer before the next frame reuses it. With
+# draw=False (consumers that only want the picture or the metadata) the frame
+# is passed through untouched, without any copy.
+
+import numpy as np
+
+from src.detector.camera_analyzer import draw_overlays
+
+
+class FrameRenderer:
+    def __init__(self, draw=True, hud=True):
+        """
+        draw: False = pass frames through without overlays (zero-copy)
+        hud: draw the status panel as well as the boxes
+        """
+        self.draw = draw
+        self.hud = hud
+        self._buffer = None
+        self.frames = 0
+        self.reallocations = 0
+
+    def buffer_for(self, frame):
+        """The reusable output buffer, reallocated only when the frame size changes"""
+        if self._buffer is None or self._buffer.shape != frame.shape or self._buffer.dtype != frame.dtype:
+            self._buffer = np.empty_like(frame)
+            self.reallocations += 1
+        return self._buffer
+
+    def __call__(self, frame, result):
+        """StreamPipeline render callback: returns the frame to encode (valid until the next call)"""
+        self.frames += 1
+        if not self.draw or result is None:
+            return frame
+        out = self.buffer_for(frame)
+        np.copyto(out, frame)
+        return draw_overlays(out, result, hud=self.hud)
+
+
+def profile_outputs(profiles, sinks):
+    """
+    StreamPipeline outputs for every profile, with and without overlays (see stream_variants):
+    sinks maps each variant name to its sink. Overlays are drawn once per frame for all profiles.
+    """
+    overlay, plain = FrameRenderer(draw=True), FrameRenderer(draw=False)
+    outputs = []
+    for name, profile in profiles.items():
+        outputs.append((overlay, sinks[name], profile))
+        outputs.append((plain, sinks[f"{name}:plain"], profile))
+    return outputs
@@ -0,0 +1,150 @@
+# src/streaming/sessions.py
+# Per-camera source lifecycle.
+#
+# A CameraSession is the source a camera streams from (a video file or a
+# live "camera:<index>") plus its state and timings. SessionManager switches
+# a camera to a new source by restarting its shared pipeline under the
+# viewers (StreamHub.restart) - no stop flags, no sleeps - and cleans up
+# after the old source: an uploaded temp file is deleted as soon as the last
+# pipeline reading it has released its VideoCapture (a file still open by a
+# capture can't be removed on Windows), or right away if nothing reads it.
+
+import os
+import threading
+import time
+
+
+# session states reported by status()
+IDLE, STREAMING, CLOSED = "idle", "streaming", "closed"
+
+
+class CameraSession:
+    def __init__(self, camera_id, source, temp=False):
+        """
+        source: video file path or "camera:<index>"
+        temp: the file is an upload owned by this session - deleted once nothing reads it
+        """
+        self.camera_id = camera_id
+        self.source = source
+        self.temp = temp
+        self.is_live = isinstance(source, str) and source.startswith("camera:")
+        self.created_at = time.time()
+        self.closed_at = None
+        self.captures = 0          # open VideoCaptures on this source
+        self.pipelines_started = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def state(self):
+        if self._closed:
+            return CLOSED
+        return STREAMING if self.captures else IDLE
+
+    def acquire(self):
+        """A pipeline opened this source"""
+        with self._lock:
+            self.captures += 1
+            self.pipelines_started += 1
+
+    def release(self):
+        """A pipeline released its capture of this source"""
+        with self._lock:
+            self.captures = max(0, self.captures - 1)
+            cleanup = self._closed and self.captures == 0
+        if cleanup:
+            self._remove_file()
+
+    def close(self):
+        """No new pipelines will use this source; its temp file goes once the last capture is released"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self.closed_at = time.time()
+            cleanup = self.captures == 0
+        if cleanup:
+            self._remove_file()
+
+    def _remove_file(self):
+        if not self.temp or not self.source or not os.path.exists(self.source):
+            return
+        try:
+            os.unlink(self.source)
+            print(f"🗑️ Deleted video for {self.camera_id}: {self.source}")
+        except OSError as e:
+            self.last_error = str(e)
+            print(f"⚠️ Could not delete old video: {e}")
+
+    def to_dict(self):
+        return {
+            "camera_id": self.camera_id,
+            "source": self.source,
+            "live": self.is_live,
+            "state": self.state,
+            "open_captures": self.captures,
+            "pipelines_started": self.pipelines_started,
+            "created_at": self.created_at,
+            "last_error": self.last_error,
+        }
+
+
+class SessionManager:
+    def __init__(self, hub):
+        """hub: the StreamHub whose pipelines read these sessions' sources"""
+        self.hub = hub
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.last_switch_ms = {}
+
+    def get(self, camera_id):
+        session = self._sessions.get(camera_id)
+        return session if session is not None and session.state != CLOSED else None
+
+    def source(self, camera_id):
+        session = self.get(camera_id)
+        return session.source if session is not None else None
+
+    def open(self, camera_id, source, temp=False):
+        """
+        Point a camera at a new source. A running stream is restarted on it with its
+        viewers kept; the previous source is cleaned up once released.
+        """
+        t0 = time.perf_counter()
+        session = CameraSession(camera_id, source, temp=temp)
+        with self._lock:
+            old = self._sessions.get(camera_id)
+            self._sessions[camera_id] = session
+        if old is not None:
+            old.close()
+        kept = self.hub.restart(camera_id)
+        ms = round((time.perf_counter() - t0) * 1000, 1)
+        self.last_switch_ms[camera_id] = ms
+        print(f"🔀 {camera_id} -> {source} in {ms} ms" + (" (viewers kept)" if kept else ""))
+        return session
+
+    def close(self, camera_id):
+        """Stop the camera's stream (viewers are disconnected) and clean up its source"""
+        with self._lock:
+            session = self._sessions.pop(camera_id, None)
+        self.hub.stop(camera_id)
+        if session is not None:
+            session.close()
+        return session is not None
+
+    def close_all(self):
+        for camera_id in list(self._sessions):
+            self.close(camera_id)
+
+    def status(self, camera_id=None):
+        ids = [camera_id] if camera_id is not None else list(self._sessions)
+        out = {}
+        for cid in ids:
+            session = self._sessions.get(cid)
+            if session is None:
+                continue
+            out[cid] = dict(session.to_dict(),
+                            viewers=self.hub.viewers(cid),
+                            last_switch_ms=self.last_switch_ms.get(cid))
+        return out
@@ -0,0 +1,374 @@
+# src/streaming/worker.py
+# Worker processes of the multi-process stream mode (see workers.py).
+#
+# Each camera group runs two of these, pinned to the group's cores:
+#   --role capture     opens the group's sources and writes decoded frames
+#                      into each camera's shared-memory FrameRing
+#   --role inference   runs a StreamPipeline per camera on its ring (models,
+#                      tracker, overlays, JPEG encode) and sends the encoded
+#                      frames, results and alerts back to the web process
+# A worker connects back to the web process's Listener and exits when that
+# connection goes away, so it never outlives the server.
+#
+#   python -m src.streaming.worker --role inference --address <addr> --group 0 --cores 0,1
+
+import argparse
+import importlib
+import os
+import sys
+import threading
+import time
+from multiprocessing.connection import Client
+from pathlib import Path
+
+import cv2
+import numpy as np
+import yaml
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.streaming.capture import open_capture
+from src.streaming.frame_ring import FrameRing, RingCapture
+from src.streaming.pipeline import StreamPipeline
+from src.streaming.profiles import load_profiles, stream_variants
+from src.streaming.renderer import profile_outputs
+
+AUTHKEY_ENV = "STREAM_WORKER_AUTHKEY"
+STATS_INTERVAL = 1.0
+
+
+def plain(value):
+    """Result / payload with numpy arrays and scalars turned into lists and Python numbers"""
+    if isinstance(value, dict):
+        return {k: plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [plain(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def pin_to_cores(cores):
+    """Restrict this process (and OpenCV's threads) to `cores`; a no-op where affinity isn't supported"""
+    if cores and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cores)
+        except OSError as e:
+            print(f"⚠️ Could not pin worker to cores {cores}: {e}")
+    cv2.setNumThreads(max(1, len(cores) if cores else 1))
+
+
+class Channel:
+    """A Connection whose sends may come from several threads"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._lock = threading.Lock()
+
+    def send(self, msg):
+        with self._lock:
+            self.conn.send(msg)
+
+    def recv(self):
+        return self.conn.recv()
+
+
+# ----------------- capture role -----------------
+class CaptureJob:
+    """Reads one camera's source into its ring until stopped (or a live camera fails)"""
+
+    def __init__(self, worker, key, source, ring_spec):
+        self.worker = worker
+        self.channel = worker.channel
+        self.key = key
+        self.source = source
+        self.ring_spec = ring_spec
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f"{key}-capture", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        try:
+            self._capture()
+        finally:
+            # a job that ended on its own (source failed or ended) leaves the worker's table too
+            if self.worker.jobs.get(self.key) is self:
+                self.worker.jobs.pop(self.key, None)
+
+    def _capture(self):
+        cap, is_live = open_capture(self.source)
+        if cap is None:
+            self.channel.send(("failed", self.key, "could not open source"))
+            return
+        ring = None
+        try:
+            ring = FrameRing.attach(*self.ring_spec)
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30
+            ring.set_fps(fps)
+            self.channel.send(("opened", self.key, fps, is_live))
+            self._read(cap, ring, fps, is_live)
+        except Exception as e:
+            print(f"⚠️ Capture worker error on {self.key}: {e}")
+        finally:
+            cap.release()
+            if ring is not None:
+                if not self._stop.is_set():
+                    ring.mark_closed()  # the source ended: the camera's inference pipeline ends too
+                ring.close()
+            self.channel.send(("released", self.key))
+
+    def _read(self, cap, ring, fps, is_live):
+        frame_idx = 0
+        frame_time = 1.0 / fps
+        next_due = time.time()
+        while not self._stop.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                if is_live:
+                    print(f"❌ Live camera read error for {self.key}")
+                    break
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                continue
+            frame_idx += 1
+            ring.write(frame, frame_idx)
+            # Video files are paced at their native rate; live cameras block in read()
+            if not is_live:
+                next_due += frame_time
+                delay = next_due - time.time()
+                if delay > 0:
+                    self._stop.wait(delay)
+                else:
+                    next_due = time.time()
+
+
+class CaptureWorker:
+    def __init__(self, channel, args):
+        self.channel = channel
+        self.jobs = {}
+
+    def handle(self, msg):
+        kind, key = msg[0], msg[1]
+        if kind == "start":
+            source, ring_spec = msg[2], msg[3]
+            job = self.jobs[key] = CaptureJob(self, key, source, ring_spec)
+            job.start()
+        elif kind == "stop":
+            job = self.jobs.pop(key, None)
+            if job is not None:
+                job.stop()
+
+    def close(self):
+        jobs = list(self.jobs.values())
+        for job in jobs:
+            job.stop()
+        for job in jobs:
+            job.thread.join(2.0)
+
+
+# ----------------- inference role -----------------
+class RemoteSink:
+    """StreamPipeline sink sending one variant's JPEGs to the web process (only while someone watches)"""
+
+    def __init__(self, channel, key, variant, active=False):
+        self.channel = channel
+        self.key = key
+        self.variant = variant
+        self.active = active
+
+    def put(self, frame_bytes):
+        self.channel.send(("frame", self.key, self.variant, frame_bytes))
+
+    def close(self):
+        pass
+
+
+class InferenceJob:
+    def __init__(self, worker, key, camera_id, ring_spec, fps, active, analyzer_spec):
+        self.worker = worker
+        self.key = key
+        self.camera_id = camera_id
+        self.ring = FrameRing.attach(*ring_spec)
+        # reads end as soon as the pipeline is stopped
+        self.reader = RingCapture(self.ring, should_stop=lambda: not self.pipeline.running)
+        self.scheduler = None
+        self.sinks = {v: RemoteSink(worker.channel, key, v, active=bool(active.get(v)))
+                      for v in stream_variants(worker.profiles)}
+        if analyzer_spec:
+            # "module:function" + args -> analyze(frame, frame_idx), e.g. a synthetic load for benchmarks
+            module, func = analyzer_spec[0].split(":")
+            analyze = getattr(importlib.import_module(module), func)(*analyzer_spec[1])
+        else:
+            from src.detector.factory import build_camera_analyzer
+            analyzer, self.scheduler = build_camera_analyzer(camera_id, worker.inference_server(), fps,
+                                                             on_alert=self._on_alert, config=worker.config)
+            analyze = analyzer.analyze
+
+        def analyze_and_report(frame, frame_idx):
+            result = analyze(frame, frame_idx)
+            worker.channel.send(("result", key, plain(result)))
+            return result
+
+        self.pipeline = StreamPipeline(key, self.reader, analyze_and_report, is_live=True, fps=fps,
+                                       outputs=profile_outputs(worker.profiles, self.sinks),
+                                       on_release=self._on_release)
+
+    def start(self):
+        self.pipeline.start()
+        return self
+
+    def set_active(self, flags):
+        for variant, on in flags.items():
+            sink = self.sinks.get(variant)
+            if sink is not None:
+                sink.active = bool(on)
+
+    def stop(self):
+        self.pipeline.stop(timeout=1.0)
+
+    def _on_release(self):
+        self.ring.close()
+        self.worker.jobs.pop(self.key, None)
+        self.worker.channel.send(("stopped", self.key))
+
+    def _on_alert(self, payload, frame, count=0):
+        """
+        The alert goes to the web process right away (broadcast); the screenshot is saved here
+        and its filename follows in an "alert_saved" message (logged by the web process)
+        """
+        payload = plain(payload)
+        detection_type = payload.get("type", "unknown")
+        self.worker.channel.send(("alert", self.key, self.camera_id, payload, count))
+
+        def on_saved(fut):
+            path = fut.result()
+            self.worker.channel.send(("alert_saved", self.key, self.camera_id, payload, count,
+                                      Path(path).name if path else None))
+        self.worker.evidence.submit(frame, self.worker.screenshots_dir,
+                                    prefix=f"{detection_type}_{self.camera_id}",
+                                    copy=False).add_done_callback(on_saved)
+
+    def get_stats(self):
+        stats = self.pipeline.get_stats()
+        stats["ring"] = {"overruns": self.ring.overruns, "seq": self.ring.seq if not self.ring.closed else None}
+        if self.scheduler is not None:
+            stats["scheduler"] = self.scheduler.get_stats()
+        return stats
+
+
+class InferenceWorker:
+    def __init__(self, channel, args):
+        # the detector stack (torch / ONNX Runtime) is only imported by inference workers
+        from src.detector.factory import build_model_registry
+        from src.storage.evidence_writer import EvidenceWriter
+
+        self.channel = channel
+        self.jobs = {}
+        with open(args.config, "r") as f:
+            self.config = yaml.safe_load(f) or {}
+        self.profiles = load_profiles(self.config.get("streaming"))
+        self.screenshots_dir = Path(args.screenshots)
+        self.screenshots_dir.mkdir(parents=True, exist_ok=True)
+        self.evidence = EvidenceWriter(workers=1, max_queue=32, jpeg_quality=90, max_side=1280).start()
+        # The group's own models, with one operator thread per pinned core
+        self.registry = build_model_registry(self.config, threads=len(args.cores) or None)
+        if not args.no_models:
+            self.registry.preload(background=True).start_watcher()
+        self._server = None
+        self._server_lock = threading.Lock()
+        self._running = True
+        threading.Thread(target=self._report_stats, name="worker-stats", daemon=True).start()
+
+    def inference_server(self):
+        """Micro-batching server shared by the group's cameras"""
+        from src.detector.batch_server import BatchInferenceServer
+        from src.detector.factory import build_detector
+
+        with self._server_lock:
+            if self._server is None:
+                self._server = BatchInferenceServer(build_detector(self.registry, self.config),
+                                                    max_batch=8, max_wait_ms=10).start()
+        return self._server
+
+    def handle(self, msg):
+        kind, key = msg[0], msg[1]
+        if kind == "start":
+            camera_id, ring_spec, fps, active, analyzer_spec = msg[2:]
+            try:
+                self.jobs[key] = InferenceJob(self, key, camera_id, ring_spec, fps, active, analyzer_spec).start()
+            except Exception as e:
+                print(f"⚠️ Inference worker could not start {key}: {e}")
+                self.channel.send(("stopped", key))
+        elif kind == "active":
+            job = self.jobs.get(key)
+            if job is not None:
+                job.set_active(msg[2])
+        elif kind == "stop":
+            job = self.jobs.get(key)
+            if job is not None:
+                threading.Thread(target=job.stop, name=f"{key}-stop", daemon=True).start()
+
+    def _report_stats(self):
+        while self._running:
+            time.sleep(STATS_INTERVAL)
+            try:
+                for key, job in list(self.jobs.items()):
+                    self.channel.send(("stats", key, plain(job.get_stats())))
+                self.channel.send(("models", None, self.registry.is_ready(), plain(self.registry.status())))
+            except (OSError, EOFError):
+                return
+            except Exception as e:
+                print(f"⚠️ Worker stats failed: {e}")
+
+    def close(self):
+        self._running = False
+        for job in list(self.jobs.values()):
+            job.stop()
+        if self._server is not None:
+            self._server.stop()
+        self.evidence.stop()
+        self.registry.stop()
+
+
+ROLES = {"capture": CaptureWorker, "inference": InferenceWorker}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--role", choices=sorted(ROLES), required=True)
+    ap.add_argument("--address", required=True, help="web process Listener address")
+    ap.add_argument("--group", type=int, default=0)
+    ap.add_argument("--cores", default="", help="comma-separated CPU indices to pin to")
+    ap.add_argument("--config", default=str(ROOT / "src" / "detector" / "config.yaml"))
+    ap.add_argument("--screenshots", default=str(ROOT / "screenshots"))
+    ap.add_argument("--no-models", action="store_true", help="don't preload models (synthetic analyzers only)")
+    args = ap.parse_args()
+    args.cores = [int(c) for c in args.cores.split(",") if c != ""]
+
+    pin_to_cores(args.cores)
+    conn = Client(args.address, authkey=bytes.fromhex(os.environ[AUTHKEY_ENV]))
+    channel = Channel(conn)
+    worker = ROLES[args.role](channel, args)
+    channel.send(("hello", args.role, args.group, os.getpid()))
+    try:
+        while True:
+            msg = channel.recv()
+            if msg[0] == "exit":
+                break
+            worker.handle(msg)
+    except (EOFError, OSError):
+        pass  # the web process went away
+    finally:
+        worker.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,439 @@
+# src/streaming/workers.py
+# Multi-process stream mode: capture and inference outside the web process.
+#
+# In the default mode every camera's capture, models and JPEG encode run as
+# threads of the Flask-SocketIO process, so they all share one GIL. With
+# `workers: enabled` in config.yaml, cameras are spread over groups; each
+# group is a capture process and an inference process (src/streaming/
+# worker.py) pinned to the group's own cores. Frames go from capture to
+# inference through a shared-memory FrameRing per camera (no pickled
+# arrays); only the encoded JPEGs, results, stats and alerts come back to
+# the web process, which feeds them to the usual StreamHub broadcasters.
+#
+# Workers are started as `python -m src.streaming.worker` rather than with
+# multiprocessing's spawn (which would re-import src/app.py and its stores)
+# or fork (unsafe with the server's threads already running); they connect
+# back to a Listener here with a per-run auth key.
+
+import os
+import secrets
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Listener
+from pathlib import Path
+
+from src.streaming.frame_ring import FrameRing
+from src.streaming.worker import AUTHKEY_ENV
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def core_sets(groups, cores_per_group):
+    """CPU indices of each group: consecutive blocks, wrapping around when groups outnumber the cores"""
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    return [[cpus[(g * cores_per_group + i) % len(cpus)] for i in range(min(cores_per_group, len(cpus)))]
+            for g in range(groups)]
+
+
+class WorkerProcess:
+    """One worker process and the connection it opened back to us"""
+
+    def __init__(self, role, group, cores, proc):
+        self.role = role
+        self.group = group
+        self.cores = cores
+        self.proc = proc
+        self.conn = None
+        self.pid = proc.pid
+        self._send_lock = threading.Lock()
+
+    @property
+    def alive(self):
+        return self.conn is not None and self.proc.poll() is None
+
+    def send(self, msg):
+        with self._send_lock:
+            self.conn.send(msg)
+
+
+class WorkerGroup:
+    def __init__(self, index, cores):
+        self.index = index
+        self.cores = cores
+        self.capture = None
+        self.inference = None
+        self.models_ready = False
+        self.models = {}
+
+    @property
+    def alive(self):
+        return (self.capture is not None and self.capture.alive
+                and self.inference is not None and self.inference.alive)
+
+
+class RemotePipeline:
+    """
+    A camera streaming through a worker group; stands in for a StreamPipeline
+    (running / stop / get_stats / latest_result / wait_released) in the StreamHub.
+    on_release() is called once the capture worker has released the source.
+    """
+
+    def __init__(self, pool, key, camera_id, group, ring, outputs, on_release=None):
+        self.pool = pool
+        self.key = key
+        self.name = camera_id
+        self.camera_id = camera_id
+        self.group = group
+        self.ring = ring
+        self.outputs = outputs
+        self.on_release = on_release
+        self.fps = None
+        self.is_live = False
+        self.error = None
+        self.started_at = None
+        self.stopped_at = None
+        self.frames_received = 0
+        self.bytes_received = 0
+        self.active = {}
+        self._opened = threading.Event()
+        self._released = threading.Event()
+        self._stopped = threading.Event()   # inference worker finished with the ring
+        self._stop = threading.Event()
+        self._keep_outputs = False
+        self._result = None
+        self._stats = {}
+
+    # ----------------- lifecycle -----------------
+    def stop(self, timeout=2.0, close_outputs=True):
+        """Stop the camera in both workers; waits up to `timeout` for the capture to be released"""
+        if close_outputs is False:
+            self._keep_outputs = True
+        first = not self._stop.is_set()
+        self._stop.set()
+        if first:
+            self.stopped_at = time.time()
+            self.pool._send(self.group.capture, ("stop", self.key))
+            self.pool._send(self.group.inference, ("stop", self.key))
+            if not self._keep_outputs:
+                self._close_outputs()
+        if not self._released.wait(timeout):
+            print(f"⚠️ Capture of {self.name} is still open in worker {self.group.index} - "
+                  f"it is released when the read returns")
+
+    def _close_outputs(self):
+        for sink in self.outputs.values():
+            sink.close()
+
+    def _finish(self):
+        """Both workers are done with the camera: free its ring"""
+        if self._released.is_set() and self._stopped.is_set():
+            self.pool._forget(self)
+            self.ring.close()
+
+    def wait_released(self, timeout=None):
+        return self._released.wait(timeout)
+
+    @property
+    def running(self):
+        return not self._stop.is_set()
+
+    def latest_result(self):
+        return self._result
+
+    # ----------------- messages from the workers -----------------
+    def on_message(self, kind, args):
+        if kind == "frame":
+            # a stopped pipeline's broadcasters may already belong to its successor
+            if not self._stop.is_set():
+                sink = self.outputs.get(args[0])
+                if sink is not None:
+                    self.frames_received += 1
+                    self.bytes_received += len(args[1])
+                    sink.put(args[1])
+        elif kind == "result":
+            self._result = args[0]
+        elif kind == "stats":
+            self._stats = args[0]
+        elif kind == "alert":
+            self.pool.on_alert(*args)
+        elif kind == "alert_saved":
+            self.pool.on_alert_saved(*args)
+        elif kind == "opened":
+            self.fps, self.is_live = args
+            self._opened.set()
+        elif kind == "failed":
+            self.error = args[0]  # start_camera() cleans up
+            self._opened.set()
+        elif kind == "released":
+            self._released.set()
+            self._ended()
+            if self.on_release is not None:
+                try:
+                    self.on_release()
+                except Exception as e:
+                    print(f"⚠️ Release callback failed for {self.name}: {e}")
+            self._finish()
+        elif kind == "stopped":
+            self._stopped.set()
+            self._ended()
+            self._finish()
+
+    def _ended(self):
+        """The camera ended on the workers' side (e.g. a live camera failed) without a stop()"""
+        if not self._stop.is_set():
+            self._stop.set()
+            self.stopped_at = time.time()
+            self.pool._send(self.group.capture, ("stop", self.key))
+            self.pool._send(self.group.inference, ("stop", self.key))
+            self._close_outputs()
+
+    def worker_died(self, role):
+        """A worker of the group exited; its side of the camera is gone (an exiting capture closes the source)"""
+        self._opened.set()
+        done = self._released if role == "capture" else self._stopped
+        if not done.is_set():
+            self.on_message("released" if role == "capture" else "stopped", ())
+
+    def get_stats(self):
+        stats = dict(self._stats)
+        stats["worker"] = {"group": self.group.index, "cores": self.group.cores,
+                           "capture_pid": self.group.capture.pid, "inference_pid": self.group.inference.pid,
+                           "frames_received": self.frames_received,
+                           "mb_received": round(self.bytes_received / 1e6, 1)}
+        return stats
+
+
+class WorkerPool:
+    def __init__(self, groups=0, cores_per_group=2, ring_slots=4, max_frame=(1920, 1080),
+                 config_path=None, screenshots_dir=None, on_alert=None, on_alert_saved=None,
+                 analyzer=None, start_timeout=60.0, sync_interval=0.1):
+        """
+        groups: camera groups (0 = one per `cores_per_group` cores of this machine)
+        ring_slots / max_frame: shared-memory slots per camera and their max (width, height)
+        on_alert(camera_id, payload, count): alert raised in a worker, as soon as it is raised
+        on_alert_saved(camera_id, payload, count, screenshot_name): its screenshot was written
+        analyzer: ("module:function", args) building a synthetic analyze(frame, idx) in the
+                  workers instead of the models (benchmarks); models aren't loaded then
+        """
+        if not groups:
+            groups = max(1, (len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity")
+                             else os.cpu_count() or 1) // cores_per_group)
+        self.groups = [WorkerGroup(i, cores) for i, cores in enumerate(core_sets(groups, cores_per_group))]
+        self.ring_slots = ring_slots
+        self.max_w, self.max_h = max_frame
+        self.config_path = str(config_path or ROOT / "src" / "detector" / "config.yaml")
+        self.screenshots_dir = str(screenshots_dir or ROOT / "screenshots")
+        self.on_alert = on_alert or (lambda camera_id, payload, count: None)
+        self.on_alert_saved = on_alert_saved or (lambda camera_id, payload, count, screenshot: None)
+        self.analyzer = analyzer
+        self.start_timeout = start_timeout
+        self.sync_interval = sync_interval
+        self._authkey = secrets.token_bytes(16)
+        self._listener = None
+        self._lock = threading.Lock()
+        self._hello = threading.Condition()
+        self._pending = {}       # (role, group) -> WorkerProcess waiting for its connection
+        self._pipelines = {}     # key -> RemotePipeline
+        self._assigned = {}      # camera_id -> group index (a camera stays on its group)
+        self._counter = 0
+        self._running = False
+        self.respawns = 0
+
+    # ----------------- lifecycle -----------------
+    def start(self):
+        self._listener = Listener(authkey=self._authkey)
+        self._running = True
+        threading.Thread(target=self._accept_loop, name="worker-accept", daemon=True).start()
+        for group in self.groups:
+            self._spawn_group(group)
+        threading.Thread(target=self._sync_loop, name="worker-sync", daemon=True).start()
+        print(f"✅ Started {len(self.groups)} worker group(s): "
+              + ", ".join(f"cores {g.cores}" for g in self.groups))
+        return self
+
+    def stop(self, timeout=5.0):
+        if not self._running:
+            return
+        self._running = False
+        for pipeline in list(self._pipelines.values()):
+            pipeline.stop(timeout=0.5)
+        procs = [w for g in self.groups for w in (g.capture, g.inference) if w is not None]
+        for w in procs:
+            try:
+                w.send(("exit",))
+            except Exception:
+                pass
+        deadline = time.monotonic() + timeout
+        for w in procs:
+            try:
+                w.proc.wait(max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                w.proc.kill()
+        self._listener.close()
+
+    def _spawn_group(self, group):
+        for role in ("capture", "inference"):
+            old = getattr(group, role)
+            if old is None or not old.alive:
+                setattr(group, role, self._spawn(role, group))
+
+    def _spawn(self, role, group):
+        cmd = [sys.executable, "-m", "src.streaming.worker", "--role", role,
+               "--address", str(self._listener.address), "--group", str(group.index),
+               "--cores", ",".join(map(str, group.cores)),
+               "--config", self.config_path, "--screenshots", self.screenshots_dir]
+        if self.analyzer is not None:
+            cmd.append("--no-models")
+        env = dict(os.environ, **{AUTHKEY_ENV: self._authkey.hex()})
+        worker = WorkerProcess(role, group.index, group.cores, subprocess.Popen(cmd, cwd=str(ROOT), env=env))
+        with self._hello:
+            self._pending[(role, group.index)] = worker
+            deadline = time.monotonic() + self.start_timeout
+            while worker.conn is None:
+                if worker.proc.poll() is not None or time.monotonic() >= deadline:
+                    self._pending.pop((role, group.index), None)
+                    worker.proc.kill()
+                    raise RuntimeError(f"{role} worker of group {group.index} did not start")
+                self._hello.wait(0.1)
+        threading.Thread(target=self._recv_loop, args=(worker, group), name=f"worker-{role}-{group.index}",
+                         daemon=True).start()
+        return worker
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                conn = self._listener.accept()
+                hello = conn.recv()
+            except Exception:
+                if not self._running:
+                    return
+                continue
+            _, role, group, pid = hello
+            with self._hello:
+                worker = self._pending.pop((role, group), None)
+                if worker is None or worker.pid != pid:
+                    conn.close()
+                    continue
+                worker.conn = conn
+                self._hello.notify_all()
+
+    # ----------------- cameras -----------------
+    def start_camera(self, camera_id, source, outputs, on_release=None, timeout=10.0):
+        """
+        Stream `source` for camera_id through a worker group into `outputs` (variant -> broadcaster).
+        Returns a RemotePipeline, or None if the source could not be opened.
+        """
+        with self._lock:
+            group = self._pick_group(camera_id)
+            self._counter += 1
+            key = f"{camera_id}#{self._counter}"
+            ring = FrameRing.create(self.ring_slots, self.max_w, self.max_h)
+            pipeline = RemotePipeline(self, key, camera_id, group, ring, outputs, on_release=on_release)
+            self._pipelines[key] = pipeline
+        ring_spec = (ring.name, self.ring_slots, self.max_w, self.max_h)
+        self._send(group.capture, ("start", key, source, ring_spec))
+        if not pipeline._opened.wait(timeout) or pipeline.error is not None:
+            print(f"❌ Worker {group.index} could not open {source}: {pipeline.error or 'timeout'}")
+            pipeline._stop.set()
+            self._send(group.capture, ("stop", key))
+            with self._lock:
+                self._pipelines.pop(key, None)
+            ring.close()
+            return None
+        pipeline.started_at = time.time()
+        pipeline.active = {v: bool(getattr(sink, "active", True)) for v, sink in outputs.items()}
+        self._send(group.inference, ("start", key, camera_id, ring_spec, pipeline.fps, pipeline.active,
+                                     self.analyzer))
+        print(f"📹 {camera_id} streaming in worker group {group.index} (cores {group.cores})")
+        return pipeline
+
+    def _pick_group(self, camera_id):
+        """The camera's previous group if it is still up, else the live group with the fewest cameras (lock held)"""
+        index = self._assigned.get(camera_id)
+        if index is None or not self.groups[index].alive:
+            load = {g.index: 0 for g in self.groups}
+            for p in self._pipelines.values():
+                if p.running:
+                    load[p.group.index] += 1
+            live = [g for g in self.groups if g.alive] or self.groups
+            index = min(live, key=lambda g: (load[g.index], g.index)).index
+            self._assigned[camera_id] = index
+        group = self.groups[index]
+        if not group.alive:
+            self.respawns += 1
+            print(f"♻️ Restarting worker group {index}")
+            self._spawn_group(group)
+        return group
+
+    def _forget(self, pipeline):
+        with self._lock:
+            if self._pipelines.get(pipeline.key) is pipeline:
+                del self._pipelines[pipeline.key]
+
+    def _send(self, worker, msg):
+        if worker is None or worker.conn is None:
+            return  # exited; its cameras were already ended
+        try:
+            worker.send(msg)
+        except Exception as e:
+            print(f"⚠️ Could not reach {worker.role} worker {worker.group}: {e}")
+
+    # ----------------- worker -> web -----------------
+    def _recv_loop(self, worker, group):
+        while True:
+            try:
+                msg = worker.conn.recv()
+            except (EOFError, OSError):
+                break
+            kind, key = msg[0], msg[1]
+            if kind == "models":
+                group.models_ready, group.models = msg[2], msg[3]
+                continue
+            pipeline = self._pipelines.get(key)
+            if pipeline is None:
+                continue  # already forgotten (e.g. a frame in flight after stop)
+            try:
+                pipeline.on_message(kind, msg[2:])
+            except Exception as e:
+                print(f"⚠️ Worker message {kind} for {key} failed: {e}")
+        if self._running:
+            print(f"⚠️ {worker.role} worker of group {group.index} (pid {worker.pid}) exited")
+            worker.conn = None
+            for pipeline in [p for p in self._pipelines.values() if p.group is group]:
+                pipeline.worker_died(worker.role)
+
+    def _sync_loop(self):
+        """Tell the inference workers which variants have viewers (unwatched ones aren't encoded)"""
+        while self._running:
+            time.sleep(self.sync_interval)
+            for pipeline in list(self._pipelines.values()):
+                if not pipeline.running:
+                    continue
+                active = {v: bool(getattr(sink, "active", True)) for v, sink in pipeline.outputs.items()}
+                if active != pipeline.active:
+                    pipeline.active = active
+                    self._send(pipeline.group.inference, ("active", pipeline.key, active))
+
+    # ----------------- metrics -----------------
+    def models_ready(self):
+        return all(g.models_ready for g in self.groups)
+
+    def models_status(self):
+        """Model load state reported by each group's inference worker"""
+        return {g.index: g.models for g in self.groups}
+
+    def get_stats(self):
+        with self._lock:
+            pipelines = list(self._pipelines.values())
+        return {
+            "groups": [{"group": g.index, "cores": g.cores, "alive": g.alive,
+                        "capture_pid": g.capture.pid if g.capture else None,
+                        "inference_pid": g.inference.pid if g.inference else None,
+                        "cameras": sorted(p.camera_id for p in pipelines if p.group is g and p.running),
+                        "models_ready": g.models_ready}
+                       for g in self.groups],
+            "ring": {"slots": self.ring_slots, "max_frame": [self.max_w, self.max_h]},
+            "respawns": self.respawns,
+        }
@@ -1,14 +1,500 @@
 # src/trackers/bytetrack_wrapper.py
-# Minimal wrapper interface so you can replace with ByteTrack later.
+# ByteTrack-style multi-object tracker in vectorized NumPy.
+#
+# Two-stage association as in ByteTrack: tracks are first matched to
+# high-confidence detections, then tracks that are still unmatched get a second
+# chance against low-confidence detections (occluded / blurred people). Matching
+# is on IoU against Kalman-predicted boxes. Track state is one field-major
+# matrix, so predict / Kalman update run over all tracks at once; IoU is only
+# computed for boxes sharing a grid neighbourhood, and the assignment takes the
+# unambiguous pairs in one vectorized pass and solves the rest exactly.
+#
+# Interfaces:
+#   SimpleTrackerWrapper.update([[x1,y1,x2,y2,score,label], ...]) -> [{"id","bbox","score","label"}]
+#     also offers get_oid_centroids / get_stationary / get_oid_rects so it can stand
+#     in for SimpleCentroidTracker in infer_detector.main
+#   SimpleTracker.update([{"bbox","cls","conf"}, ...]) -> {tid: {"bbox","cls","conf"}}
+#     (used by src/utils/train_yolov8.py)
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+
+TRACKED, LOST = 0, 1
+
+# Kalman noise, relative to box height (same weights as ByteTrack)
+_STD_POS = 1.0 / 20
+_STD_VEL = 1.0 / 160
+
+_DENSE_PAIRS = 4096        # below this many box pairs IoU is computed on a dense matrix
+_GRID_CELLS = 4096         # iou_pairs grid: at most 4 cells per box + this many
+_DENSE_ASSIGN = 256 * 256  # ambiguous pairs spanning at most this many cells are solved in one dense LSA
+
+
+# --------------------- box helpers ---------------------
+# Coordinate-major: boxes are (4, N) arrays, one row per coordinate, so every
+# step below works on contiguous rows.
+_XYXY_TO_CXCYWH = np.array([[0.5, 0, 0.5, 0], [0, 0.5, 0, 0.5], [-1, 0, 1, 0], [0, -1, 0, 1]])
+_CXCYWH_TO_XYXY = np.array([[1, 0, -0.5, 0], [0, 1, 0, -0.5], [1, 0, 0.5, 0], [0, 1, 0, 0.5]])
+
+
+def xyxy_to_xyah(b):
+    m = _XYXY_TO_CXCYWH @ b
+    np.maximum(m[3], 1e-6, out=m[3])
+    m[2] /= m[3]
+    return m
+
+
+def xyah_to_xyxy(m):
+    cwh = m.copy()
+    cwh[2] *= m[3]
+    return _CXCYWH_TO_XYXY @ cwh
+
+
+def iou_pairs(a, b, min_iou):
+    """
+    Sparse IoU: (ia, ib, iou) for every pair of boxes in a (N,4) and b (M,4)
+    overlapping by more than min_iou. Boxes of `a` are bucketed by top-left
+    corner into a grid of cells one box wide and one box tall, stored cell by
+    cell, so the candidates of a box of `b` in each row of cells it can overlap
+    are one contiguous run found by two lookups - crowds cost O(N + M +
+    candidates) instead of O(N*M).
+    """
+    empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0))
+    if len(a) == 0 or len(b) == 0:
+        return empty
+    if len(a) * len(b) <= _DENSE_PAIRS:
+        # small sets (2nd/3rd association stage): a dense matrix is cheaper than the sweep
+        iw = np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0])
+        ih = np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1])
+        inter = np.clip(iw, 0, None) * np.clip(ih, 0, None)
+        area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+        area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+        iou = inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+        ia, ib = np.nonzero(iou > min_iou)
+        return ia, ib, iou[ia, ib]
+    # coordinate-major (see box helpers): per-coordinate reductions and gathers on
+    # contiguous rows are several times faster than on the columns of an (N,4) array
+    a, b = np.ascontiguousarray(a.T), np.ascontiguousarray(b.T)
+    size_a, size_b = a[2:4] - a[0:2], b[2:4] - b[0:2]
+    box = np.maximum(size_a.max(axis=1, keepdims=True), 1.0)   # largest (w, h) of a
+    origin = np.minimum(a[0:2].min(axis=1, keepdims=True), b[0:2].min(axis=1, keepdims=True)) - box
+    extent = np.maximum(a[2:4].max(axis=1), b[2:4].max(axis=1)) - origin[:, 0]
+    # cells one box in size, made coarser if that would be many more cells than boxes
+    cell = box * max(1.0, np.sqrt(np.prod(extent / box[:, 0]) / (4 * a.shape[1] + _GRID_CELLS)))
+    nx, ny = (extent / cell[:, 0]).astype(np.int64) + 2
+
+    xy = np.floor((a[0:2] - origin) / cell).astype(np.int64)
+    a_cell = xy[1] * nx + xy[0]
+    order = np.argsort(a_cell)
+    start = np.zeros(nx * ny + 1, dtype=np.int64)
+    np.cumsum(np.bincount(a_cell, minlength=nx * ny), out=start[1:])
+
+    # IoU > t needs an overlap of more than t * b's width and height, so a.x1 lies in
+    # (b.x1 + t*w - wmax, b.x2 - t*w) and a.y1 in (b.y1 + t*h - hmax, b.y2 - t*h): one
+    # run of cells per row of cells, all rows looked up at once
+    margin = min_iou * size_b
+    lo_xy = np.floor((b[0:2] + margin - box - origin) / cell).astype(np.int64)
+    hi_xy = np.floor((b[2:4] - margin - origin) / cell).astype(np.int64)
+    rows = lo_xy[1] + np.arange(int((hi_xy[1] - lo_xy[1]).max()) + 1)[:, None]
+    base = np.minimum(rows, ny - 1) * nx
+    lo = start[base + lo_xy[0]].ravel()
+    counts = np.maximum(start[base + hi_xy[0] + 1].ravel() - lo, 0) * (rows <= hi_xy[1]).ravel()
+    total = int(counts.sum())
+    if total == 0:
+        return empty
+    ib = np.repeat(np.tile(np.arange(b.shape[1]), len(rows)), counts)
+    ia = order[np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(total)]
+
+    pa, pb = np.take(a, ia, axis=1), np.take(b, ib, axis=1)
+    overlap = np.maximum(np.minimum(pa[2:4], pb[2:4]) - np.maximum(pa[0:2], pb[0:2]), 0)
+    inter = overlap[0] * overlap[1]
+    iou = inter / np.maximum((size_a[0] * size_a[1])[ia] + (size_b[0] * size_b[1])[ib] - inter, 1e-9)
+    keep = iou > min_iou
+    return ia[keep], ib[keep], iou[keep]
+
+
+def _best_other(keys, gain, n):
+    """
+    Per pair: whether it is the single best pair of its key and the best gain
+    among the key's other pairs (0 if none)
+    """
+    best = np.zeros(n)
+    np.maximum.at(best, keys, gain)
+    best = best[keys]
+    top = gain == best
+    second = np.zeros(n)
+    np.maximum.at(second, keys[~top], gain[~top])
+    unique_top = top & (np.bincount(keys[top], minlength=n)[keys] == 1)
+    return unique_top, np.where(unique_top, second[keys], best)
+
+
+def sparse_assign(ia, ib, gain, n_a, n_b):
+    """
+    Maximum-gain matching over sparse candidate pairs (gain = IoU above the
+    stage's threshold), which is ByteTrack's cost-limited assignment: a pair is
+    only worth matching for the overlap it adds. A pair whose gain is at least
+    the best other gain of its row plus that of its column belongs to an
+    optimal matching (swapping it in never loses), so unique pairs and clear
+    winners in a crowd - nearly all of them - are taken in one vectorized pass.
+    What stays ambiguous is solved exactly by linear_sum_assignment, on one
+    small dense matrix or per connected cluster.
+    """
+    n = len(ia)
+    if n == 0:
+        return ia, ib
+    # rows and columns as keys 0..n_a-1 and n_a..n_a+n_b-1, handled in one go
+    keys = np.concatenate([ia, ib + n_a])
+    best, other = _best_other(keys, np.concatenate([gain, gain]), n_a + n_b)
+    sure = best[:n] & best[n:] & (gain >= other[:n] + other[n:])
+    if sure.all():
+        return ia, ib
+    # pairs sharing a row or column with a sure match are out
+    used = np.zeros(n_a + n_b, dtype=bool)
+    used[keys[np.concatenate([sure, sure])]] = True
+    rest = ~(used[ia] | used[keys[n:]])
+    if not rest.any():
+        return ia[sure], ib[sure]
+    r, c = _assign_clusters(ia[rest], ib[rest], gain[rest], n_a, n_b)
+    return np.concatenate([ia[sure], r]), np.concatenate([ib[sure], c])
+
+
+def _assign_clusters(ia, ib, gain, n_a, n_b):
+    """Exact maximum-gain matching of the ambiguous pairs (missing pairs gain 0)"""
+    present = np.zeros(n_a + n_b, dtype=bool)
+    present[ia] = True
+    present[ib + n_a] = True
+    ur, uc = np.flatnonzero(present[:n_a]), np.flatnonzero(present[n_a:])
+    index = np.cumsum(present) - 1
+    ri, ci = index[ia], index[ib + n_a] - len(ur)
+    nr = len(ur)
+    if nr * len(uc) <= _DENSE_ASSIGN:
+        m = np.zeros((nr, len(uc)))
+        m[ri, ci] = gain
+        r, c = linear_sum_assignment(m, maximize=True)
+        ok = m[r, c] > 0
+        return ur[r[ok]], uc[c[ok]]
+    graph = coo_matrix((np.ones(len(ri)), (ri, ci + nr)), shape=(nr + len(uc),) * 2)
+    n_comp, comp = connected_components(graph, directed=False)
+    comp_rows = np.bincount(comp[:nr], minlength=n_comp)
+    comp_cols = np.bincount(comp[nr:], minlength=n_comp)
+    pc = comp[ri]
+    small = (comp_rows[pc] <= 2) & (comp_cols[pc] <= 2)
+    rows, cols = [], []
+
+    if small.any():
+        # 2x2 clusters: the better of the two diagonals (missing pairs gain 0)
+        sr, sc, gain_s, k = ri[small], ci[small], gain[small], pc[small]
+        first_r = np.full(n_comp, nr)
+        np.minimum.at(first_r, k, sr)
+        first_c = np.full(n_comp, len(uc))
+        np.minimum.at(first_c, k, sc)
+        lr = (sr != first_r[k]).astype(np.int64)
+        lc = (sc != first_c[k]).astype(np.int64)
+        m = np.zeros((n_comp, 2, 2))
+        m[k, lr, lc] = gain_s
+        anti = (m[:, 0, 1] + m[:, 1, 0]) > (m[:, 0, 0] + m[:, 1, 1])
+        chosen = (lr == lc) != anti[k]
+        rows.append(ur[sr[chosen]])
+        cols.append(uc[sc[chosen]])
+
+    big = ~small
+    if big.any():
+        br, r_inv = np.unique(ri[big], return_inverse=True)
+        bc, c_inv = np.unique(ci[big], return_inverse=True)
+        m = np.zeros((len(br), len(bc)))
+        m[r_inv, c_inv] = gain[big]
+        r, c = linear_sum_assignment(m, maximize=True)
+        ok = m[r, c] > 0
+        rows.append(ur[br[r[ok]]])
+        cols.append(uc[bc[c[ok]]])
+    return np.concatenate(rows), np.concatenate(cols)
+
+
+def match_iou(a, b, min_iou):
+    ia, ib, iou = iou_pairs(a, b, min_iou)
+    return sparse_assign(ia, ib, iou - min_iou, len(a), len(b))
+
+
+# --------------------- core tracker ---------------------
+# Per-track state is one (_COLS, capacity) float matrix, one row per field, so
+# predict / update / compaction are a few contiguous row operations over all
+# tracks instead of one call per array.
+_MEAN, _VAR_P, _COV_PV, _VAR_V, _BOX = slice(0, 8), slice(8, 12), slice(12, 16), slice(16, 20), slice(20, 24)
+_SCORE, _ID, _LAST, _STATE, _CONFIRMED = 24, 25, 26, 27, 28
+_COLS = 29
+
+# Kalman noise per coordinate (cx, cy, aspect, h): std relative to box height, squared,
+# plus the fixed variance of the aspect ratio
+_REL_P = np.array([[_STD_POS], [_STD_POS], [0.0], [_STD_POS]]) ** 2
+_REL_V = np.array([[_STD_VEL], [_STD_VEL], [0.0], [_STD_VEL]]) ** 2
+_ASPECT = np.array([[0.0], [0.0], [1.0], [0.0]])
+_Q = (np.vstack([_REL_P, _REL_V]), np.vstack([_ASPECT * 1e-2 ** 2, _ASPECT * 1e-5 ** 2]))  # process (p; v)
+_R = (_REL_P, _ASPECT * 1e-1 ** 2)                                              # measurement
+_INIT_P, _INIT_V = (4 * _REL_P, _ASPECT * 1e-2 ** 2), (100 * _REL_V, _ASPECT * 1e-5 ** 2)
+
+
+def _noise(h2, spec):
+    """(4,N) (or (8,N) for _Q) variances from squared box heights h2 (N,)"""
+    rel, absolute = spec
+    return rel * h2 + absolute
+
+
+class ByteTracker:
+    def __init__(self, track_thresh=0.5, low_thresh=0.1, match_thresh=0.8,
+                 second_match_thresh=0.5, unconfirmed_match_thresh=0.7,
+                 new_track_thresh=None, max_age=30, capacity=256):
+        """
+        track_thresh: detections at or above this score are 'high' (first association)
+        low_thresh: detections between low_thresh and track_thresh are used in the second association
+        *match_thresh: maximum 1 - IoU cost accepted by each association stage
+        max_age: frames a lost track is kept for re-identification
+        capacity: initial columns of the track state (grows as needed)
+        """
+        self.track_thresh = track_thresh
+        self.low_thresh = low_thresh
+        self.match_thresh = match_thresh
+        self.second_match_thresh = second_match_thresh
+        self.unconfirmed_match_thresh = unconfirmed_match_thresh
+        self.new_track_thresh = new_track_thresh if new_track_thresh is not None else track_thresh + 0.1
+        self.max_age = max_age
+        # one IoU candidate search serves all three stages
+        self._min_iou = 1 - max(match_thresh, second_match_thresh, unconfirmed_match_thresh)
+        self.frame_id = 0
+        self.next_id = 1
+        self.n = 0
+        self._s = np.zeros((_COLS, capacity))
+        self._labels = np.empty(capacity, dtype=object)
+
+    def __len__(self):
+        return self.n
+
+    # read-only (N, k) views of the live tracks
+    @property
+    def ids(self):
+        return self._s[_ID, :self.n].astype(np.int64)
+
+    @property
+    def mean(self):
+        return self._s[_MEAN, :self.n].T
+
+    @property
+    def boxes(self):
+        return self._s[_BOX, :self.n].T
+
+    @property
+    def confirmed(self):
+        return self._s[_CONFIRMED, :self.n] > 0
+
+    # ----------------- Kalman filter -----------------
+    # The constant-velocity filter over (cx, cy, aspect, h) with diagonal noise
+    # keeps each coordinate independent of the others, so the 8x8 covariance is
+    # four 2x2 [position, velocity] blocks, stored as the var_p / cov_pv / var_v
+    # rows; every Kalman step is plain elementwise math.
+    def _predict(self, s):
+        q = _noise(s[3] * s[3], _Q)
+        s[_VAR_P] += 2 * s[_COV_PV] + s[_VAR_V] + q[0:4]
+        s[_COV_PV] += s[_VAR_V]
+        s[_VAR_V] += q[4:8]
+        s[0:4] += s[4:8]
+
+    def _kalman_update(self, s, rows, dets, boxes, scores):
+        """
+        Correct the tracks `rows` with detections `dets` (boxes: (4, N)) and
+        record them. Nearly every track is matched each frame, so the correction
+        runs over all of them with a zero gain for the rest - cheaper than a
+        gather / scatter.
+        """
+        hit = np.zeros(s.shape[1], dtype=bool)
+        hit[rows] = True
+        src = np.zeros(s.shape[1], dtype=np.int64)
+        src[rows] = dets
+        det_boxes = np.take(boxes, src, axis=1)
+        innov = xyxy_to_xyah(det_boxes) - s[0:4]
+        # [var_p; cov_pv] blocks -> [k_p; k_v] gains for the [position; velocity] means
+        pc = s[_VAR_P.start:_COV_PV.stop].reshape(2, 4, -1)
+        k = pc * (hit / (pc[0] + _noise(s[3] * s[3], _R)))
+        s[_MEAN].reshape(2, 4, -1)[:] += k * innov
+        s[_VAR_V] -= k[1] * pc[1]
+        pc -= k[0] * pc
+        np.copyto(s[_BOX], det_boxes, where=hit)
+        np.copyto(s[_SCORE], np.take(scores, src), where=hit)
+        s[_LAST, hit] = self.frame_id
+        s[_STATE, hit] = TRACKED
+
+    # ----------------- association -----------------
+    def update(self, boxes, scores, labels=None):
+        """
+        boxes: (N,4) xyxy, scores: (N,), labels: optional sequence of N labels
+        returns (ids, boxes, scores, labels) of the confirmed tracks matched this frame
+        """
+        self.frame_id += 1
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+        n, nd = self.n, len(boxes)
+        high = scores >= self.track_thresh
+        det_used = np.zeros(nd, dtype=bool)
+
+        if n:
+            s = self._s[:, :n]
+            self._predict(s)
+            confirmed = s[_CONFIRMED] > 0
+            ia, ib, iou = iou_pairs(xyah_to_xyxy(s[0:4]).T, boxes, self._min_iou)
+            pair_conf, pair_high = confirmed[ia], high[ib]
+
+            # 1) confirmed tracks (tracked + lost) vs high-score detections
+            m = pair_conf & pair_high & (iou > 1 - self.match_thresh)
+            rows, dets = sparse_assign(ia[m], ib[m], iou[m] - (1 - self.match_thresh), n, nd)
+            det_used[dets] = True
+            parts = [(rows, dets)]
+
+            # 2) still-unmatched tracked tracks vs low-score detections
+            m = pair_conf & ~pair_high & (iou > 1 - self.second_match_thresh)
+            if m.any():
+                track_used = np.zeros(n, dtype=bool)
+                track_used[rows] = True
+                m &= (scores[ib] >= self.low_thresh) & ~track_used[ia] & (s[_STATE, ia] == TRACKED)
+                if m.any():
+                    parts.append(sparse_assign(ia[m], ib[m], iou[m] - (1 - self.second_match_thresh), n, nd))
+
+            # 3) unconfirmed (one-frame-old) tracks vs remaining high-score detections
+            t3 = None
+            m = ~pair_conf & pair_high & (iou > 1 - self.unconfirmed_match_thresh)
+            if m.any():
+                m &= ~det_used[ib]
+                if m.any():
+                    t3, d3 = sparse_assign(ia[m], ib[m], iou[m] - (1 - self.unconfirmed_match_thresh), n, nd)
+                    det_used[d3] = True
+                    parts.append((t3, d3))
+
+            if len(parts) > 1:
+                rows = np.concatenate([p[0] for p in parts])
+                dets = np.concatenate([p[1] for p in parts])
+            if len(rows):
+                self._kalman_update(s, rows, dets, boxes.T, scores)
+                if labels is not None:
+                    self._labels[rows] = np.asarray(list(labels), dtype=object)[dets]
+            if t3 is not None and len(t3):
+                self._confirm(t3)
+
+            # unmatched tracks: tracked -> lost, unconfirmed -> removed, stale lost -> removed
+            matched = s[_LAST] == self.frame_id
+            lost = ~matched & confirmed
+            s[_STATE, lost] = LOST
+            s[7, lost] = 0  # lost tracks don't keep growing/shrinking
+            keep = (matched | confirmed) & (self.frame_id - s[_LAST] <= self.max_age)
+            if not keep.all():
+                self._keep(keep)
+
+        # new tracks from unmatched confident detections
+        new = np.flatnonzero(high & ~det_used & (scores >= self.new_track_thresh))
+        if len(new):
+            self._add(boxes[new], scores[new], None if labels is None else np.asarray(list(labels), dtype=object)[new])
+
+        s = self._s[:, :self.n]
+        out = np.flatnonzero((s[_LAST] == self.frame_id) & (s[_CONFIRMED] > 0))
+        t = np.take(s[_BOX.start:_ID + 1], out, axis=1)  # box, score, id rows
+        return t[5].astype(np.int64), t[0:4].T, t[4], self._labels[out]
+
+    def _confirm(self, rows):
+        self._s[_CONFIRMED, rows] = 1
+        self._s[_ID, rows] = np.arange(self.next_id, self.next_id + len(rows))
+        self.next_id += len(rows)
+
+    def _keep(self, mask):
+        k = int(mask.sum())
+        self._s[:, :k] = np.compress(mask, self._s[:, :self.n], axis=1)
+        self._labels[:k] = self._labels[:self.n][mask]
+        self._labels[k:self.n] = None
+        self.n = k
+
+    def _add(self, boxes, scores, labels):
+        k = len(boxes)
+        start, end = self.n, self.n + k
+        if end > self._s.shape[1]:
+            cap = max(end, 2 * self._s.shape[1])
+            grown = np.zeros((_COLS, cap))
+            grown[:, :self.n] = self._s[:, :self.n]
+            self._s = grown
+            self._labels = np.concatenate([self._labels, np.empty(cap - len(self._labels), dtype=object)])
+        t = self._s[:, start:end]
+        t[:] = 0
+        t[0:4] = xyxy_to_xyah(boxes.T)
+        h2 = t[3] * t[3]
+        t[_VAR_P] = _noise(h2, _INIT_P)
+        t[_VAR_V] = _noise(h2, _INIT_V)
+        t[_BOX] = boxes.T
+        t[_SCORE] = scores
+        t[_ID] = -1  # until confirmed
+        t[_LAST] = self.frame_id
+        t[_STATE] = TRACKED
+        self._labels[start:end] = labels
+        self.n = end
+        # tracks born on the very first frame are trusted immediately
+        if self.frame_id == 1:
+            self._confirm(np.arange(start, end))
+
+    def predicted_boxes(self):
+        return xyah_to_xyxy(self._s[0:4, :self.n]).T if self.n else np.zeros((0, 4))
+
+
+# --------------------- interface wrappers ---------------------
 class SimpleTrackerWrapper:
-    def __init__(self):
-        # internal storage for tracked objects
+    def __init__(self, max_age=30, **kwargs):
+        self.tracker = ByteTracker(max_age=max_age, **kwargs)
+        # internal storage for tracked objects (id -> last output dict)
         self.tracks = {}
+        self._last_centroid = {}
 
     def update(self, detections):
-        # detections: list of [x1,y1,x2,y2,score,label]
-        # Return list of tracks: dict with id,bbox,label
-        out = []
-        for i,det in enumerate(detections):
-            out.append({"id": i, "bbox": det[:4], "score": det[4], "label": det[5]})
+        """
+        detections: list of [x1,y1,x2,y2,score,label] (plain [x1,y1,x2,y2] counts as a
+        score-1.0 person). Returns list of tracks: dict with id,bbox,score,label
+        """
+        if len(detections) == 0:
+            boxes, scores, labels = np.zeros((0, 4)), np.zeros(0), []
+        else:
+            boxes = np.asarray([d[:4] for d in detections], dtype=np.float64)
+            scores = np.asarray([d[4] if len(d) > 4 else 1.0 for d in detections], dtype=np.float64)
+            labels = [d[5] if len(d) > 5 else "person" for d in detections]
+        ids, tboxes, tscores, tlabels = self.tracker.update(boxes, scores, labels)
+        out = [{"id": int(i), "bbox": [float(v) for v in b], "score": float(s), "label": l}
+               for i, b, s, l in zip(ids, tboxes, tscores, tlabels)]
+        self.tracks = {t["id"]: t for t in out}
         return out
+
+    def get_oid_rects(self):
+        """id -> (x1,y1,x2,y2) of the tracks matched this frame"""
+        return {oid: tuple(int(v) for v in t["bbox"]) for oid, t in self.tracks.items()}
+
+    def get_oid_centroids(self):
+        return {oid: (int((t["bbox"][0] + t["bbox"][2]) / 2), int((t["bbox"][1] + t["bbox"][3]) / 2))
+                for oid, t in self.tracks.items()}
+
+    def get_stationary(self, movement_threshold=15, stationary_seconds=300):
+        stationary = []
+        cents = self.get_oid_centroids()
+        for oid, cent in cents.items():
+            last = self._last_centroid.get(oid, cent)
+            if np.hypot(cent[0] - last[0], cent[1] - last[1]) <= movement_threshold:
+                stationary.append(oid)
+        self._last_centroid = cents
+        return stationary
+
+
+class SimpleTracker:
+    """Dict-in / dict-out tracker used by src/utils/train_yolov8.py"""
+
+    def __init__(self, max_age=30, **kwargs):
+        self.tracker = ByteTracker(max_age=max_age, **kwargs)
+
+    def update(self, dets):
+        """dets: list of {'bbox': [x1,y1,x2,y2], 'cls': int, 'conf': float} -> {tid: {'bbox','cls','conf'}}"""
+        boxes = np.asarray([d["bbox"] for d in dets], dtype=np.float64).reshape(-1, 4)
+        scores = np.asarray([d.get("conf", 1.0) for d in dets], dtype=np.float64)
+        classes = [d.get("cls", 0) for d in dets]
+        ids, tboxes, tscores, tcls = self.tracker.update(boxes, scores, classes)
+        return {int(i): {"bbox": [float(v) for v in b], "cls": int(c), "conf": float(s)}
+                for i, b, s, c in zip(ids, tboxes, tscores, tcls)}
@@ -1,17 +1,399 @@
 # src/utils/alerts.py
+# HTTP alert delivery.
+#
+# post_alert_http sends one alert synchronously. AlertDispatcher does the same
+# off the caller's thread: alerts are queued and delivered by worker threads
+# over a pooled keep-alive session, failures are retried with backoff from a
+# bounded queue, and each alert type can be rate limited, so a slow or down
+# endpoint never stalls the frame loop.
+#
+# Undelivered alerts survive a crash: every queued alert is appended to a
+# JSONL journal when it is submitted, and later lines record its screenshot
+# path, retries and delivery. Replaying the journal gives the pending set.
+# Appends are O(1) and happen outside the dispatcher lock; a background
+# thread rewrites the journal down to the pending alerts once it has grown
+# well past them.
+
 import requests, json, os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future
 from pathlib import Path
 
-def post_alert_http(endpoint, payload, api_key=None, image_path=None):
+from requests.adapters import HTTPAdapter
+
+
+def post_alert_http(endpoint, payload, api_key=None, image_path=None, session=None, timeout=8):
     headers = {}
     if api_key:
         headers["Authorization"] = f"Bearer {api_key}"
-    files = {}
-    if image_path and Path(image_path).exists():
-        files["image"] = open(image_path, "rb")
+    http = session or requests
     try:
-        r = requests.post(endpoint, json=payload, headers=headers, files=files if files else None, timeout=8)
+        if image_path and Path(image_path).exists():
+            with open(image_path, "rb") as f:
+                r = http.post(endpoint, data={"json": json.dumps(payload)}, headers=headers,
+                              files={"image": f}, timeout=timeout)
+        else:
+            r = http.post(endpoint, json=payload, headers=headers, timeout=timeout)
         return r.status_code == 200
     except Exception as e:
         print("post_alert_http failed:", e)
         return False
+
+
+class AlertDispatcher:
+    def __init__(self, endpoint, api_key=None, retry_path=None, workers=2, timeout=8,
+                 max_queue=1000, max_attempts=5, backoff=2.0, max_backoff=60.0,
+                 rate_limits=None, default_rate=None):
+        """
+        retry_path: JSONL journal of undelivered alerts, kept across restarts (None = memory only)
+        max_queue: bound on queued + retrying alerts; the oldest is dropped when full
+        max_attempts: deliveries tried before an alert is given up
+        rate_limits: alert type -> (alerts per second, burst), e.g. {"crowd": (0.1, 1)}
+        default_rate: (alerts per second, burst) for types not in rate_limits (None = unlimited)
+        """
+        self.endpoint = endpoint
+        self.api_key = api_key
+        self.retry_path = Path(retry_path) if retry_path else None
+        self.workers = workers
+        self.timeout = timeout
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.rate_limits = dict(rate_limits or {})
+        self.default_rate = default_rate
+
+        # keep-alive connections shared by the workers
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, workers))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if api_key:
+            self.session.headers["Authorization"] = f"Bearer {api_key}"
+
+        self._queue = deque()            # alerts ready to send
+        self._retry = []                 # alerts waiting for their next attempt
+        self._cond = threading.Condition()
+        self._buckets = {}               # alert type -> [tokens, last refill]
+        self._running = False
+        self._threads = []
+        self._in_flight = {}             # uid -> alert being delivered
+        # journal (see header): appends under _journal_lock only; _tail collects the
+        # lines appended while a compaction is rewriting the file
+        self._journal_lock = threading.Lock()
+        self._journal = None
+        self._journal_lines = 0
+        self._tail = None
+        self._compacting = False
+        self._compact_lock = threading.Lock()    # one rewrite at a time
+        self.stats = {"submitted": 0, "sent": 0, "failed": 0, "retried": 0,
+                      "dropped": 0, "rate_limited": 0, "last_latency_ms": 0.0, "avg_latency_ms": 0.0}
+        self.by_type = {}                # alert type -> {"sent", "failed", "rate_limited"}
+
+    # ----------------- lifecycle -----------------
+    def start(self):
+        if self._running:
+            return self
+        self._load_journal()
+        self._running = True
+        for i in range(self.workers):
+            t = threading.Thread(target=self._loop, name=f"alerts-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self, timeout=5.0):
+        """Give queued alerts up to `timeout` seconds; whatever is left stays in the journal"""
+        if not self._running:
+            return
+        deadline = time.time() + timeout
+        with self._cond:
+            while (self._queue or self._in_flight) and time.time() < deadline:
+                self._cond.wait(0.05)
+            self._running = False
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(max(0.1, deadline - time.time()))
+        self._threads = []
+        self._compact()
+        with self._journal_lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+        self.session.close()
+
+    # ----------------- producers -----------------
+    def submit(self, payload, image_path=None, alert_type=None):
+        """
+        Queue an alert for delivery; returns False if it was rate limited.
+        image_path may be a Future of the path (EvidenceWriter.submit) - it is resolved by the worker.
+        """
+        alert_type = alert_type or payload.get("type", "unknown")
+        with self._cond:
+            self.stats["submitted"] += 1
+            if not self._take_token(alert_type):
+                self.stats["rate_limited"] += 1
+                self._count(alert_type, "rate_limited")
+                return False
+            if image_path and not isinstance(image_path, Future):
+                image_path = str(image_path)
+            item = {"uid": uuid.uuid4().hex, "payload": payload, "image_path": image_path or None,
+                    "type": alert_type, "attempts": 0, "next_try": 0.0}
+            dropped = self._push(item)
+            self._cond.notify()
+        self._log(dict(self._record(item), op="add"))
+        for uid in dropped:
+            self._log({"op": "done", "uid": uid})
+        if isinstance(image_path, Future):
+            # the screenshot path reaches the journal once it is written
+            image_path.add_done_callback(lambda fut, uid=item["uid"]: self._log_image(uid, fut))
+        return True
+
+    def _take_token(self, alert_type):
+        rate = self.rate_limits.get(alert_type, self.default_rate)
+        if rate is None:
+            return True
+        per_sec, burst = rate
+        now = time.time()
+        bucket = self._buckets.setdefault(alert_type, [float(burst), now])
+        bucket[0] = min(float(burst), bucket[0] + (now - bucket[1]) * per_sec)
+        bucket[1] = now
+        if bucket[0] < 1.0:
+            return False
+        bucket[0] -= 1.0
+        return True
+
+    def _push(self, item):
+        """
+        Add to the send queue, dropping the oldest alert when over max_queue (lock held);
+        returns the uids of the dropped alerts
+        """
+        self._queue.append(item)
+        dropped = []
+        while len(self._queue) + len(self._retry) > self.max_queue:
+            victims = self._retry if self._retry else self._queue
+            if victims is self._retry:
+                victims.sort(key=lambda it: it["next_try"])
+                dropped.append(victims.pop(0)["uid"])
+            else:
+                dropped.append(victims.popleft()["uid"])
+            self.stats["dropped"] += 1
+        return dropped
+
+    # ----------------- workers -----------------
+    def _loop(self):
+        while True:
+            with self._cond:
+                item = None
+                while self._running:
+                    item = self._next_item()
+                    if item is not None:
+                        break
+                    self._cond.wait(self._wait_time())
+                if item is None:
+                    return  # stopped; leftovers stay in the journal
+                self._in_flight[item["uid"]] = item
+            try:
+                self._deliver(item)
+            finally:
+                with self._cond:
+                    self._in_flight.pop(item["uid"], None)
+                    self._cond.notify_all()
+
+    def _next_item(self):
+        """Next alert to send: queued ones first, then retries that are due (lock held)"""
+        if self._queue:
+            return self._queue.popleft()
+        now = time.time()
+        for i, it in enumerate(self._retry):
+            if it["next_try"] <= now:
+                return self._retry.pop(i)
+        return None
+
+    def _wait_time(self):
+        if not self._retry:
+            return 1.0
+        return max(0.01, min(1.0, min(it["next_try"] for it in self._retry) - time.time()))
+
+    def _deliver(self, item):
+        if isinstance(item["image_path"], Future):
+            try:
+                path = item["image_path"].result(timeout=self.timeout)
+            except Exception:
+                path = None
+            with self._cond:
+                item["image_path"] = path
+        t0 = time.time()
+        status = None
+        try:
+            if item["image_path"] and Path(item["image_path"]).exists():
+                with open(item["image_path"], "rb") as f:
+                    r = self.session.post(self.endpoint, data={"json": json.dumps(item["payload"])},
+                                          files={"image": f}, timeout=self.timeout)
+            else:
+                r = self.session.post(self.endpoint, json=item["payload"], timeout=self.timeout)
+            status = r.status_code
+        except Exception as e:
+            print(f"⚠ Alert delivery failed ({item['type']}): {e}")
+
+        latency_ms = (time.time() - t0) * 1000
+        with self._cond:
+            self.stats["last_latency_ms"] = round(latency_ms, 1)
+            self.stats["avg_latency_ms"] = round(0.9 * self.stats["avg_latency_ms"] + 0.1 * latency_ms
+                                                 if self.stats["sent"] else latency_ms, 1)
+            if status is not None and 200 <= status < 300:
+                self.stats["sent"] += 1
+                self._count(item["type"], "sent")
+                record = {"op": "done", "uid": item["uid"]}
+            else:
+                record = self._failed(item, status)
+        self._log(record)
+
+    def _failed(self, item, status):
+        """Give up on or schedule a retry of a failed alert (lock held); returns its journal record"""
+        item["attempts"] += 1
+        # client errors other than 408/429 won't get better by retrying
+        permanent = status is not None and 400 <= status < 500 and status not in (408, 429)
+        if permanent or item["attempts"] >= self.max_attempts:
+            self.stats["failed"] += 1
+            self._count(item["type"], "failed")
+            print(f"❌ Giving up on {item['type']} alert after {item['attempts']} attempt(s) (status {status})")
+            return {"op": "done", "uid": item["uid"]}
+        self.stats["retried"] += 1
+        item["next_try"] = time.time() + min(self.max_backoff, self.backoff * 2 ** (item["attempts"] - 1))
+        self._retry.append(item)
+        return {"op": "retry", "uid": item["uid"], "attempts": item["attempts"]}
+
+    def _count(self, alert_type, key):
+        counts = self.by_type.setdefault(alert_type, {"sent": 0, "failed": 0, "rate_limited": 0})
+        counts[key] += 1
+
+    # ----------------- persistence -----------------
+    @staticmethod
+    def _record(item):
+        """Journal form of an alert (a screenshot still being written is recorded later)"""
+        path = item["image_path"]
+        if isinstance(path, Future):
+            try:
+                path = path.result(timeout=0)
+            except BaseException:
+                path = None
+        return {"uid": item["uid"], "payload": item["payload"], "image_path": path,
+                "type": item["type"], "attempts": item["attempts"]}
+
+    def _log_image(self, uid, fut):
+        try:
+            path = fut.result()
+        except BaseException:
+            return
+        if path:
+            self._log({"op": "image", "uid": uid, "image_path": str(path)})
+
+    def _log(self, record):
+        """Append one line to the journal; compacts it in the background once it is mostly history"""
+        if self.retry_path is None:
+            return
+        line = json.dumps(record) + "\n"
+        with self._journal_lock:
+            try:
+                if self._journal is None:
+                    self.retry_path.parent.mkdir(parents=True, exist_ok=True)
+                    self._journal = open(self.retry_path, "a")
+                self._journal.write(line)
+                self._journal.flush()
+            except Exception as e:
+                print(f"⚠ Could not append to alert journal: {e}")
+                return
+            self._journal_lines += 1
+            if self._tail is not None:
+                self._tail.append(line)
+            pending = len(self._queue) + len(self._retry) + len(self._in_flight)  # unlocked read: an estimate
+            if self._compacting or self._journal_lines < 2 * pending + 256:
+                return
+            self._compacting = True
+        threading.Thread(target=self._compact, name="alerts-journal", daemon=True).start()
+
+    def _compact(self):
+        """Rewrite the journal as one 'add' line per pending alert, off the dispatcher lock"""
+        if self.retry_path is None:
+            return
+        with self._compact_lock:
+            try:
+                self._rewrite_journal()
+            except Exception as e:
+                print(f"⚠ Could not compact alert journal: {e}")
+            finally:
+                with self._journal_lock:
+                    self._tail = None
+                    self._compacting = False
+
+    def _rewrite_journal(self):
+        with self._journal_lock:
+            self._tail = []
+        with self._cond:
+            pending = [self._record(it) for it in
+                       list(self._retry) + list(self._queue) + list(self._in_flight.values())]
+        tmp = self.retry_path.with_suffix(".tmp")
+        self.retry_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "w") as f:
+            for rec in pending:
+                f.write(json.dumps(dict(rec, op="add")) + "\n")
+        with self._journal_lock:
+            # lines appended since the snapshot go after it (replay is idempotent per uid)
+            with open(tmp, "a") as f:
+                f.writelines(self._tail)
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            os.replace(tmp, self.retry_path)
+            self._journal = open(self.retry_path, "a")
+            self._journal_lines = len(pending) + len(self._tail)
+
+    def _load_journal(self):
+        """Replay the journal into the send queue"""
+        if self.retry_path is None or not self.retry_path.exists():
+            return
+        # a worker can finish an alert before the producer has logged it, so a 'done'
+        # may come before its 'add'; updates are applied after the whole file is read
+        pending, done, images, attempts = {}, set(), {}, {}
+        with open(self.retry_path) as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash
+                op, uid = rec.pop("op", "add"), rec.get("uid") or uuid.uuid4().hex
+                if op == "add":
+                    rec["uid"] = uid
+                    pending.setdefault(uid, rec)
+                elif op == "done":
+                    done.add(uid)
+                elif op == "image":
+                    images[uid] = rec.get("image_path")
+                elif op == "retry":
+                    attempts[uid] = max(attempts.get(uid, 0), rec.get("attempts", 0))
+        for uid in done:
+            pending.pop(uid, None)
+        for uid, item in pending.items():
+            item["image_path"] = item.get("image_path") or images.get(uid)
+            item["attempts"] = max(item.get("attempts", 0), attempts.get(uid, 0))
+        with self._cond:
+            for item in pending.values():
+                item["next_try"] = 0.0
+                self._push(item)
+        self._compact()
+        if pending:
+            print(f"🔁 Re-queued {len(pending)} undelivered alert(s) from {self.retry_path.name}")
+
+    # ----------------- metrics -----------------
+    def get_stats(self):
+        with self._cond:
+            out = dict(self.stats)
+            out["queued"] = len(self._queue)
+            out["retrying"] = len(self._retry)
+            out["in_flight"] = len(self._in_flight)
+            out["by_type"] = {k: dict(v) for k, v in self.by_type.items()}
+        return out
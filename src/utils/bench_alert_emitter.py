@@ -0,0 +1,79 @@
+# src/utils/bench_alert_emitter.py
+# Socket.IO traffic of a weapon in view on many cameras (each raising alerts
+# several times a second between the stream and the posted /api/alerts),
+# plus a one-off burst of crowd alerts: direct emit per alert (before) vs
+# AlertEmitter (dedupe window, batched emits, bounded queue). Counts the
+# emit calls and alerts each browser receives, what was suppressed or
+# dropped, and the caller-side cost of submit().
+#
+#   python src/utils/bench_alert_emitter.py --cameras 16 --rate 10 --seconds 10
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.streaming.alert_emitter import AlertEmitter
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cameras", type=int, default=16)
+    ap.add_argument("--rate", type=float, default=10.0, help="weapon alerts per second per camera")
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--burst", type=int, default=500, help="crowd alerts (distinct cameras) at mid-run")
+    ap.add_argument("--window", type=float, default=5.0)
+    ap.add_argument("--max-queue", type=int, default=50)
+    args = ap.parse_args()
+
+    emits = []  # (alerts in the message, bytes)
+    emitter = AlertEmitter(lambda ev, alerts, room: emits.append((len(alerts), len(json.dumps(alerts)))),
+                           window=args.window, max_queue=args.max_queue).start()
+
+    def alert(camera, kind, severity):
+        return {"type": kind, "camera": camera, "confidence": 0.87, "severity": severity,
+                "timestamp": datetime.now().isoformat()}
+
+    submit_us, direct = [], []
+    step = 1.0 / args.rate
+    t_start = time.perf_counter()
+    next_tick, burst_done = t_start, False
+    while time.perf_counter() - t_start < args.seconds:
+        batch = [alert(f"Cam-{c}", "weapon", "high") for c in range(args.cameras)]
+        if not burst_done and time.perf_counter() - t_start >= args.seconds / 2:
+            batch += [alert(f"Crowd-{i}", "crowd", "medium") for i in range(args.burst)]
+            burst_done = True
+        for a in batch:
+            direct.append(len(json.dumps(a)))  # before: one emit of one alert each
+            t0 = time.perf_counter()
+            emitter.submit(a)
+            submit_us.append((time.perf_counter() - t0) * 1e6)
+        next_tick += step
+        time.sleep(max(0.0, next_tick - time.perf_counter()))
+    emitter.stop()
+    stats = emitter.get_stats()
+
+    secs = args.seconds
+    print(f"\n{args.cameras} cameras x {args.rate:g} weapon alerts/s for {secs:g} s, "
+          f"+{args.burst} crowd alerts at {secs / 2:g} s (window {args.window:g} s, queue {args.max_queue})")
+    print(f"{'':>22}{'emits/s':>10}{'alerts/s':>10}{'kB/s per browser':>18}")
+    print(f"{'direct emit':>22}{len(direct) / secs:>10.0f}{len(direct) / secs:>10.0f}{sum(direct) / secs / 1e3:>18.1f}")
+    n_alerts = sum(n for n, _ in emits)
+    print(f"{'AlertEmitter':>22}{len(emits) / secs:>10.1f}{n_alerts / secs:>10.1f}"
+          f"{sum(b for _, b in emits) / secs / 1e3:>18.1f}")
+    print(f"submitted {stats['submitted']}, emitted {stats['emitted']}, suppressed {stats['suppressed']}, "
+          f"dropped {stats['dropped']}")
+    for kind, c in stats["by_type"].items():
+        print(f"  {kind:>8}: {c}")
+    print(f"submit(): median {statistics.median(submit_us):.1f} us, p99 "
+          f"{sorted(submit_us)[int(0.99 * len(submit_us))]:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
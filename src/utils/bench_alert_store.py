@@ -0,0 +1,110 @@
+# src/utils/bench_alert_store.py
+# Insert and list latency of the SQLite AlertStore behind /api/alerts with a
+# large number of stored alerts, and the old one-JSON-file-per-alert scheme
+# (glob to name a new file, glob + sort to list) at a smaller size for
+# comparison.
+#
+#   python src/utils/bench_alert_store.py --alerts 1000000 --legacy 20000
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.storage.alert_store import AlertStore
+
+TYPES = ["crowd"] * 70 + ["weapon"] * 15 + ["fight"] * 14 + ["intrusion"]  # intrusion: 1% - a rare filter
+CAMERAS = [f"Cam-{i}" for i in range(1, 9)]
+
+
+def fill(store, n, start, rng, batch=20000):
+    """
+    n alerts received one second apart from `start`, stamped 2 s earlier by their camera
+    (bulk SQL - add() per row would take minutes)
+    """
+    conn = store._conn()
+    for i in range(0, n, batch):
+        alerts = [{"type": rng.choice(TYPES), "camera": rng.choice(CAMERAS), "severity": "high",
+                   "confidence": round(rng.random(), 3)} for _ in range(min(batch, n - i))]
+        with conn:
+            conn.executemany("INSERT INTO alerts (received, ts, type, camera, severity, data) "
+                             "VALUES (?, ?, ?, ?, ?, ?)",
+                             [(start + i + j, start + i + j - 2, a["type"], a["camera"], a["severity"], json.dumps(a))
+                              for j, a in enumerate(alerts)])
+
+
+def timed(fn, reps=20):
+    """median ms of fn()"""
+    out = []
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(out)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--alerts", type=int, default=1_000_000)
+    ap.add_argument("--legacy", type=int, default=20000, help="alert files for the old scheme (0 = skip)")
+    ap.add_argument("--limit", type=int, default=50)
+    args = ap.parse_args()
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AlertStore(Path(tmp) / "alerts.db")
+        start = 1_700_000_000.0
+        t0 = time.perf_counter()
+        fill(store, args.alerts, start, rng)
+        print(f"\nfilled {store.count():,} alerts in {time.perf_counter() - t0:.1f} s")
+
+        insert_ms = timed(lambda: store.add({"type": "weapon", "camera": "Cam-1", "severity": "high"}), reps=200)
+        last = store.last_id()
+        mid = last // 2
+        _, cursor = store.query(limit=args.limit)
+        cases = [
+            ("first page", dict()),
+            ("second page (cursor)", dict(cursor=cursor)),
+            ("page at the middle", dict(cursor=mid)),
+            ("type=weapon", dict(type="weapon")),
+            ("camera=Cam-3 type=fight", dict(camera="Cam-3", type="fight")),
+            ("type=intrusion (1%), deep", dict(type="intrusion", cursor=mid)),
+            ("last hour", dict(since=start + args.alerts - 3600)),
+            ("1 day window mid-history", dict(since=start + mid - 86400, until=start + mid)),
+            ("1 day window, second page", dict(since=start + mid - 86400, until=start + mid, cursor=mid - 100)),
+            ("1 day window + type=fight", dict(since=start + mid - 86400, until=start + mid, type="fight")),
+            ("alert timestamp, 1 day", dict(ts_since=start + mid - 86400, ts_until=start + mid)),
+        ]
+        print(f"{'insert one alert':>30}: {insert_ms:7.2f} ms")
+        for label, kwargs in cases:
+            ms = timed(lambda: store.query(limit=args.limit, **kwargs))
+            n = len(store.query(limit=args.limit, **kwargs)[0])
+            print(f"{label:>30}: {ms:7.2f} ms  ({n} alerts)")
+        store.close()
+
+    if args.legacy:
+        with tempfile.TemporaryDirectory() as tmp:
+            d = Path(tmp)
+            for i in range(args.legacy):
+                (d / f"alert_{i + 1}.json").write_text("{}")
+
+            def legacy_insert():
+                fname = d / f"alert_{len(list(d.glob('*.json'))) + 1}.json"
+                fname.write_text(json.dumps({"type": "weapon"}))
+
+            legacy_insert_ms = timed(legacy_insert, reps=5)
+            legacy_list_ms = timed(lambda: sorted([p.name for p in d.glob("*.json")], reverse=True), reps=5)
+            print(f"\nold alert_<N>.json files, {args.legacy:,} alerts:")
+            print(f"{'insert one alert':>30}: {legacy_insert_ms:7.2f} ms")
+            print(f"{'list (all names)':>30}: {legacy_list_ms:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
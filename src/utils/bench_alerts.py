@@ -0,0 +1,106 @@
+# src/utils/bench_alerts.py
+# Alert delivery against a local stub HTTP server: how long the frame loop is
+# blocked per alert with the old synchronous post vs AlertDispatcher.submit,
+# and what the dispatcher delivered, retried and dropped.
+#
+#   python src/utils/bench_alerts.py --alerts 50 --delay 0.2 --fail-rate 0.3
+#
+# The stub answers after --delay seconds and returns 503 for --fail-rate of
+# the requests, so retries and backoff get exercised too.
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.utils.alerts import AlertDispatcher, post_alert_http
+
+
+def start_stub(delay, fail_rate, seed=0):
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is visible
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(delay)
+            with lock:
+                fail = rng.random() < fail_rate
+                if not fail:
+                    received.append(len(body))
+            status = 503 if fail else 200
+            reply = json.dumps({"status": "error" if fail else "ok"}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(reply)))
+            self.end_headers()
+            self.wfile.write(reply)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, received
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--alerts", type=int, default=50)
+    ap.add_argument("--delay", type=float, default=0.2, help="stub response time (s)")
+    ap.add_argument("--fail-rate", type=float, default=0.3, help="fraction of 503 responses")
+    args = ap.parse_args()
+
+    server, received = start_stub(args.delay, args.fail_rate)
+    url = f"http://127.0.0.1:{server.server_address[1]}/api/alerts"
+    alerts = [{"type": ("weapon", "fight", "crowd")[i % 3], "n": i} for i in range(args.alerts)]
+
+    n_sync = min(args.alerts, 10)
+    t0 = time.perf_counter()
+    for a in alerts[:n_sync]:
+        post_alert_http(url, a)
+    sync_ms = (time.perf_counter() - t0) / n_sync * 1000
+    print(f"\nsynchronous post_alert_http: {sync_ms:.1f} ms blocked per alert ({n_sync} alerts)")
+
+    received.clear()
+    with tempfile.TemporaryDirectory() as tmp:
+        dispatcher = AlertDispatcher(url, retry_path=Path(tmp) / "retry.jsonl", workers=2,
+                                     backoff=0.1, max_backoff=1.0, max_attempts=8,
+                                     rate_limits={"crowd": (1.0, 5)}).start()
+        t0 = time.perf_counter()
+        for a in alerts:
+            dispatcher.submit(a)
+        submit_us = (time.perf_counter() - t0) / len(alerts) * 1e6
+        print(f"AlertDispatcher.submit:      {submit_us:.1f} us blocked per alert ({len(alerts)} alerts)")
+
+        t0 = time.perf_counter()
+        while True:
+            st = dispatcher.get_stats()
+            if st["queued"] + st["retrying"] + st["in_flight"] == 0 or time.perf_counter() - t0 > 60:
+                break
+            time.sleep(0.05)
+        print(f"delivered in background in {time.perf_counter() - t0:.1f} s")
+        dispatcher.stop()
+        st = dispatcher.get_stats()
+
+    print(f"stub received {len(received)} alert(s)")
+    for key in ("submitted", "sent", "retried", "failed", "rate_limited", "dropped", "avg_latency_ms"):
+        print(f"  {key:>15}: {st[key]}")
+    for alert_type, counts in sorted(st["by_type"].items()):
+        print(f"  {alert_type:>15}: {counts}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
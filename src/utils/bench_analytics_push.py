@@ -0,0 +1,91 @@
+# src/utils/bench_analytics_push.py
+# Bytes each open Analytics page receives per minute: the old 10-second poll
+# of the whole day's events, the same poll of the rollups (the three
+# aggregate requests) and the coalesced Socket.IO deltas of AnalyticsFeed
+# (one per second while events arrive), at a given number of events already
+# logged today and a live event rate. Also reports the server time of one
+# delta flush (shared by every subscriber of a room).
+#
+#   python src/utils/bench_analytics_push.py --today 20000 --rate 2
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.storage.event_store import DetectionEventStore, make_event
+from src.storage.rollups import DetectionRollups
+from src.streaming.analytics_feed import AnalyticsFeed
+
+TYPES = ["crowd"] * 70 + ["weapon"] * 15 + ["fight"] * 15
+CAMERAS = [f"Cam-{i}" for i in range(1, 9)]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--today", type=int, default=20000, help="events already logged today")
+    ap.add_argument("--rate", type=float, default=2.0, help="new events per second")
+    ap.add_argument("--minutes", type=int, default=5)
+    args = ap.parse_args()
+    rng = random.Random(0)
+
+    def event(t):
+        return make_event(rng.choice(CAMERAS), rng.choice(TYPES), count=1,
+                          confidence=round(rng.uniform(0.3, 1.0), 3), timestamp=t.isoformat())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = DetectionEventStore(Path(tmp))  # not started: writes (and listeners) run inline
+        rollups = DetectionRollups(Path(tmp) / "rollups.db").attach(store)
+        sent = {}  # room -> [payload bytes]
+        feed = AnalyticsFeed(rollups, lambda ev, data, room: sent.setdefault(room, []).append(len(json.dumps(data))))
+        store.add_listener(feed.add)
+
+        now = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+        step = 12 * 3600 / args.today
+        for i in range(0, args.today, 1000):
+            store._write_batch([event(now - timedelta(seconds=(args.today - j) * step))
+                                for j in range(i, min(i + 1000, args.today))])
+        feed.flush()
+        sent.clear()
+
+        poll_bytes, rollup_bytes, flush_ms, carry = [], [], [], 0.0
+        seconds = args.minutes * 60
+        for s in range(seconds):
+            t = now + timedelta(seconds=s)
+            carry += args.rate
+            n, carry = int(carry), carry - int(carry)
+            if n:
+                store._write_batch([event(t) for _ in range(n)])
+            feed.flush()
+            flush_ms.append(feed.last_flush_ms)
+            if s % 10 == 0:
+                today = t.strftime("%Y-%m-%d")
+                poll_bytes.append(len(json.dumps(store.read_day(today))))
+                rollup_bytes.append(len(json.dumps(rollups.aggregate("hour", today, today)))
+                                    + len(json.dumps(rollups.aggregate("minute", (t - timedelta(hours=2)).isoformat())))
+                                    + len(json.dumps(rollups.latest(10))))
+        rollups.close()
+
+    per_min = lambda total: total / args.minutes / 1e3
+    all_bytes = sent.get("analytics:all", [])
+    cam_bytes = sent.get("analytics:Cam-1", [])
+    print(f"\n{args.today:,} events today, {args.rate:g} new events/s, {args.minutes} min")
+    print(f"{'old: full-day poll every 10 s':>36}: {per_min(sum(poll_bytes)):>9.1f} kB/min per browser "
+          f"({statistics.mean(poll_bytes) / 1e6:.1f} MB per poll)")
+    print(f"{'rollup poll every 10 s':>36}: {per_min(sum(rollup_bytes)):>9.1f} kB/min per browser")
+    print(f"{'push: all-cameras deltas':>36}: {per_min(sum(all_bytes)):>9.1f} kB/min per browser "
+          f"({len(all_bytes)} deltas, {statistics.mean(all_bytes) / 1e3:.1f} kB each)")
+    if cam_bytes:
+        print(f"{'push: one camera deltas':>36}: {per_min(sum(cam_bytes)):>9.1f} kB/min per browser")
+    print(f"delta flush (all rooms): median {statistics.median(flush_ms):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
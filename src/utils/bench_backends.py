@@ -0,0 +1,125 @@
+# src/utils/bench_backends.py
+# Latency of one detector per inference backend (PyTorch, ONNX Runtime,
+# OpenVINO) on the letterboxed tensors MultiHeadDetector feeds the models,
+# and how closely the exported backends' boxes match PyTorch.
+#
+#   python src/utils/bench_backends.py --weights models/crowd_yolo6/weights/best.pt --threads 1 2 4
+#
+# Exports go through the same hash-keyed cache as load_yolo, so a second run
+# skips the export. Parity is checked on the exported model run by its own
+# runtime (ONNX Runtime / OpenVINO) against PyTorch on the same tensors;
+# backends whose runtime is not installed are reported as unverified and
+# skipped.
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from ultralytics import YOLO
+from src.detector.backends import load_exported
+from src.detector.multi_head import MultiHeadDetector
+
+
+def box_iou(a, b):
+    ix = np.clip(np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0]), 0, None)
+    iy = np.clip(np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1]), 0, None)
+    inter = ix * iy
+    area = lambda x: (x[:, 2] - x[:, 0]) * (x[:, 3] - x[:, 1])
+    return inter / (area(a)[:, None] + area(b)[None, :] - inter + 1e-9)
+
+
+def compare(ref, other):
+    """(box count difference, worst best-match IoU, max |conf diff| of matched boxes) over a batch"""
+    count_diff, worst_iou, conf_diff = 0, 1.0, 0.0
+    for r, o in zip(ref, other):
+        rb, ob = r.boxes.xyxy.cpu().numpy(), o.boxes.xyxy.cpu().numpy()
+        count_diff = max(count_diff, abs(len(rb) - len(ob)))
+        if len(rb) == 0 or len(ob) == 0:
+            continue
+        iou = box_iou(rb, ob)
+        best = iou.argmax(axis=1)
+        worst_iou = min(worst_iou, float(iou.max(axis=1).min()))
+        conf_diff = max(conf_diff, float(np.abs(r.boxes.conf.cpu().numpy() - o.boxes.conf.cpu().numpy()[best]).max()))
+    return count_diff, worst_iou, conf_diff
+
+
+def parity_ok(count_diff, worst_iou, conf_diff):
+    """Same boxes as PyTorch up to the runtime's float differences"""
+    return count_diff == 0 and worst_iou >= 0.99 and conf_diff <= 1e-3
+
+
+def time_predict(model, tensor, conf, reps):
+    model.predict(tensor, conf=conf, verbose=False)  # warm-up
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        out = model.predict(tensor, conf=conf, verbose=False)
+    return (time.perf_counter() - t0) / reps * 1000, out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--weights", default=str(ROOT / "models/crowd_yolo6/weights/best.pt"))
+    ap.add_argument("--backends", nargs="+", default=["torch", "onnx", "openvino"])
+    ap.add_argument("--threads", type=int, nargs="+", default=[0], help="intra-op threads to try (0 = runtime default)")
+    ap.add_argument("--batch", type=int, nargs="+", default=[1, 4])
+    ap.add_argument("--reps", type=int, default=10)
+    ap.add_argument("--conf", type=float, default=0.25)
+    ap.add_argument("--width", type=int, default=1280)
+    ap.add_argument("--height", type=int, default=720)
+    ap.add_argument("--cache-dir", default=None)
+    args = ap.parse_args()
+
+    tmp = None
+    weights = Path(args.weights)
+    conf = args.conf
+    if not weights.exists():
+        # Same architecture/compute without trained weights - fine for timing; the near-zero
+        # scores of an untrained head need a tiny conf to give boxes to compare
+        print(f"⚠ Weights not found ({weights}), using an untrained yolov8n instead")
+        tmp = tempfile.TemporaryDirectory()
+        weights = Path(tmp.name) / "yolov8n_untrained.pt"
+        YOLO("yolov8n.yaml").save(str(weights))
+        conf = 1e-6
+        args.cache_dir = args.cache_dir or tmp.name
+
+    torch_model = YOLO(str(weights))
+    frame = np.random.default_rng(0).integers(0, 255, (args.height, args.width, 3), dtype=np.uint8)
+    pre = MultiHeadDetector()
+
+    print(f"\n{'backend':>10}{'threads':>9}{'batch':>7}{'ms/call':>9}{'ms/frame':>10}"
+          f"{'Δcount':>8}{'min IoU':>9}{'Δconf':>8}{'parity':>8}")
+    for n in args.batch:
+        tensor, _ = pre.preprocess([frame] * n)
+        ref_ms, ref = time_predict(torch_model, tensor, conf, args.reps)
+        if "torch" in args.backends:
+            print(f"{'torch':>10}{torch.get_num_threads():>9}{n:>7}{ref_ms:>9.1f}{ref_ms / n:>10.1f}"
+                  f"{0:>8}{1.0:>9.3f}{0.0:>8.4f}{'ref':>8}")
+        for backend in args.backends:
+            if backend == "torch":
+                continue
+            for threads in args.threads:
+                try:
+                    model = load_exported(weights, backend, threads=threads, cache_dir=args.cache_dir)
+                except Exception as e:
+                    print(f"{backend:>10}  unavailable, parity NOT verified: {e}")
+                    break
+                ms, out = time_predict(model, tensor, conf, args.reps)
+                count_diff, worst_iou, conf_diff = compare(ref, out)
+                verdict = "ok" if parity_ok(count_diff, worst_iou, conf_diff) else "FAIL"
+                print(f"{backend:>10}{threads or 'auto':>9}{n:>7}{ms:>9.1f}{ms / n:>10.1f}"
+                      f"{count_diff:>8}{worst_iou:>9.3f}{conf_diff:>8.4f}{verdict:>8}")
+
+    if tmp is not None:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# src/utils/bench_bytetrack.py
+# Throughput of the ByteTrack-style tracker (src/trackers/bytetrack_wrapper.py)
+# on synthetic crowds, reported in tracks*frames per millisecond, plus ID
+# switches against the ground-truth identities. Timing is the best of
+# --repeat runs, as a busy machine easily adds 30% to a single run; each size
+# is marked against the --target rate.
+#
+#   python src/utils/bench_bytetrack.py --sizes 50 200 500 1000 --frames 200 --repeat 3
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.trackers.bytetrack_wrapper import ByteTracker
+
+
+def make_scene(n, frames, w=3840, h=2160, seed=0, miss_rate=0.05):
+    """People walking with constant velocity + jitter; some detections drop to low score"""
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform([30, 60], [w - 30, h - 60], size=(n, 2))
+    vel = rng.normal(0, 3, size=(n, 2))
+    size = rng.uniform([20, 50], [40, 100], size=(n, 2))
+    out = []
+    for _ in range(frames):
+        pos = np.clip(pos + vel + rng.normal(0, 1, size=pos.shape), [30, 60], [w - 30, h - 60])
+        boxes = np.concatenate([pos - size / 2, pos + size / 2], axis=1)
+        scores = np.where(rng.random(n) < miss_rate, rng.uniform(0.15, 0.45, n), rng.uniform(0.6, 0.95, n))
+        order = rng.permutation(n)
+        out.append((boxes[order], scores[order], order))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 500, 1000])
+    ap.add_argument("--frames", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=3, help="timed runs per size (best is reported)")
+    ap.add_argument("--target", type=float, default=1000, help="required tracks*frames/ms")
+    args = ap.parse_args()
+
+    print(f"\n{'people':>7}{'ms/frame':>10}{'tracks*frames/ms':>18}{'id switches':>13}{'target':>9}")
+    for n in args.sizes:
+        scene = make_scene(n, args.frames)
+        elapsed_ms = float("inf")
+        for _ in range(max(1, args.repeat)):
+            tracker = ByteTracker(max_age=30)
+            tracked = 0
+            t0 = time.perf_counter()
+            for boxes, scores, truth in scene:
+                ids, tboxes, _, _ = tracker.update(boxes, scores)
+                tracked += len(ids)
+            elapsed_ms = min(elapsed_ms, (time.perf_counter() - t0) * 1000)
+
+        # one more pass (untimed) for identity bookkeeping
+        tracker = ByteTracker(max_age=30)
+        switches = 0
+        identity = {}
+        for boxes, scores, truth in scene:
+            ids, tboxes, _, _ = tracker.update(boxes, scores)
+            lookup = {tuple(np.round(b, 3)): t for b, t in zip(boxes, truth)}
+            for tid, b in zip(ids, tboxes):
+                t = lookup.get(tuple(np.round(b, 3)))
+                if t is not None:
+                    if tid in identity and identity[tid] != t:
+                        switches += 1
+                    identity[tid] = t
+
+        rate = tracked / elapsed_ms
+        verdict = "met" if rate > args.target else "MISSED"
+        print(f"{n:>7}{elapsed_ms / args.frames:>10.3f}{rate:>18.0f}{switches:>13}{verdict:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# src/utils/bench_event_store.py
+# Per-event cost of detection logging over a day's worth of events:
+# the old read-modify-write JSON file vs the append-only DetectionEventStore.
+#
+#   python src/utils/bench_event_store.py --events 100000 --legacy-events 5000
+#
+# The legacy path is quadratic, so it is only run for --legacy-events and the
+# per-event cost is reported per block to show the growth.
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.storage.event_store import DetectionEventStore, make_event
+
+
+def legacy_log_detection(directory, event):
+    """The previous app.log_detection: load the day's array, append, rewrite"""
+    detection_file = Path(directory) / f"{event['timestamp'][:10]}.json"
+    if detection_file.exists():
+        with open(detection_file, "r") as f:
+            data = json.load(f)
+    else:
+        data = []
+    data.append(event)
+    with open(detection_file, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def run(log_fn, n_events, block, finish=None):
+    ts = datetime.now().isoformat()
+    rows = []
+    t_block = time.perf_counter()
+    for i in range(1, n_events + 1):
+        log_fn(make_event(f"cam-{i % 16}", "weapon", count=1, confidence=0.8, timestamp=ts))
+        if i % block == 0:
+            now = time.perf_counter()
+            rows.append((i, (now - t_block) / block * 1e6))
+            t_block = now
+    drain = 0.0
+    if finish:
+        t0 = time.perf_counter()
+        finish()
+        drain = time.perf_counter() - t0
+    return rows, drain
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=100000)
+    ap.add_argument("--legacy-events", type=int, default=5000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_dir = Path(tmp) / "legacy"
+        legacy_dir.mkdir()
+        rows, _ = run(lambda ev: legacy_log_detection(legacy_dir, ev), args.legacy_events,
+                      block=max(1, args.legacy_events // 5))
+        print("\nlegacy read-modify-write JSON (caller-visible cost)")
+        print(f"{'events so far':>14}{'us/event':>12}")
+        for n, us in rows:
+            print(f"{n:>14}{us:>12.1f}")
+
+        store = DetectionEventStore(Path(tmp) / "store").start()
+        rows, drain = run(store.append, args.events, block=max(1, args.events // 10), finish=store.flush)
+        print("\nappend-only event store (caller-visible cost)")
+        print(f"{'events so far':>14}{'us/event':>12}")
+        for n, us in rows:
+            print(f"{n:>14}{us:>12.1f}")
+        print(f"\nbackground writer drained the backlog in {drain * 1000:.0f} ms "
+              f"({store.written} events written)")
+
+        t0 = time.perf_counter()
+        events = store.read_day(datetime.now().strftime("%Y-%m-%d"))
+        print(f"read_day of {len(events)} events: {(time.perf_counter() - t0) * 1000:.0f} ms")
+        store.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# src/utils/bench_fanout.py
+# Load test for the MJPEG fan-out: CPU use and delivered frame rate as the
+# number of viewers of one camera grows, with one pipeline per viewer (the
+# old /api/video_feed behaviour) vs one shared pipeline per camera
+# (StreamHub). Uses the real StreamPipeline / FrameRenderer / JPEG encode on
+# a synthetic 720p source; the models are replaced by a fixed CPU cost per
+# analysed frame so the run is repeatable. Some viewers are slow (they take
+# --slow-ms to send each frame) to show they skip frames without slowing
+# the others.
+#
+#   python src/utils/bench_fanout.py --viewers 1 5 10 20 --seconds 5
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.streaming.broadcaster import StreamHub
+from src.streaming.pipeline import StreamPipeline
+from src.streaming.renderer import FrameRenderer
+
+
+class SyntheticCapture:
+    """cv2.VideoCapture stand-in: cycles a few frames of a textured scene with sensor noise"""
+
+    def __init__(self, fps, h=720, w=1280, seed=0):
+        rng = np.random.default_rng(seed)
+        yy, xx = np.mgrid[0:h, 0:w]
+        scene = np.dstack([(xx * 255 // w), (yy * 255 // h), ((xx // 40 + yy // 40) % 2 * 90 + 60)]).astype(np.int16)
+        self.frames = []
+        for i in range(8):
+            frame = scene + rng.integers(-6, 7, scene.shape, dtype=np.int16)
+            cv2.rectangle(frame, (100 + 40 * i, h // 3), (220 + 40 * i, h // 3 + 300), (40, 40, 200), -1)
+            self.frames.append(np.clip(frame, 0, 255).astype(np.uint8))
+        self.fps = fps
+        self.i = 0
+
+    def read(self):
+        self.i += 1
+        return True, self.frames[self.i % len(self.frames)]
+
+    def get(self, prop):
+        return self.fps if prop == cv2.CAP_PROP_FPS else 0
+
+    def set(self, prop, value):
+        return True
+
+    def release(self):
+        pass
+
+
+def fake_analyze(cost_ms):
+    """Burns about cost_ms of CPU per call (stands in for the detectors)"""
+    def analyze(frame, frame_idx):
+        t_end = time.thread_time() + cost_ms / 1000
+        small = cv2.resize(frame, (320, 180))
+        while time.thread_time() < t_end:
+            small = cv2.GaussianBlur(small, (5, 5), 0)
+        return {'person_boxes': [[100, 100, 200, 350]], 'person_ids': [1], 'count': 1,
+                'group_start_time': None, 'weapon_detected': False, 'weapon_boxes': [],
+                'fight_detected': False, 'fight_boxes': []}
+    return analyze
+
+
+def run(viewers, shared, seconds, fps, cost_ms, slow_every, slow_ms):
+    analyzed = []
+
+    def start_pipeline(camera_id, outputs):
+        analyze = fake_analyze(cost_ms)
+        counter = {"n": 0}
+
+        def counted(frame, idx):
+            counter["n"] += 1
+            return analyze(frame, idx)
+        analyzed.append(counter)
+        return StreamPipeline(camera_id, SyntheticCapture(fps), counted, fps=fps,
+                              outputs=[(FrameRenderer(), outputs["overlay"])]).start()
+
+    hub = StreamHub(start_pipeline, linger_sec=0)
+    stop = threading.Event()
+    received = [0] * viewers
+
+    def viewer(i):
+        camera_id = "cam" if shared else f"cam-{i}"  # per-client: every viewer opens its own pipeline
+        slow = slow_every and i % slow_every == slow_every - 1
+        gen = hub.stream(camera_id)
+        for _ in gen:
+            received[i] += 1
+            if slow:
+                time.sleep(slow_ms / 1000)
+            if stop.is_set():
+                break
+        gen.close()
+
+    threads = [threading.Thread(target=viewer, args=(i,), daemon=True) for i in range(viewers)]
+    for t in threads:
+        t.start()
+    time.sleep(1.0)  # let pipelines start
+    base = list(received)
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    time.sleep(seconds)
+    cpu1, wall1 = time.process_time(), time.perf_counter()
+    got = [r - b for r, b in zip(received, base)]
+    stop.set()
+    hub.stop_all()
+    for t in threads:
+        t.join(2.0)
+
+    wall = wall1 - wall0
+    fast = [g / wall for i, g in enumerate(got) if not (slow_every and i % slow_every == slow_every - 1)]
+    slow = [g / wall for i, g in enumerate(got) if slow_every and i % slow_every == slow_every - 1]
+    return {
+        "cpu": (cpu1 - cpu0) / wall * 100,
+        "pipelines": len(analyzed),
+        "fast_fps": min(fast) if fast else 0.0,
+        "slow_fps": min(slow) if slow else None,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--viewers", type=int, nargs="+", default=[1, 2, 5, 10, 20])
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--fps", type=float, default=15.0, help="source frame rate")
+    ap.add_argument("--infer-ms", type=float, default=20.0, help="CPU cost of the models per analysed frame")
+    ap.add_argument("--slow-every", type=int, default=4, help="every n-th viewer is slow (0 = none)")
+    ap.add_argument("--slow-ms", type=float, default=250.0, help="time a slow viewer takes per frame")
+    ap.add_argument("--modes", nargs="+", default=["per-client", "shared"])
+    args = ap.parse_args()
+
+    print(f"\nsource {args.fps:g} fps 1280x720, {args.infer_ms:g} ms model cost/frame, "
+          f"every {args.slow_every}th viewer slow ({args.slow_ms:g} ms/frame)")
+    print(f"{'mode':>11}{'viewers':>9}{'pipelines':>11}{'CPU %':>8}{'min fps':>9}{'slow fps':>10}")
+    for mode in args.modes:
+        for n in args.viewers:
+            r = run(n, mode == "shared", args.seconds, args.fps, args.infer_ms, args.slow_every, args.slow_ms)
+            slow = f"{r['slow_fps']:.1f}" if r["slow_fps"] is not None else "-"
+            print(f"{mode:>11}{n:>9}{r['pipelines']:>11}{r['cpu']:>8.0f}{r['fast_fps']:>9.1f}{slow:>10}")
+
+
+if __name__ == "__main__":
+    main()
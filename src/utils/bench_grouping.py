@@ -0,0 +1,99 @@
+# src/utils/bench_grouping.py
+# GroupManager._cluster_oids: the previous O(N^2) adjacency + DFS clustering vs
+# the grid-hash / connected-components version, on synthetic crowds. Checks
+# that both produce identical clusters and reports how many frames reused the
+# previous frame's clusters (nobody joined, left or moved).
+#
+#   python src/utils/bench_grouping.py --sizes 50 200 1000 --frames 100
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.detector.infer_detector import GroupManager
+
+
+def legacy_cluster_oids(oid_centroids, cluster_dist):
+    """The previous GroupManager._cluster_oids (adjacency sets + DFS)"""
+    oids = list(oid_centroids.keys())
+    if not oids:
+        return []
+    adj = {oid: set() for oid in oids}
+    for i in range(len(oids)):
+        for j in range(i + 1, len(oids)):
+            a = oids[i]; b = oids[j]
+            ax, ay = oid_centroids[a]; bx, by = oid_centroids[b]
+            if (ax - bx) ** 2 + (ay - by) ** 2 <= cluster_dist ** 2:
+                adj[a].add(b); adj[b].add(a)
+    visited = set()
+    clusters = []
+    for oid in oids:
+        if oid in visited:
+            continue
+        stack = [oid]
+        comp = set()
+        while stack:
+            v = stack.pop()
+            if v in visited:
+                continue
+            visited.add(v)
+            comp.add(v)
+            for nb in adj[v]:
+                if nb not in visited:
+                    stack.append(nb)
+        clusters.append(comp)
+    return clusters
+
+
+def make_scene(n, frames, w=1920, h=1080, seed=0, walkers=0.3):
+    """Clumps of people, most standing (sub-pixel jitter) and some walking; per-frame oid->centroid"""
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform([100, 100], [w - 100, h - 100], size=(max(1, n // 12), 2))
+    pos = centers[rng.integers(0, len(centers), n)] + rng.normal(0, 60, size=(n, 2))
+    vel = np.where(rng.random((n, 1)) < walkers, rng.normal(0, 2, size=(n, 2)), 0.0)
+    out = []
+    for _ in range(frames):
+        pos = np.clip(pos + vel + rng.normal(0, 0.3, size=pos.shape), 0, [w, h])
+        out.append({oid: (int(x), int(y)) for oid, (x, y) in enumerate(pos)})
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000])
+    ap.add_argument("--frames", type=int, default=100)
+    ap.add_argument("--cluster-dist", type=float, default=120)
+    args = ap.parse_args()
+
+    print(f"\n{'people':>7}{'legacy ms':>11}{'grid ms':>9}{'speedup':>9}{'reused':>8}{'identical':>11}")
+    for n in args.sizes:
+        scene = make_scene(n, args.frames)
+        frames = args.frames if n <= 200 else max(5, args.frames // 10)  # legacy is O(N^2) in Python
+
+        t0 = time.perf_counter()
+        legacy = [legacy_cluster_oids(c, args.cluster_dist) for c in scene[:frames]]
+        legacy_ms = (time.perf_counter() - t0) / frames * 1000
+
+        gm = GroupManager(cluster_dist=args.cluster_dist)
+        reused = 0
+        grid = []
+        t0 = time.perf_counter()
+        for c in scene:
+            last = gm._last
+            grid.append(gm._cluster_oids(c))
+            reused += gm._last is last and last is not None
+        grid_ms = (time.perf_counter() - t0) / len(scene) * 1000
+
+        identical = all(a == b for a, b in zip(legacy, grid))
+        print(f"{n:>7}{legacy_ms:>11.2f}{grid_ms:>9.2f}{legacy_ms / grid_ms:>8.1f}x"
+              f"{reused / len(scene):>8.0%}{str(identical):>11}")
+
+
+if __name__ == "__main__":
+    main()
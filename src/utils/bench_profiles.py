@@ -0,0 +1,101 @@
+# src/utils/bench_profiles.py
+# CPU and bandwidth of a multi-camera dashboard per stream profile: every
+# camera's pipeline runs (shared via StreamHub) and each tile is one viewer.
+# "legacy" is the old output - full-size frames at cv2's default JPEG quality
+# (95), every frame - the others come from the streaming: profiles: section
+# of src/detector/config.yaml. Models are replaced by a fixed CPU cost per
+# analysed frame (see bench_fanout.py).
+#
+#   python src/utils/bench_profiles.py --cameras 2 --viewers 1 --seconds 5
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+import yaml
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.streaming.broadcaster import StreamHub
+from src.streaming.pipeline import StreamPipeline
+from src.streaming.profiles import StreamProfile, load_profiles
+from src.streaming.renderer import FrameRenderer
+from src.utils.bench_fanout import SyntheticCapture, fake_analyze
+
+
+def run(profile, cameras, viewers, seconds, fps, cost_ms, width, height):
+    pipelines = []
+
+    def start_pipeline(camera_id, outputs):
+        pipeline = StreamPipeline(camera_id, SyntheticCapture(fps, h=height, w=width), fake_analyze(cost_ms),
+                                  fps=fps, outputs=[(FrameRenderer(), outputs["out"], profile)]).start()
+        pipelines.append(pipeline)
+        return pipeline
+
+    hub = StreamHub(start_pipeline, variants=("out",), linger_sec=0)
+    stop = threading.Event()
+    n = cameras * viewers
+    frames, nbytes = [0] * n, [0] * n
+
+    def viewer(i):
+        gen = hub.stream(f"cam-{i % cameras}", "out")
+        for part in gen:
+            frames[i] += 1
+            nbytes[i] += len(part)
+            if stop.is_set():
+                break
+        gen.close()
+
+    threads = [threading.Thread(target=viewer, args=(i,), daemon=True) for i in range(n)]
+    for t in threads:
+        t.start()
+    time.sleep(1.0)
+    f0, b0 = sum(frames), sum(nbytes)
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    time.sleep(seconds)
+    cpu1, wall1 = time.process_time(), time.perf_counter()
+    f1, b1 = sum(frames), sum(nbytes)
+    encode_ms = sum(p.stats["encode"].snapshot()["mean_ms"] for p in pipelines) / len(pipelines)
+    stop.set()
+    hub.stop_all()
+    for t in threads:
+        t.join(2.0)
+    wall = wall1 - wall0
+    return {
+        "cpu": (cpu1 - cpu0) / wall * 100,
+        "encode_ms": encode_ms,
+        "fps": (f1 - f0) / wall / n,
+        "mbps": (b1 - b0) / wall * 8 / 1e6,
+        "kb_frame": (b1 - b0) / max(1, f1 - f0) / 1e3,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cameras", type=int, default=2)
+    ap.add_argument("--viewers", type=int, default=1, help="viewers per camera")
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--fps", type=float, default=15.0, help="source frame rate")
+    ap.add_argument("--width", type=int, default=1920)
+    ap.add_argument("--height", type=int, default=1080)
+    ap.add_argument("--infer-ms", type=float, default=10.0)
+    args = ap.parse_args()
+
+    cfg = yaml.safe_load((ROOT / "src/detector/config.yaml").read_text()) or {}
+    profiles = {"legacy": StreamProfile("legacy", quality=95)}
+    profiles.update(load_profiles(cfg.get("streaming")))
+
+    print(f"\n{args.cameras} camera(s) x {args.viewers} viewer(s), source {args.width}x{args.height} "
+          f"@ {args.fps:g} fps, {args.infer_ms:g} ms model cost/frame")
+    print(f"{'profile':>8}{'CPU %':>8}{'encode ms':>11}{'fps/viewer':>12}{'kB/frame':>10}{'Mbit/s total':>14}")
+    for name, profile in profiles.items():
+        r = run(profile, args.cameras, args.viewers, args.seconds, args.fps, args.infer_ms,
+                args.width, args.height)
+        print(f"{name:>8}{r['cpu']:>8.0f}{r['encode_ms']:>11.1f}{r['fps']:>12.1f}{r['kb_frame']:>10.1f}{r['mbps']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# src/utils/bench_rollups.py
+# Month-long analytics queries: the raw event list of /api/detections/range
+# (read every daily file, serialize every event) vs the pre-aggregated
+# buckets of /api/detections/aggregate. Reports the server time (query +
+# JSON encoding), the payload size, and the cost of keeping the rollups
+# updated from the event writer.
+#
+#   python src/utils/bench_rollups.py --days 30 --events-per-day 20000
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.storage.event_store import DetectionEventStore, make_event
+from src.storage.rollups import DetectionRollups, totals
+
+TYPES = ["crowd"] * 70 + ["weapon"] * 15 + ["fight"] * 15
+CAMERAS = [f"Cam-{i}" for i in range(1, 9)]
+
+
+def timed(fn, reps=5):
+    """(median ms, last result) of fn()"""
+    out, result = [], None
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        result = fn()
+        out.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(out), result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", type=int, default=30)
+    ap.add_argument("--events-per-day", type=int, default=20000)
+    ap.add_argument("--batch", type=int, default=200, help="events per flushed writer batch")
+    args = ap.parse_args()
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = DetectionEventStore(Path(tmp) / "detections")  # not started: appends are written synchronously
+        # fed by hand rather than attach()ed, to time the update on its own
+        rollups = DetectionRollups(Path(tmp) / "detections" / "rollups.db")
+        first = datetime(2024, 5, 1)
+        step = 86400 / args.events_per_day
+        update_ms = []
+        for day in range(args.days):
+            t_day = first + timedelta(days=day)
+            events = [make_event(rng.choice(CAMERAS), rng.choice(TYPES), count=1,
+                                 confidence=round(rng.uniform(0.3, 1.0), 3),
+                                 timestamp=(t_day + timedelta(seconds=i * step)).isoformat())
+                      for i in range(args.events_per_day)]
+            for i in range(0, len(events), args.batch):
+                batch = events[i:i + args.batch]
+                store._write_batch(batch)
+                t0 = time.perf_counter()
+                rollups.add(batch)
+                update_ms.append((time.perf_counter() - t0) * 1000)
+        total = args.days * args.events_per_day
+        print(f"\n{total:,} events over {args.days} days, {len(CAMERAS)} cameras")
+        print(f"rollup update per {args.batch}-event batch: median {statistics.median(update_ms):.2f} ms "
+              f"({statistics.median(update_ms) / args.batch * 1000:.1f} us/event)")
+
+        start = first.strftime("%Y-%m-%d")
+        end = (first + timedelta(days=args.days - 1)).strftime("%Y-%m-%d")
+        raw_ms, raw = timed(lambda: json.dumps(store.read_range(start, end)), reps=3)
+        print(f"\n{'query':>38}{'server ms':>11}{'payload':>12}")
+        print(f"{'raw events (/api/detections/range)':>38}{raw_ms:>11.0f}{len(raw) / 1e6:>10.1f} MB")
+
+        def aggregate(grain, by="type", **kw):
+            buckets = rollups.aggregate(grain, start, end, by=by, **kw)
+            return json.dumps({"grain": grain, "by": by, "buckets": buckets, "totals": totals(buckets, by)})
+
+        cases = [
+            ("month by day, per type", lambda: aggregate("day")),
+            ("month by day, per camera+type", lambda: aggregate("day", "camera,type")),
+            ("month by hour, per type", lambda: aggregate("hour")),
+            ("month by hour, one camera", lambda: aggregate("hour", camera="Cam-3")),
+            ("month totals only", lambda: aggregate("day", "none")),
+        ]
+        for label, fn in cases:
+            ms, body = timed(fn, reps=20)
+            print(f"{label:>38}{ms:>11.1f}{len(body) / 1e3:>10.1f} kB")
+        rollups.close()
+
+
+if __name__ == "__main__":
+    main()
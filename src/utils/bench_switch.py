@@ -0,0 +1,154 @@
+# src/utils/bench_switch.py
+# Source-switch latency and capture cleanup of SessionManager: a camera with
+# viewers attached is switched to a new uploaded video many
+# times. Reports the switch time, whether the viewers kept receiving frames
+# without reconnecting, the VideoCaptures still open at the end, and the
+# temp files left on disk. Uses real cv2.VideoCapture on generated clips;
+# the models are a fixed CPU cost (see bench_fanout.py).
+#
+#   python src/utils/bench_switch.py --switches 50 --viewers 3
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.streaming.broadcaster import StreamHub
+from src.streaming.pipeline import StreamPipeline
+from src.streaming.renderer import FrameRenderer
+from src.streaming.sessions import SessionManager
+from src.utils.bench_fanout import fake_analyze
+
+
+class CountedCapture:
+    """cv2.VideoCapture that keeps a count of the handles not yet released"""
+    open_handles = 0
+    lock = threading.Lock()
+
+    def __init__(self, path):
+        self.cap = cv2.VideoCapture(path)
+        self.released = False
+        with CountedCapture.lock:
+            CountedCapture.open_handles += 1
+
+    def read(self):
+        return self.cap.read()
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.cap.release()
+            with CountedCapture.lock:
+                CountedCapture.open_handles -= 1
+
+
+def write_clip(path, frames=60, fps=25, size=(640, 360)):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    for i in range(frames):
+        frame = np.full((size[1], size[0], 3), (i * 4) % 255, np.uint8)
+        cv2.rectangle(frame, (20 + 5 * i, 100), (120 + 5 * i, 300), (40, 40, 200), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--switches", type=int, default=50)
+    ap.add_argument("--viewers", type=int, default=3)
+    ap.add_argument("--interval", type=float, default=0.2, help="seconds between switches")
+    ap.add_argument("--infer-ms", type=float, default=15.0)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_switch_")
+    sessions = None
+
+    def start_pipeline(camera_id, outputs):
+        session = sessions.get(camera_id)
+        if session is None:
+            return None
+        cap = CountedCapture(session.source)
+        session.acquire()
+        return StreamPipeline(camera_id, cap, fake_analyze(args.infer_ms), fps=25,
+                              outputs=[(FrameRenderer(), outputs["overlay"])],
+                              on_release=session.release).start()
+
+    hub = StreamHub(start_pipeline, linger_sec=0)
+    sessions = SessionManager(hub)
+
+    def upload(i):
+        path = os.path.join(tmp, f"upload_{i}.mp4")
+        write_clip(path)
+        return path
+
+    sessions.open("cam", upload(0), temp=True)
+    received = [0] * args.viewers
+    reconnects = [0] * args.viewers
+    stop = threading.Event()
+
+    def viewer(i):
+        while not stop.is_set():
+            gen = hub.stream("cam")
+            for _ in gen:
+                received[i] += 1
+                if stop.is_set():
+                    break
+            gen.close()
+            if not stop.is_set():
+                reconnects[i] += 1
+                time.sleep(0.05)
+
+    threads = [threading.Thread(target=viewer, args=(i,), daemon=True) for i in range(args.viewers)]
+    for t in threads:
+        t.start()
+    time.sleep(1.0)
+
+    switch_ms, gaps = [], []
+    for i in range(1, args.switches + 1):
+        path = upload(i)  # the upload itself is not part of the switch
+        before = list(received)
+        t0 = time.perf_counter()
+        sessions.open("cam", path, temp=True)
+        switch_ms.append((time.perf_counter() - t0) * 1000)
+        # time until every viewer got a frame from the new source
+        t1 = time.perf_counter()
+        while any(r == b for r, b in zip(received, before)) and time.perf_counter() - t1 < 2.0:
+            time.sleep(0.002)
+        gaps.append((time.perf_counter() - t1) * 1000)
+        time.sleep(args.interval)
+
+    stop.set()
+    sessions.close_all()
+    for t in threads:
+        t.join(2.0)
+    time.sleep(0.2)
+    leftover = [f for f in os.listdir(tmp) if f.endswith(".mp4")]
+
+    q = lambda xs, p: sorted(xs)[min(len(xs) - 1, int(p * len(xs)))]
+    print(f"\n{args.switches} source switches, {args.viewers} viewer(s) attached")
+    print(f"switch call     median {statistics.median(switch_ms):.1f} ms   p95 {q(switch_ms, 0.95):.1f} ms   "
+          f"max {max(switch_ms):.1f} ms")
+    print(f"first new frame median {statistics.median(gaps):.1f} ms   p95 {q(gaps, 0.95):.1f} ms")
+    print(f"viewer reconnects {sum(reconnects)}, frames received {sum(received)}")
+    print(f"open VideoCaptures after close: {CountedCapture.open_handles}, temp files left: {len(leftover)}")
+    if not leftover:
+        os.rmdir(tmp)
+
+
+if __name__ == "__main__":
+    main()
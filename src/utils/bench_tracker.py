@@ -0,0 +1,123 @@
+# src/utils/bench_tracker.py
+# Micro-benchmark for SimpleCentroidTracker.update: the previous greedy
+# nested-loop matcher vs the vectorized Hungarian tracker, on synthetic crowds
+# of 10-500 people doing a random walk.
+#
+#   python src/utils/bench_tracker.py --sizes 10 50 100 200 500 --frames 100
+
+import argparse
+import math
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.detector.infer_detector import SimpleCentroidTracker
+
+
+class GreedyCentroidTracker:
+    """The previous dict-based tracker (greedy nearest match per object)"""
+
+    def __init__(self, max_disappear=50, max_distance=120):
+        self.next_id = 0
+        self.objects = {}
+        self.disappeared = {}
+        self.max_disappear = max_disappear
+        self.max_distance = max_distance
+
+    def register(self, centroid):
+        self.objects[self.next_id] = centroid
+        self.disappeared[self.next_id] = 0
+        self.next_id += 1
+
+    def deregister(self, oid):
+        self.objects.pop(oid, None)
+        self.disappeared.pop(oid, None)
+
+    def update(self, rects):
+        input_centroids = [(int((x1 + x2) / 2), int((y1 + y2) / 2)) for (x1, y1, x2, y2) in rects]
+        if len(self.objects) == 0:
+            for c in input_centroids:
+                self.register(c)
+            return self.objects
+        oids = list(self.objects.keys())
+        ocent = list(self.objects.values())
+        used_input = set()
+        for i, oid in enumerate(oids):
+            best_j, best_d = None, 1e9
+            for j, ic in enumerate(input_centroids):
+                if j in used_input:
+                    continue
+                d = math.hypot(ic[0] - ocent[i][0], ic[1] - ocent[i][1])
+                if d < best_d:
+                    best_d, best_j = d, j
+            if best_j is not None and best_d < self.max_distance:
+                self.objects[oid] = input_centroids[best_j]
+                self.disappeared[oid] = 0
+                used_input.add(best_j)
+            else:
+                self.disappeared[oid] += 1
+                if self.disappeared[oid] > self.max_disappear:
+                    self.deregister(oid)
+        for j, ic in enumerate(input_centroids):
+            if j not in used_input:
+                self.register(ic)
+        return self.objects
+
+
+def make_scene(n, frames, w=1920, h=1080, step=12, seed=0):
+    """Random-walk crowd; returns per-frame (rects, true_ids) with shuffled detection order"""
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform([40, 60], [w - 40, h - 60], size=(n, 2))
+    out = []
+    for _ in range(frames):
+        pos += rng.normal(0, step, size=pos.shape)
+        pos = np.clip(pos, [40, 60], [w - 40, h - 60])
+        order = rng.permutation(n)
+        rects = [(pos[i, 0] - 20, pos[i, 1] - 50, pos[i, 0] + 20, pos[i, 1] + 50) for i in order]
+        out.append((rects, order))
+    return out
+
+
+def id_switches(tracker_cls, scene, **kw):
+    tracker = tracker_cls(**kw)
+    assigned = {}
+    switches = 0
+    total = 0.0
+    for rects, truth in scene:
+        t0 = time.perf_counter()
+        objects = tracker.update(rects)
+        total += time.perf_counter() - t0
+        # map each track back to the detection it sits on
+        cent_to_truth = {(int((r[0] + r[2]) / 2), int((r[1] + r[3]) / 2)): t for r, t in zip(rects, truth)}
+        for oid, c in objects.items():
+            t = cent_to_truth.get(tuple(c))
+            if t is None:
+                continue
+            if oid in assigned and assigned[oid] != t:
+                switches += 1
+            assigned[oid] = t
+    return total / len(scene) * 1000, switches
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100, 200, 500])
+    ap.add_argument("--frames", type=int, default=100)
+    args = ap.parse_args()
+
+    print(f"\n{'people':>7}{'greedy ms':>11}{'hungarian ms':>14}{'speedup':>9}"
+          f"{'greedy swaps':>14}{'hungarian swaps':>17}")
+    for n in args.sizes:
+        scene = make_scene(n, args.frames)
+        g_ms, g_sw = id_switches(GreedyCentroidTracker, scene, max_disappear=200, max_distance=300)
+        h_ms, h_sw = id_switches(SimpleCentroidTracker, scene, max_disappear=200, max_distance=300)
+        print(f"{n:>7}{g_ms:>11.2f}{h_ms:>14.2f}{g_ms / h_ms:>8.1f}x{g_sw:>14}{h_sw:>17}")
+
+
+if __name__ == "__main__":
+    main()
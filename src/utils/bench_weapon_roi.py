@@ -0,0 +1,234 @@
+# src/utils/bench_weapon_roi.py
+# Weapon head on the full letterboxed frame vs person crops / tiles
+# (RegionInference): latency per frame, model input scale (how many model
+# pixels a native pixel gets - a handgun shrinks by this factor) and the share
+# of the frame that reaches the model. Person crops larger than --roi-imgsz
+# are tiled, so their input scale never drops below 1x.
+#
+# Next to the timing, each mode's weapon boxes on the same frame are matched
+# (same class, IoU >= 0.5) against the "full 640" boxes - the current
+# production path: hits, misses (full-frame boxes the mode lost) and extras
+# (boxes only the mode found). The frame is noise unless --frame is given;
+# untrained stand-in weights find nothing on either, so agreement needs the
+# real weights and a real frame.
+#
+#   python src/utils/bench_weapon_roi.py --people 4 --width 1920 --height 1080
+#   python src/utils/bench_weapon_roi.py --frame screenshots/cam1.jpg --people 4
+#
+# With --data (YOLO-format images/ + labels/) accuracy is reported too:
+# weapon recall / precision at IoU 0.5 per mode, with the person boxes taken
+# from the ground-truth labels so crowd-detector misses don't blur the result,
+# plus the same hit/miss agreement against "full 640" over all those images.
+#
+#   python src/utils/bench_weapon_roi.py --weights models/weapon4/weights/best.pt \
+#       --data datasets/weapon/val --weapon-class 0 --person-class 1
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from ultralytics import YOLO
+from src.detector.multi_head import MultiHeadDetector
+from src.detector.roi_inference import RegionInference
+
+
+def load_model(weights):
+    if weights and Path(weights).exists():
+        return YOLO(weights)
+    # Same architecture/compute without trained weights - fine for timing
+    print(f"⚠ Weights not found ({weights}), timing an untrained yolov8n instead")
+    return YOLO("yolov8n.yaml")
+
+
+def synthetic_people(n, w, h, seed=0):
+    """n standing people, roughly 1/5 of the frame height each"""
+    rng = np.random.default_rng(seed)
+    ph = h / 5
+    pw = ph * 0.4
+    x = rng.uniform(0, w - pw, n)
+    y = rng.uniform(h * 0.3, h - ph, n)
+    return np.stack([x, y, x + pw, y + ph], axis=1).astype(np.float32)
+
+
+def make_detectors(model, args):
+    head_args = {"weapon": {"conf": args.conf}}
+    return {
+        "full 640": MultiHeadDetector(models={"weapon": model}, head_args=head_args),
+        f"full {args.big_imgsz}": MultiHeadDetector(models={"weapon": model}, imgsz=args.big_imgsz,
+                                                   head_args=head_args),
+        "persons": MultiHeadDetector(models={"weapon": model}, head_args=head_args,
+                                     weapon_roi=RegionInference("persons", roi_imgsz=args.roi_imgsz)),
+        "tiles": MultiHeadDetector(models={"weapon": model}, head_args=head_args,
+                                   weapon_roi=RegionInference("tiles", tile=args.tile)),
+    }
+
+
+def input_scale(det, shape, people):
+    """Model pixels per native pixel for the regions this detector feeds the model"""
+    h, w = shape[:2]
+    if det.weapon_roi is None:
+        return min(det.imgsz / h, det.imgsz / w)
+    roi = det.weapon_roi
+    if roi.mode == "tiles":
+        return 1.0
+    regions = roi.regions(shape, people)
+    if len(regions) == 0:
+        return 0.0
+    sides = np.maximum(regions[:, 2] - regions[:, 0], regions[:, 3] - regions[:, 1])
+    return float(np.mean(roi.roi_imgsz / sides))
+
+
+def time_mode(det, frame, people, reps):
+    """ms per frame and the weapon detections on that frame"""
+    d = det.detect(frame, heads=("weapon",), person_boxes=people)["weapon"]  # warm-up
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        det.detect(frame, heads=("weapon",), person_boxes=people)
+    return (time.perf_counter() - t0) / reps * 1000, d
+
+
+# ----------------- accuracy on a labelled set -----------------
+def read_labels(path, shape):
+    h, w = shape[:2]
+    if not path.exists():
+        return np.zeros((0,), dtype=int), np.zeros((0, 4), dtype=np.float32)
+    rows = np.loadtxt(path, ndmin=2)
+    if rows.size == 0:
+        return np.zeros((0,), dtype=int), np.zeros((0, 4), dtype=np.float32)
+    cls = rows[:, 0].astype(int)
+    cx, cy, bw, bh = rows[:, 1] * w, rows[:, 2] * h, rows[:, 3] * w, rows[:, 4] * h
+    boxes = np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], axis=1).astype(np.float32)
+    return cls, boxes
+
+
+def match(pred, gt, thr=0.5):
+    """True positives among pred (greedy by input order, predictions sorted by conf)"""
+    if len(pred) == 0 or len(gt) == 0:
+        return 0
+    ix = np.clip(np.minimum(pred[:, None, 2], gt[None, :, 2]) - np.maximum(pred[:, None, 0], gt[None, :, 0]), 0, None)
+    iy = np.clip(np.minimum(pred[:, None, 3], gt[None, :, 3]) - np.maximum(pred[:, None, 1], gt[None, :, 1]), 0, None)
+    inter = ix * iy
+    area = lambda b: (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    iou = inter / (area(pred)[:, None] + area(gt)[None, :] - inter + 1e-9)
+    used, tp = set(), 0
+    for i in range(len(pred)):
+        j = int(np.argmax(iou[i]))
+        if iou[i, j] >= thr and j not in used:
+            used.add(j)
+            tp += 1
+    return tp
+
+
+def by_conf(d, keep=None):
+    keep = np.ones(len(d.boxes), dtype=bool) if keep is None else keep
+    order = np.argsort(-d.confs[keep])
+    return d.boxes[keep][order], d.classes[keep][order]
+
+
+def agreement(d, ref):
+    """(hits, misses, extras) of detections d against the reference detections, per class"""
+    boxes, classes = by_conf(d)
+    ref_boxes, ref_classes = by_conf(ref)
+    hits = sum(match(boxes[classes == c], ref_boxes[ref_classes == c]) for c in np.unique(ref_classes))
+    return hits, len(ref_boxes) - hits, len(boxes) - hits
+
+
+def evaluate(detectors, data, weapon_class, person_class, limit):
+    images = sorted(p for p in (Path(data) / "images").glob("*") if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+    images = images[:limit] if limit else images
+    totals = {name: {"tp": 0, "pred": 0, "ms": 0.0, "hits": 0, "misses": 0, "extras": 0} for name in detectors}
+    ref_name = next(iter(detectors))
+    n_gt = 0
+    for img_path in images:
+        frame = cv2.imread(str(img_path))
+        if frame is None:
+            continue
+        cls, boxes = read_labels(Path(data) / "labels" / (img_path.stem + ".txt"), frame.shape)
+        gt = boxes[cls == weapon_class]
+        people = boxes[cls == person_class]
+        n_gt += len(gt)
+        ref = None
+        for name, det in detectors.items():
+            t0 = time.perf_counter()
+            d = det.detect(frame, heads=("weapon",), person_boxes=people)["weapon"]
+            totals[name]["ms"] += (time.perf_counter() - t0) * 1000
+            pred, _ = by_conf(d, d.classes == weapon_class)
+            totals[name]["pred"] += len(pred)
+            totals[name]["tp"] += match(pred, gt)
+            ref = d if ref is None else ref
+            for key, n in zip(("hits", "misses", "extras"), agreement(d, ref)):
+                totals[name][key] += n
+
+    print(f"\naccuracy on {len(images)} labelled image(s), {n_gt} weapon box(es):")
+    print(f"{'mode':>12}{'recall':>9}{'precision':>11}{'ms/img':>9}   vs {ref_name}: {'hits':>6}{'misses':>8}{'extras':>8}")
+    for name, t in totals.items():
+        recall = t["tp"] / max(1, n_gt)
+        precision = t["tp"] / max(1, t["pred"])
+        print(f"{name:>12}{recall:>9.3f}{precision:>11.3f}{t['ms'] / max(1, len(images)):>9.1f}"
+              f"   {'':>{len(ref_name) + 4}}{t['hits']:>6}{t['misses']:>8}{t['extras']:>8}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--weights", default=str(ROOT / "models/weapon4/weights/best.pt"))
+    ap.add_argument("--people", type=int, default=4)
+    ap.add_argument("--width", type=int, default=1920)
+    ap.add_argument("--height", type=int, default=1080)
+    ap.add_argument("--reps", type=int, default=10)
+    ap.add_argument("--frame", help="image to time on instead of a noise frame (resized to --width x --height)")
+    ap.add_argument("--conf", type=float, default=0.25)
+    ap.add_argument("--roi-imgsz", type=int, default=320)
+    ap.add_argument("--tile", type=int, default=640)
+    ap.add_argument("--big-imgsz", type=int, default=1280, help="full-frame imgsz that keeps small weapons")
+    ap.add_argument("--data", help="YOLO-format dir with images/ and labels/ for the accuracy run")
+    ap.add_argument("--weapon-class", type=int, default=0)
+    ap.add_argument("--person-class", type=int, default=1)
+    ap.add_argument("--limit", type=int, default=0, help="max images for the accuracy run (0 = all)")
+    args = ap.parse_args()
+
+    model = load_model(args.weights)
+    detectors = make_detectors(model, args)
+
+    if args.frame:
+        frame = cv2.resize(cv2.imread(args.frame), (args.width, args.height))
+    else:
+        frame = np.random.default_rng(0).integers(0, 255, (args.height, args.width, 3), dtype=np.uint8)
+    ref_name = next(iter(detectors))
+    print(f"\n{args.width}x{args.height}, {args.people} people")
+    print(f"{'mode':>12}{'ms/frame':>10}{'input scale':>13}{'frame seen':>12}{'regions':>9}"
+          f"   vs {ref_name}: {'hits':>6}{'misses':>8}{'extras':>8}")
+    for n_people in (args.people, 0):
+        people = synthetic_people(n_people, args.width, args.height)
+        if n_people == 0:
+            print("-- empty scene --")
+        ref = None
+        for name, det in detectors.items():
+            if det.weapon_roi is not None:
+                det.weapon_roi.stats = {"frames": 0, "regions": 0, "model_calls": 0, "pixel_fraction": 0.0}
+            ms, d = time_mode(det, frame, people, args.reps)
+            ref = d if ref is None else ref
+            hits, misses, extras = agreement(d, ref)
+            if det.weapon_roi is None:
+                seen, regions = 1.0, 1.0
+            else:
+                st = det.weapon_roi.get_stats()
+                seen, regions = st["pixel_fraction"], st["regions_per_frame"]
+            print(f"{name:>12}{ms:>10.1f}{input_scale(det, frame.shape, people):>12.2f}x"
+                  f"{seen:>11.0%}{regions:>9.1f}   {'':>{len(ref_name) + 4}}{hits:>6}{misses:>8}{extras:>8}")
+
+    if args.data:
+        evaluate(detectors, args.data, args.weapon_class, args.person_class, args.limit)
+    else:
+        print("\naccuracy not measured (pass --data) - compare recall before switching weapon_roi.mode "
+              "away from \"full\"")
+
+
+if __name__ == "__main__":
+    main()
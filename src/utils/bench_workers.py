@@ -0,0 +1,197 @@
+# src/utils/bench_workers.py
+# Multi-process stream mode vs everything in the web process.
+#
+# 1. Frame handover: a 720p frame through a shared-memory FrameRing (copy
+#    in, copy out) vs pickled through a multiprocessing Pipe.
+# 2. N cameras streaming a generated 720p clip, each with one "grid"
+#    viewer, analysed by a synthetic model that holds the GIL for
+#    --cost-ms per frame (the Python side of tracking / post-processing):
+#    all pipelines as threads of one process (the default mode) vs a
+#    WorkerPool. Reports analysed and delivered frames per second and the
+#    CPU time used by the web process and by the workers.
+#
+#   python src/utils/bench_workers.py --cameras 2 4 --groups 2 --seconds 8
+
+import argparse
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import Pipe
+from pathlib import Path
+
+import cv2
+import numpy as np
+import psutil
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.streaming.broadcaster import FrameBroadcaster
+from src.streaming.capture import open_capture
+from src.streaming.frame_ring import FrameRing
+from src.streaming.pipeline import StreamPipeline
+from src.streaming.profiles import load_profiles, stream_variants
+from src.streaming.renderer import profile_outputs
+from src.streaming.workers import WorkerPool
+
+
+def gil_analyze(cost_ms):
+    """Burns about cost_ms of CPU per call in pure Python (holding the GIL)"""
+    def analyze(frame, frame_idx):
+        t_end = time.thread_time() + cost_ms / 1000
+        x = 0
+        while time.thread_time() < t_end:
+            for i in range(200):
+                x += i * i
+        return {'person_boxes': [[100, 100, 200, 350]], 'person_ids': [1], 'count': 1,
+                'group_start_time': None, 'weapon_detected': False, 'weapon_boxes': [],
+                'fight_detected': False, 'fight_boxes': []}
+    return analyze
+
+
+def write_clip(path, fps, seconds=4, w=1280, h=720):
+    rng = np.random.default_rng(0)
+    yy, xx = np.mgrid[0:h, 0:w]
+    scene = np.dstack([(xx * 255 // w), (yy * 255 // h), ((xx // 40 + yy // 40) % 2 * 90 + 60)]).astype(np.int16)
+    out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+    for i in range(int(fps * seconds)):
+        frame = scene + rng.integers(-6, 7, scene.shape, dtype=np.int16)
+        cv2.rectangle(frame, (100 + 8 * i, h // 3), (220 + 8 * i, h // 3 + 300), (40, 40, 200), -1)
+        out.write(np.clip(frame, 0, 255).astype(np.uint8))
+    out.release()
+
+
+# ----------------- 1. handover -----------------
+def bench_handover(n=200):
+    frame = np.random.default_rng(0).integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+    ring = FrameRing.create(slots=4, max_w=1280, max_h=720)
+    out = np.empty_like(frame)
+    ring_us = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        ring.write(frame, i)
+        ring.read_latest(out)
+        ring_us.append((time.perf_counter() - t0) * 1e6)
+    ring.close()
+
+    a, b = Pipe()
+    got = []
+    reader = threading.Thread(target=lambda: [got.append(b.recv()) for _ in range(n)], daemon=True)
+    reader.start()
+    pipe_us = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        a.send(frame)
+        while len(got) <= i:
+            time.sleep(0)
+        pipe_us.append((time.perf_counter() - t0) * 1e6)
+    reader.join()
+    return statistics.median(ring_us), statistics.median(pipe_us)
+
+
+# ----------------- 2. cameras -----------------
+def cpu_seconds(pids=()):
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    own = usage.ru_utime + usage.ru_stime
+    others = 0.0
+    for pid in pids:
+        try:
+            t = psutil.Process(pid).cpu_times()
+            others += t.user + t.system
+        except psutil.NoSuchProcess:
+            pass
+    return own, others
+
+
+def run_threads(clip, cameras, cost_ms, seconds, profiles):
+    pipelines, subs = [], []
+    for c in range(cameras):
+        cap, is_live = open_capture(str(clip))
+        outs = {v: FrameBroadcaster(v) for v in stream_variants(profiles)}
+        subs.append(outs["grid"].subscribe())
+        pipelines.append(StreamPipeline(f"cam{c}", cap, gil_analyze(cost_ms), is_live=is_live,
+                                        outputs=profile_outputs(profiles, outs)).start())
+    return measure(pipelines, subs, seconds, pids=())
+
+
+def run_workers(clip, cameras, cost_ms, seconds, profiles, groups, cores_per_group):
+    pool = WorkerPool(groups=groups, cores_per_group=cores_per_group,
+                      analyzer=("src.utils.bench_workers:gil_analyze", [cost_ms])).start()
+    pids = [w.pid for g in pool.groups for w in (g.capture, g.inference)]
+    pipelines, subs = [], []
+    for c in range(cameras):
+        outs = {v: FrameBroadcaster(v) for v in stream_variants(profiles)}
+        subs.append(outs["grid"].subscribe())
+        pipelines.append(pool.start_camera(f"cam{c}", str(clip), outs))
+    try:
+        return measure(pipelines, subs, seconds, pids=pids)
+    finally:
+        pool.stop()
+
+
+def measure(pipelines, subs, seconds, pids):
+    delivered = [0] * len(subs)
+    stop = threading.Event()
+
+    def viewer(i):
+        while not stop.is_set():
+            if subs[i].get(timeout=0.5) is not None:
+                delivered[i] += 1
+    viewers = [threading.Thread(target=viewer, args=(i,), daemon=True) for i in range(len(subs))]
+    for v in viewers:
+        v.start()
+    time.sleep(2.0)  # warm-up (worker stats arrive once a second)
+    analysed0 = sum(p.get_stats().get("inference", {}).get("count", 0) for p in pipelines)
+    delivered0, cpu0, t0 = sum(delivered), cpu_seconds(pids), time.perf_counter()
+    time.sleep(seconds)
+    elapsed = time.perf_counter() - t0
+    cpu1 = cpu_seconds(pids)
+    delivered1 = sum(delivered)
+    time.sleep(1.1)  # one more worker stats report, then pro-rate
+    analysed1 = sum(p.get_stats().get("inference", {}).get("count", 0) for p in pipelines)
+    stop.set()
+    for p in pipelines:
+        p.stop(timeout=2.0)
+    return {"analysed_fps": (analysed1 - analysed0) / (elapsed + 1.1),
+            "delivered_fps": (delivered1 - delivered0) / elapsed,
+            "web_cpu": (cpu1[0] - cpu0[0]) / elapsed, "worker_cpu": (cpu1[1] - cpu0[1]) / elapsed}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cameras", type=int, nargs="+", default=[2, 4])
+    ap.add_argument("--groups", type=int, default=2)
+    ap.add_argument("--cores-per-group", type=int, default=1)
+    ap.add_argument("--cost-ms", type=float, default=30.0, help="GIL-holding analysis time per frame")
+    ap.add_argument("--fps", type=int, default=25)
+    ap.add_argument("--seconds", type=float, default=8.0)
+    args = ap.parse_args()
+
+    ring_us, pipe_us = bench_handover()
+    print(f"\n720p frame handover: FrameRing {ring_us / 1e3:.2f} ms, pickled through a Pipe {pipe_us / 1e3:.2f} ms "
+          f"({pipe_us / ring_us:.1f}x)")
+
+    profiles = load_profiles(None)
+    print(f"{os.cpu_count()} CPU(s); {args.cost_ms:g} ms GIL-bound analysis per frame, {args.fps} fps 720p clip, "
+          f"one 'grid' viewer per camera")
+    print(f"{'cameras':>8}{'mode':>22}{'analysed fps':>14}{'delivered fps':>15}{'web CPU':>9}{'worker CPU':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = Path(tmp) / "clip.mp4"
+        write_clip(clip, args.fps)
+        for n in args.cameras:
+            modes = (("threads (1 process)", lambda: run_threads(clip, n, args.cost_ms, args.seconds, profiles)),
+                     (f"workers ({args.groups} groups)",
+                      lambda: run_workers(clip, n, args.cost_ms, args.seconds, profiles,
+                                          args.groups, args.cores_per_group)))
+            for label, run in modes:
+                r = run()
+                print(f"{n:>8}{label:>22}{r['analysed_fps']:>14.1f}{r['delivered_fps']:>15.1f}"
+                      f"{r['web_cpu'] * 100:>8.0f}%{r['worker_cpu'] * 100:>11.0f}%")
+
+
+if __name__ == "__main__":
+    main()
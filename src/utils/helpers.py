@@ -9,10 +9,12 @@ def ensure_dir(p):
 def timestamp(fmt="%Y%m%d_%H%M%S"):
     return datetime.now().strftime(fmt)
 
-def save_image(frame, outdir, prefix="img"):
-    ensure_dir(outdir)
-    fname = f"{prefix}_{timestamp()}.jpg"
-    path = Path(outdir) / fname
-    import cv2
-    cv2.imwrite(str(path), frame)
-    return str(path)
+def save_image(frame, outdir, prefix="img", writer=None):
+    """
+    Save frame as <prefix>_<time>_<content hash>.jpg. With an EvidenceWriter
+    the write happens in the background and a Future of the path is returned.
+    """
+    from src.storage.evidence_writer import write_evidence
+    if writer is not None:
+        return writer.submit(frame, outdir, prefix=prefix)
+    return write_evidence(frame, outdir, prefix=prefix)
@@ -0,0 +1,269 @@
+# src/utils/quantize.py
+# INT8 post-training quantization for the crowd / weapon / fight detectors.
+#
+#   python src/utils/quantize.py --model weapon --data "D:/CrowedSense 360/datasets/Weapons/datas.yaml"
+#   python src/utils/quantize.py --weights models/crowd_yolo6/weights/best.pt --data datasets/crowd/data.yaml \
+#       --calib video_frames --backend openvino --max-drop 0.01
+#
+# 1. export the FP32 model through the hash-keyed cache (src/detector/backends.py)
+# 2. calibrate on --calib-frames images sampled from our own frames (the
+#    images/train split written by Splitcrowed.py, the video_frames/ folders
+#    of training.py, or the dataset's train split by default), letterboxed
+#    exactly like the live pipeline
+# 3. quantize (ONNX Runtime static QDQ, per-channel weights; or NNCF for
+#    OpenVINO), keeping the Detect head's box decoding in FP32
+# 4. measure mAP of the .pt and the INT8 model with YOLO(...).val() - the same
+#    path as Evalute.py - and the CPU latency of FP32 vs INT8
+# 5. promote the INT8 model (load_yolo(..., precision="int8") picks it up)
+#    only if mAP50-95 dropped by at most --max-drop; otherwise discard it and
+#    exit with status 1. A JSON report is written next to the model either way.
+#
+# Serving it: set `inference.precision: "int8"` in src/detector/config.yaml
+# (read by the web app's model registry and by infer_detector.py, which also
+# passes it on as FightClassifier(precision=...)). The INT8 model is only found
+# at the imgsz it was quantized at, so gate the size that is actually served -
+# for the 480 px fight classifier:
+#
+#   python src/utils/quantize.py --model fight --imgsz 480 --data datasets/fight/data.yaml
+
+import argparse
+import json
+import random
+import re
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import yaml
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from ultralytics import YOLO
+from src.detector.backends import export_cached, export_path, load_exported
+from src.detector.multi_head import letterbox
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+# ----------------- calibration data -----------------
+def dataset_split(data_yaml, split="train"):
+    """Image directory of a split of an ultralytics data.yaml"""
+    data = yaml.safe_load(Path(data_yaml).read_text())
+    base = Path(data.get("path") or Path(data_yaml).parent)
+    entry = data[split]
+    entry = entry[0] if isinstance(entry, list) else entry
+    p = Path(entry)
+    return p if p.is_absolute() else base / p
+
+
+def sample_frames(root, n, seed=0):
+    paths = sorted(p for p in Path(root).rglob("*") if p.suffix.lower() in IMAGE_EXTS)
+    if not paths:
+        raise FileNotFoundError(f"no calibration images under {root}")
+    random.Random(seed).shuffle(paths)
+    return paths[:n]
+
+
+def load_batch(path, imgsz):
+    """One 1x3xHxW float32 input, letterboxed like MultiHeadDetector (square, so all match)"""
+    frame = cv2.imread(str(path))
+    if frame is None:
+        return None
+    img, _, _ = letterbox(frame, imgsz, auto=False)
+    return np.ascontiguousarray(img[..., ::-1].transpose(2, 0, 1)[None], dtype=np.float32) / 255.0
+
+
+class FrameReader:
+    """onnxruntime CalibrationDataReader over sampled frames"""
+
+    def __init__(self, paths, imgsz, input_name):
+        self.paths = paths
+        self.imgsz = imgsz
+        self.input_name = input_name
+        self._it = iter(paths)
+
+    def get_next(self):
+        for path in self._it:
+            batch = load_batch(path, self.imgsz)
+            if batch is not None:
+                return {self.input_name: batch}
+        return None
+
+    def rewind(self):
+        self._it = iter(self.paths)
+
+
+def head_index(names):
+    """Index of the last top-level module (the Detect head) in exported node names like /model.22/..."""
+    idx = [int(m.group(1)) for n in names for m in [re.search(r"/model\.(\d+)/", n)] if m]
+    return max(idx) if idx else None
+
+
+# ----------------- quantizers -----------------
+def quantize_onnx(fp32_path, out_path, frames, imgsz):
+    import onnx
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    prepped = out_path.with_name(out_path.stem + "-prep.onnx")
+    quant_pre_process(str(fp32_path), str(prepped), skip_symbolic_shape=True)
+    model = onnx.load(str(prepped))
+    head = head_index([n.name for n in model.graph.node])
+    # box decoding (DFL, anchors, concat, sigmoid) loses too much in INT8; its convs stay quantized
+    exclude = [n.name for n in model.graph.node
+               if head is not None and f"/model.{head}/" in n.name
+               and (n.op_type != "Conv" or "/dfl/" in n.name)]
+    quantize_static(str(prepped), str(out_path), FrameReader(frames, imgsz, model.graph.input[0].name),
+                    quant_format=QuantFormat.QDQ, per_channel=True,
+                    weight_type=QuantType.QInt8, activation_type=QuantType.QUInt8,
+                    calibrate_method=CalibrationMethod.MinMax, nodes_to_exclude=exclude)
+    # keep names / stride / imgsz so OnnxYOLO and YOLO(...).val() can read the model
+    src_meta = {p.key: p.value for p in onnx.load(str(fp32_path)).metadata_props}
+    quantized = onnx.load(str(out_path))
+    for key, value in src_meta.items():
+        prop = quantized.metadata_props.add()
+        prop.key, prop.value = key, value
+    onnx.save(quantized, str(out_path))
+    prepped.unlink()
+    return out_path
+
+
+def quantize_openvino(fp32_dir, out_dir, frames, imgsz):
+    import nncf
+    import openvino as ov
+
+    core = ov.Core()
+    model = core.read_model(str(next(Path(fp32_dir).glob("*.xml"))))
+    head = head_index([op.get_friendly_name() for op in model.get_ops()])
+    ignored = None
+    if head is not None:
+        ignored = nncf.IgnoredScope(patterns=[f".*/model.{head}/.*/(Add|Sub|Mul|Div|Concat|Sigmoid|Softmax)"],
+                                    validate=False)
+    batches = [b for b in (load_batch(p, imgsz) for p in frames) if b is not None]
+    quantized = nncf.quantize(model, nncf.Dataset(batches), preset=nncf.QuantizationPreset.MIXED,
+                              subset_size=len(batches), ignored_scope=ignored)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    ov.save_model(quantized, str(out_dir / (out_dir.name.replace("_openvino_model", "") + ".xml")))
+    if (Path(fp32_dir) / "metadata.yaml").exists():
+        shutil.copy(Path(fp32_dir) / "metadata.yaml", out_dir / "metadata.yaml")
+    return out_dir
+
+
+# ----------------- measurements -----------------
+def evaluate(model_path, data, imgsz, split):
+    """mAP50 / mAP50-95 through ultralytics' validator (as in Evalute.py)"""
+    metrics = YOLO(str(model_path), task="detect").val(data=str(data), imgsz=imgsz, split=split, batch=1,
+                                                       device="cpu", plots=False, verbose=False)
+    return {"map50": float(metrics.box.map50), "map50_95": float(metrics.box.map)}
+
+
+def latency_ms(model, frames, imgsz, reps=3):
+    batches = [b for b in (load_batch(p, imgsz) for p in frames) if b is not None]
+    model._forward(batches[0])  # warm-up
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        for b in batches:
+            model._forward(b)
+    return (time.perf_counter() - t0) / (reps * len(batches)) * 1000
+
+
+def remove(path):
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", choices=["crowd", "weapon", "fight"], help="weights from src/detector/config.yaml")
+    ap.add_argument("--weights", help=".pt file (overrides --model)")
+    ap.add_argument("--data", required=True, help="ultralytics data.yaml used for the mAP comparison")
+    ap.add_argument("--split", default="val", help="data.yaml split to evaluate on")
+    ap.add_argument("--calib", help="folder of calibration frames (default: the data.yaml train split)")
+    ap.add_argument("--calib-frames", type=int, default=300)
+    ap.add_argument("--backend", choices=["onnx", "openvino"], default="onnx")
+    ap.add_argument("--imgsz", type=int, default=None,
+                    help="input size to export / quantize at; must match what the model is served at "
+                         "(default: config.yaml model_imgsz for --model, else 640)")
+    ap.add_argument("--max-drop", type=float, default=0.01, help="largest accepted mAP50-95 drop (absolute)")
+    ap.add_argument("--cache-dir", default=None)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    cfg = yaml.safe_load((ROOT / "src/detector/config.yaml").read_text()) or {}
+    if args.weights:
+        weights = Path(args.weights)
+    elif args.model:
+        weights = Path(cfg["models"][args.model])
+    else:
+        ap.error("one of --model / --weights is required")
+    if args.imgsz is None:
+        # the INT8 artifact is keyed by imgsz: it must be the size the consumer loads it at
+        args.imgsz = int((cfg.get("model_imgsz") or {}).get(args.model, 640)) if args.model else 640
+    print(f"📐 imgsz {args.imgsz}")
+    if not weights.exists():
+        sys.exit(f"❌ Weights not found: {weights}")
+
+    calib_root = Path(args.calib) if args.calib else dataset_split(args.data, "train")
+    frames = sample_frames(calib_root, args.calib_frames, args.seed)
+    print(f"📷 {len(frames)} calibration frame(s) from {calib_root}")
+
+    fp32 = export_cached(weights, args.backend, imgsz=args.imgsz, cache_dir=args.cache_dir)
+    target = export_path(weights, args.backend, args.imgsz, args.cache_dir, precision="int8")
+    candidate = target.with_name(target.name.replace("-int8", "-int8-candidate"))
+    remove(candidate)
+
+    print(f"⚙ Quantizing {fp32.name} ({args.backend})")
+    if args.backend == "onnx":
+        quantize_onnx(fp32, candidate, frames, args.imgsz)
+    else:
+        quantize_openvino(fp32, candidate, frames, args.imgsz)
+
+    print("📏 Evaluating FP32 (.pt) and INT8 ...")
+    base = evaluate(weights, args.data, args.imgsz, args.split)
+    quant = evaluate(candidate, args.data, args.imgsz, args.split)
+    timing_frames = frames[:20]
+    fp32_ms = latency_ms(load_exported(fp32, args.backend), timing_frames, args.imgsz)
+    int8_ms = latency_ms(load_exported(candidate, args.backend), timing_frames, args.imgsz)
+
+    drop = base["map50_95"] - quant["map50_95"]
+    promoted = drop <= args.max_drop
+    report = {
+        "weights": str(weights),
+        "backend": args.backend,
+        "imgsz": args.imgsz,
+        "calibration": {"root": str(calib_root), "frames": len(frames), "seed": args.seed},
+        "fp32": dict(base, latency_ms=round(fp32_ms, 2)),
+        "int8": dict(quant, latency_ms=round(int8_ms, 2)),
+        "speedup": round(fp32_ms / int8_ms, 2) if int8_ms else None,
+        "map50_95_drop": round(drop, 4),
+        "max_drop": args.max_drop,
+        "promoted": promoted,
+    }
+
+    print(f"\n{'':>6}{'mAP50':>9}{'mAP50-95':>10}{'ms/frame':>10}")
+    print(f"{'FP32':>6}{base['map50']:>9.4f}{base['map50_95']:>10.4f}{fp32_ms:>10.1f}")
+    print(f"{'INT8':>6}{quant['map50']:>9.4f}{quant['map50_95']:>10.4f}{int8_ms:>10.1f}")
+    print(f"speedup {report['speedup']}x, mAP50-95 drop {drop:+.4f} (limit {args.max_drop})")
+
+    if promoted:
+        remove(target)
+        candidate.rename(target)
+        print(f"✅ Promoted {target.name} - load_yolo(..., precision=\"int8\") will use it")
+    else:
+        remove(candidate)
+        print(f"❌ Not promoted: accuracy drop {drop:.4f} exceeds {args.max_drop}")
+    report_path = target.with_name(target.name + ".json")
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(report, indent=2))
+    print(f"📝 Report: {report_path}")
+    sys.exit(0 if promoted else 1)
+
+
+if __name__ == "__main__":
+    main()
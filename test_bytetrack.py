@@ -0,0 +1,112 @@
+"""
+ID stability of the ByteTrack-style tracker (src/trackers/bytetrack_wrapper.py)
+on deterministic synthetic sequences: people crossing each other, a person
+hidden for a few frames, low-confidence detections during an occlusion.
+Run with pytest or directly: python test_bytetrack.py
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+ROOT = Path(__file__).parent
+sys.path.insert(0, str(ROOT))
+
+from src.trackers.bytetrack_wrapper import ByteTracker, iou_pairs, sparse_assign
+
+
+def run(tracker, frames):
+    """frames: list of (boxes (N,4), scores (N,), truth (N,)) -> ID switches, identities per truth id"""
+    identity, seen, switches = {}, {}, 0
+    for boxes, scores, truth in frames:
+        ids, tboxes, _, labels = tracker.update(boxes, scores, labels=truth)
+        for tid, t in zip(ids, labels):
+            if tid in identity and identity[tid] != t:
+                switches += 1
+            identity[tid] = t
+            seen.setdefault(t, set()).add(int(tid))
+    return switches, seen
+
+
+def box(cx, cy, w=40, h=100):
+    return [cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2]
+
+
+def test_two_people_crossing():
+    """Walking towards each other, slightly offset vertically; fully overlapping mid-way"""
+    frames = []
+    for f in range(60):
+        a = box(100 + 5 * f, 300)
+        b = box(400 - 5 * f, 310)
+        frames.append((np.array([a, b]), np.array([0.9, 0.9]), np.array([0, 1])))
+    switches, seen = run(ByteTracker(), frames)
+    assert switches == 0
+    assert all(len(ids) == 1 for ids in seen.values())
+
+
+def test_crossing_with_low_confidence_occlusion():
+    """The occluded person drops to a low score while the two overlap (second association stage)"""
+    frames = []
+    for f in range(60):
+        a = box(100 + 5 * f, 300)
+        b = box(400 - 5 * f, 305)
+        occluded = abs((100 + 5 * f) - (400 - 5 * f)) < 40
+        frames.append((np.array([a, b]), np.array([0.9, 0.3 if occluded else 0.9]), np.array([0, 1])))
+    switches, seen = run(ByteTracker(track_thresh=0.5, low_thresh=0.1), frames)
+    assert switches == 0
+    assert all(len(ids) == 1 for ids in seen.values())
+
+
+def test_many_crossings():
+    """Two rows of 20 people walking through each other"""
+    frames = []
+    n = 20
+    for f in range(80):
+        left = [box(100 + 4 * f, 200 + 150 * i) for i in range(n)]
+        right = [box(420 - 4 * f, 215 + 150 * i) for i in range(n)]
+        frames.append((np.array(left + right), np.full(2 * n, 0.9), np.arange(2 * n)))
+    switches, seen = run(ByteTracker(), frames)
+    assert switches == 0
+    assert len(seen) == 2 * n and all(len(ids) == 1 for ids in seen.values())
+
+
+def test_reidentified_after_missed_frames():
+    """A person missing for 10 frames (< max_age) keeps the same ID"""
+    frames = []
+    for f in range(50):
+        boxes = [box(100 + 3 * f, 300)]
+        truth = [0]
+        if not 20 <= f < 30:
+            boxes.append(box(600, 300 + 2 * f))
+            truth.append(1)
+        frames.append((np.array(boxes), np.full(len(boxes), 0.9), np.array(truth)))
+    switches, seen = run(ByteTracker(max_age=30), frames)
+    assert switches == 0
+    assert seen[1] and len(seen[1]) == 1
+
+
+def test_sparse_assign_is_optimal():
+    """sparse_assign matches a dense linear_sum_assignment on random crowded scenes"""
+    from scipy.optimize import linear_sum_assignment
+
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        a = rng.uniform(0, 400, (60, 2))
+        b = a + rng.normal(0, 12, a.shape)
+        a = np.hstack([a, a + 40])
+        b = np.hstack([b, b + 40])
+        ia, ib, iou = iou_pairs(a, b, 0.2)
+        rows, cols = sparse_assign(ia, ib, iou - 0.2, len(a), len(b))
+        gain = np.zeros((len(a), len(b)))
+        gain[ia, ib] = iou - 0.2
+        r, c = linear_sum_assignment(gain, maximize=True)
+        assert np.isclose(gain[rows, cols].sum(), gain[r, c].sum())
+        assert len(set(rows.tolist())) == len(rows) and len(set(cols.tolist())) == len(cols)
+
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"✅ {name}")